@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+"""
+Script for compiling the saved flight satisfaction model into a lookup table
+for the SkySatisfy project, and for verifying a compiled table against the
+model.
+"""
+import argparse
+import logging
+import logging.config
+import sys
+
+from backend.utils.model_serializer import load_model
+from backend.utils.lookup_table import (compile_lookup_table,
+                                        load_lookup_table,
+                                        save_lookup_table,
+                                        verify_lookup_table)
+from backend.config import (LOGGING_CONFIG, MODEL_FILE_PATH,
+                            LOOKUP_TABLE_FILE_PATH)
+
+
+def build_lookup_table(model_path=MODEL_FILE_PATH,
+                       path=LOOKUP_TABLE_FILE_PATH, verify=False) -> int:
+    """
+    Compile the saved model into a lookup table, or verify an existing one.
+
+    Parameters:
+    - model_path (str): Path of the saved model.
+    - path (str): Path of the lookup table.
+    - verify (bool): Verify the saved table instead of compiling a new one.
+
+    Returns:
+    - int: Number of mismatching cells found by verification, 0 otherwise.
+    """
+    model = load_model(model_path)
+    if verify:
+        return verify_lookup_table(load_lookup_table(path), model)
+
+    save_lookup_table(compile_lookup_table(model), path)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.config.dictConfig(LOGGING_CONFIG)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verify', action='store_true',
+                        help='check the saved table against the model '
+                             'across the whole grid')
+    args = parser.parse_args()
+    sys.exit(1 if build_lookup_table(verify=args.verify) else 0)
@@ -10,15 +10,135 @@ PORT = 8000
 # path to the dataset file
 DATASET_FILE_PATH = 'data/data.csv'
 
+# pandas CSV parser for the dataset: 'pyarrow', 'c', or None for pyarrow
+# when it is installed
+CSV_ENGINE = None
+
+# encoding of the categorical features (class, customer_type and
+# type_of_travel) for training:
+# 'one_hot'     - class is one-hot encoded, the binary features are 0/1
+# 'categorical' - every categorical feature is one column of category codes,
+#                 split natively by XGBoost
+# models carry their encoding, so serving follows the model, not this
+# setting; external-memory training requires 'one_hot'
+FEATURE_MODE = 'one_hot'
+
+# out-of-core training: the dataset is streamed in chunks into an
+# external-memory DMatrix paged to CACHE_FOLDER_PATH instead of being
+# loaded, with chunks sized to keep the parsed rows under MEMORY_CAP_MB
+EXTERNAL_MEMORY = {
+    'ENABLED': False,
+    'MEMORY_CAP_MB': 256,
+    'CACHE_FOLDER_PATH': 'data/xgb_cache/',
+}
+
 # path to the model folder
 MODEL_FOLDER_PATH = 'models/'
 
 # path to the model file
-MODEL_FILE_PATH = os.path.join(MODEL_FOLDER_PATH, 'model.pkl')
+MODEL_FILE_PATH = os.path.join(MODEL_FOLDER_PATH, 'model.ubj')
 
 # path to the metrics file
 METRICS_FILE_PATH = os.path.join(MODEL_FOLDER_PATH, 'metrics.json')
 
+# path to the lookup table compiled from the model
+LOOKUP_TABLE_FILE_PATH = os.path.join(MODEL_FOLDER_PATH, 'lookup_table.npy')
+
+# content-addressed store of training artifacts (preprocessed dataset,
+# cross-validation metrics, trained model), each keyed by the hash of its
+# inputs and parameters; least recently used entries are evicted beyond
+# MAX_SIZE_MB
+ARTIFACT_STORE = {
+    'FOLDER_PATH': os.path.join(MODEL_FOLDER_PATH, 'artifacts'),
+    'MAX_SIZE_MB': 2048,
+}
+
+# tuned model parameters written by backend/tune.py; training uses them
+# instead of MODEL_PARAMS when the file exists
+PARAMS_FILE_PATH = os.path.join(MODEL_FOLDER_PATH, 'params.json')
+
+# lock file held while a background training job is running
+TRAINING_LOCK_FILE_PATH = os.path.join(MODEL_FOLDER_PATH, 'training.lock')
+
+# maximum number of grid cells in the compiled lookup table
+LOOKUP_TABLE_MAX_CELLS = 20_000_000
+
+# inference engine used by the service:
+# 'native' - xgb.Booster.predict
+# 'array'  - NumPy evaluation of the flattened trees, no DMatrix or OpenMP
+# 'lookup' - the lookup table compiled from the model, falls back to
+#            'native' when the table is missing or stale
+INFERENCE_ENGINE = 'native'
+
+# maximum number of records accepted by the batch prediction endpoint
+MAX_BATCH_SIZE = 10000
+
+# maximum number of predictions kept in the in-process LRU cache (0 disables)
+PREDICTION_CACHE_SIZE = 10000
+
+# micro-batching of concurrent /predict calls within a worker; only useful
+# when workers serve requests concurrently (e.g. gunicorn --threads)
+MICRO_BATCHING = {
+    'ENABLED': False,
+    'MAX_BATCH_SIZE': 64,
+    'MAX_WAIT_MS': 2,
+}
+
+# admission control of the prediction endpoints, per worker: at most
+# MAX_CONCURRENCY requests are scored at once and up to MAX_QUEUE more wait
+# for a slot for at most MAX_WAIT_MS; requests beyond the queue are shed with
+# 429, requests that time out waiting with 503. Clients may send the Unix time
+# by which they need the response in DEADLINE_HEADER; requests that cannot
+# finish by then are rejected with 503 instead of being scored late. A
+# worker only sees as many requests as it has threads, so gunicorn's
+# threads are planned above MAX_CONCURRENCY + MAX_QUEUE; with fewer, the
+# queue limit is never reached and only client deadlines shed load
+ADMISSION_CONTROL = {
+    'ENABLED': True,
+    'MAX_CONCURRENCY': 8,
+    'MAX_QUEUE': 16,
+    'MAX_WAIT_MS': 1000,
+    'DEADLINE_HEADER': 'X-Request-Deadline',
+}
+
+# gunicorn settings, read by gunicorn.conf.py; None values are planned
+# from the available CPUs, see backend/utils/cpu_planner.py
+GUNICORN = {
+    'WORKERS': None,
+    # None: one more than admission control admits and queues, 1 without it
+    'THREADS': None,
+    # import the application once in the master process and share it
+    # copy-on-write with the workers; the model is loaded after the fork
+    'PRELOAD_APP': True,
+}
+
+# hot reload of the model: every worker polls the model and metrics files
+# and swaps in a new model once it is loaded and warmed
+MODEL_RELOAD = {
+    'WATCH': True,
+    'POLL_INTERVAL': 5,
+}
+
+# token required by the admin endpoints, which are disabled when it is unset
+ADMIN_TOKEN = os.environ.get('SKYSATISFY_ADMIN_TOKEN')
+
+# on-demand profiling of live requests: a sampled fraction of requests, and
+# every request whose X-Profile header carries the admin token, is profiled
+# with cProfile and aggregated per endpoint (see /admin/profile)
+PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.001,
+}
+
+# XGBoost threads for training and per serving booster, and parallel
+# cross-validation jobs; None plans them from the CPUs available to the
+# process (affinity mask and cgroup CPU quota)
+CPU_PLAN = {
+    'TRAINING_NTHREAD': None,
+    'INFERENCE_NTHREAD': None,
+    'CV_JOBS': None,
+}
+
 # model parameters
 MODEL_PARAMS = {
     'XGB_PARAMS': {
@@ -26,12 +146,63 @@ MODEL_PARAMS = {
         'max_depth': 6,
         'min_child_weight': 10,
         'objective': 'binary:logistic',
-        'nthread': 8,
         'seed': 42,
     },
     'XGB_NUM_BOOST_ROUND': 25,
 }
 
+# incremental retraining: the saved model is updated with the rows of
+# NEW_DATA_FILE_PATH only, either by boosting NUM_BOOST_ROUND more trees
+# ('boost') or by refitting the leaf values of its trees ('refresh'). The
+# most recent HOLDOUT_FRACTION of the new rows is held out, and the update
+# is kept only if its holdout AUC is at most MAX_AUC_DROP below the current
+# model's
+INCREMENTAL_TRAINING = {
+    'NEW_DATA_FILE_PATH': 'data/new_data.csv',
+    'MODE': 'boost',
+    'NUM_BOOST_ROUND': 5,
+    'HOLDOUT_FRACTION': 0.2,
+    'MAX_AUC_DROP': 0.0,
+}
+
+# hyperparameter search (backend/tune.py): successive halving over
+# N_TRIALS random configurations, starting with MIN_ROUNDS boosting rounds
+# per trial and keeping the best 1 / REDUCTION_FACTOR of the trials with
+# REDUCTION_FACTOR times the rounds at each rung, all within BUDGET_SECONDS.
+# Folds stop early after EARLY_STOPPING_ROUNDS rounds without improvement
+# of the validation AUC. SPACE gives each parameter's distribution: 'log'
+# and 'uniform' floats or 'int' between the bounds
+TUNING = {
+    'BUDGET_SECONDS': 600,
+    'N_TRIALS': 27,
+    'MIN_ROUNDS': 10,
+    'REDUCTION_FACTOR': 3,
+    'EARLY_STOPPING_ROUNDS': 10,
+    'JOBS': None,
+    'SPACE': {
+        'eta': ('log', 0.02, 0.5),
+        'max_depth': ('int', 2, 8),
+        'min_child_weight': ('log', 1, 100),
+        'subsample': ('uniform', 0.5, 1.0),
+        'colsample_bytree': ('uniform', 0.5, 1.0),
+        'lambda': ('log', 0.1, 10),
+    },
+}
+
+# asynchronous structured logging for the service: records are queued for
+# a background thread that writes them as JSON lines, records of hot-path
+# events are sampled, and records that find the queue full are dropped and
+# counted (see /stats and /metrics)
+ASYNC_LOGGING = {
+    'ENABLED': False,
+    'QUEUE_SIZE': 10000,
+    # fraction of records kept per event; other records are all kept
+    'SAMPLE_RATES': {
+        'prediction': 0.01,
+        'batch_prediction': 0.01,
+    },
+}
+
 # logging configuration
 LOGGING_CONFIG = {
     'version': 1,
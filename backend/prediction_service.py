@@ -1,37 +1,79 @@
 import os
 import logging
-import logging.config
-
-from flask import Flask, request, render_template, jsonify, abort
-from backend.utils.model_serializer import load_model
-from backend.utils.predictor import make_prediction
-from backend.utils.model_evaluator import format_metrics
-from backend.utils.metrics_storage import (load_metrics,
-                                           get_metrics_creation_date)
-from backend.train_and_save_model import train_and_save_model
-from backend.schemas.prediction_schema import PredictionSchema
+import math
+import time
+
+from flask import (Flask, Response, g, request, render_template, jsonify,
+                   abort)
+from backend.utils.model_registry import ModelRegistry
+from backend.utils.micro_batcher import MicroBatcher
+from backend.utils.predictor import (make_prediction, make_predictions,
+                                     format_prediction, PREDICTION_CACHE)
+from backend.utils.metrics_storage import format_metrics
+from backend.utils.training_job import start_training_job
+from backend.utils.instrumentation import (INSTRUMENTATION,
+                                           PROMETHEUS_CONTENT_TYPE)
+from backend.utils.request_profiler import RequestProfiler
+from backend.utils.async_logging import configure_logging
+from backend.utils.admission import AdmissionController, AdmissionRejected
+from backend.schemas.fast_validator import PREDICTION_VALIDATOR
 from backend.config import (MODEL_FILE_PATH, METRICS_FILE_PATH, HOST, PORT,
-                            LOGGING_CONFIG)
+                            MAX_BATCH_SIZE, MICRO_BATCHING,
+                            MODEL_RELOAD, ADMIN_TOKEN, ADMISSION_CONTROL)
 
 from werkzeug.exceptions import BadRequest, InternalServerError
 from marshmallow import ValidationError
 from flasgger import Swagger
 
 
-logging.config.dictConfig(LOGGING_CONFIG)
+# Root's async handler in async logging mode, None otherwise
+log_handler = configure_logging()
+
+
+registry = ModelRegistry()
+
+# The model is loaded by every process serving requests, not at import: a
+# preloading gunicorn master imports this module before forking its workers,
+# and XGBoost's OpenMP runtime is not fork-safe. Startup never trains
+# in-process: a missing model is trained by a background job and picked up
+# by the model watcher, and the service reports not-ready until then
+if not (os.path.isfile(MODEL_FILE_PATH)
+        and os.path.isfile(METRICS_FILE_PATH)):
+    logging.error("Model or metrics not found. Starting training job...")
+    start_training_job()
+
+
+def _score_micro_batch(items: list) -> list:
+    """Score (engine, record) pairs, one batched call per engine."""
+    results = [None] * len(items)
+    groups = {}
+    for i, (engine, _) in enumerate(items):
+        groups.setdefault(id(engine), (engine, []))[1].append(i)
+    for engine, indices in groups.values():
+        predictions = make_predictions(engine, [items[i][1] for i in indices])
+        for i, prediction in zip(indices, predictions):
+            results[i] = prediction
+    return results
+
+
+# Sampled and on-demand profiling of live requests, see /admin/profile
+profiler = RequestProfiler()
+
+
+# Concurrent /predict calls are scored together when micro-batching is on
+micro_batcher = None
+if MICRO_BATCHING['ENABLED']:
+    micro_batcher = MicroBatcher(_score_micro_batch)
 
 
-try:
-    if not os.path.isfile(MODEL_FILE_PATH) or \
-       not os.path.isfile(METRICS_FILE_PATH):
-        logging.error("Model or metrics not found. Starting training...")
-        train_and_save_model()
+# Per-worker concurrency limit, wait queue and deadlines of the prediction
+# endpoints
+admission = None
+if ADMISSION_CONTROL['ENABLED']:
+    admission = AdmissionController()
 
-    model = load_model()
-    metrics = load_metrics()
-except Exception as e:
-    logging.error(f"An error occurred while loading the model or metrics: {e}")
-    abort(500, description="Internal Server Error")
+# endpoints subject to admission control
+ADMITTED_ENDPOINTS = {'predict', 'predict_batch'}
 
 
 template_dir = os.path.abspath('./frontend/templates')
@@ -41,6 +83,104 @@ app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
 swagger = Swagger(app)
 
 
+@app.before_request
+def start_model_watcher():
+    """
+    Load the model and start this worker's model file watcher on its first
+    request, unless the gunicorn post_fork hook already loaded it. Without
+    a model the watcher always runs, so the model is loaded once trained.
+    """
+    registry.ensure_loaded()
+    if MODEL_RELOAD['WATCH'] or registry.current is None:
+        registry.ensure_watching()
+
+
+@app.before_request
+def start_request_timer():
+    """Note the start of the request for its duration metric."""
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Record the duration and status code of every request."""
+    started = g.get('request_started')
+    if started is not None:
+        INSTRUMENTATION.observe_request(request.endpoint or 'unknown',
+                                        response.status_code,
+                                        time.perf_counter() - started)
+    return response
+
+
+@app.before_request
+def admit_request():
+    """Admit prediction requests, or shed them when the worker is
+    saturated or their deadline cannot be met."""
+    if admission is None or request.endpoint not in ADMITTED_ENDPOINTS:
+        return None
+    try:
+        deadline = _request_deadline()
+    except ValueError:
+        return jsonify({'error': 'Invalid '
+                        f"{ADMISSION_CONTROL['DEADLINE_HEADER']} header"}), 400
+    try:
+        g.admitted_at = admission.acquire(deadline)
+    except AdmissionRejected as e:
+        response = jsonify({'error': 'Request rejected',
+                            'reason': e.reason})
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return None
+
+
+@app.teardown_request
+def release_admission(exception=None):
+    """Free the admission slot of the request."""
+    admitted_at = g.pop('admitted_at', None)
+    if admitted_at is not None:
+        admission.release(admitted_at)
+
+
+@app.before_request
+def start_profiling():
+    """Profile sampled requests and requests sending the admin token in
+    the X-Profile header."""
+    g.profile = profiler.start(forced=_is_authorized('X-Profile'))
+
+
+@app.teardown_request
+def stop_profiling(exception=None):
+    """Add the request's profile to its endpoint's aggregate."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile, request.endpoint or 'unknown')
+
+
+def _is_authorized(header='X-Admin-Token') -> bool:
+    """Check that admin access is configured and the header carries the
+    admin token."""
+    return bool(ADMIN_TOKEN) and request.headers.get(header) == ADMIN_TOKEN
+
+
+def _request_deadline():
+    """Return the Unix time by which the client needs the response, None
+    when it sent no deadline."""
+    value = request.headers.get(ADMISSION_CONTROL['DEADLINE_HEADER'])
+    if value is None:
+        return None
+    deadline = float(value)
+    if not math.isfinite(deadline):
+        raise ValueError(f"Invalid deadline: {value}")
+    return deadline
+
+
+def _model_not_ready():
+    """Build the response for requests that need a model before one is
+    loaded."""
+    return jsonify({'error': 'Model is not ready'}), 503
+
+
 @app.route('/')
 def index():
     """Render the main page with the HTML form."""
@@ -118,11 +258,15 @@ def predict():
             verdict:
               type: string
               description: The verdict based on the prediction
+            model_version:
+              type: string
+              description: Version of the model that made the prediction
         examples:
           application/json:
             {
               "prediction": 0.991,
-              "verdict": "satisfied"
+              "verdict": "satisfied",
+              "model_version": "d3bb736776bd"
             }
       400:
         description: Invalid input or Bad request
@@ -131,6 +275,8 @@ def predict():
             {
               "error": "Invalid input data"
             }
+      503:
+        description: No model has been loaded yet
       500:
         description: Internal Server Error or An unexpected error occurred
         examples:
@@ -140,30 +286,158 @@ def predict():
             }
     """
     try:
-        schema = PredictionSchema()
-        data = schema.load(request.json)
-        prediction = make_prediction(model, data)
+        # The whole request is served by the model current at its start
+        loaded = registry.current
+        if loaded is None:
+            return _model_not_ready()
+        with INSTRUMENTATION.timer('parse'):
+            payload = request.json
+        with INSTRUMENTATION.timer('validate'):
+            data = PREDICTION_VALIDATOR.load(payload)
+        if micro_batcher is not None:
+            prediction = micro_batcher.submit((loaded.engine, data))
+        else:
+            prediction = make_prediction(loaded.engine, data)
 
-        verdict = "satisfied" if prediction > 0.5 else "Not satisfied"
-
-        return jsonify({
-            'prediction': round(prediction, 3),
-            'verdict': verdict
-          })
+        with INSTRUMENTATION.timer('serialize'):
+            response = format_prediction(prediction)
+            response['model_version'] = loaded.version
+            return jsonify(response)
     except FileNotFoundError as e:
-        logging.error(f"File not found: {e}")
+        INSTRUMENTATION.count_error('predict', type(e).__name__)
+        logging.error("File not found: %s", e)
         abort(500, description="Internal Server Error")
     except ValidationError as e:
-        logging.error(f"Validation error: {e}")
+        INSTRUMENTATION.count_error('predict', type(e).__name__)
+        logging.error("Validation error: %s", e)
         return jsonify({'error': str(e.normalized_messages())}), 400
     except BadRequest as e:
-        logging.error(f"Bad request: {e}")
+        INSTRUMENTATION.count_error('predict', type(e).__name__)
+        logging.error("Bad request: %s", e)
+        return jsonify({'error': 'Bad request'}), 400
+    except InternalServerError as e:
+        INSTRUMENTATION.count_error('predict', type(e).__name__)
+        logging.error("Internal server error: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+    except Exception as e:
+        INSTRUMENTATION.count_error('predict', type(e).__name__)
+        logging.error("An unexpected error occurred: %s", e)
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Make predictions for a batch of records with a single model call.
+
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/PredictionInput'
+    responses:
+      200:
+        description: Per-record prediction results, in input order
+        schema:
+          id: BatchPredictionOutput
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  prediction:
+                    type: number
+                    format: float
+                    description: The prediction score
+                  verdict:
+                    type: string
+                    description: The verdict based on the prediction
+                  error:
+                    type: string
+                    description: Validation error for this record
+            model_version:
+              type: string
+              description: Version of the model that made the predictions
+        examples:
+          application/json:
+            {
+              "results": [
+                {"prediction": 0.991, "verdict": "satisfied"},
+                {"error": "{'age': ['Missing data for required field.']}"}
+              ],
+              "model_version": "d3bb736776bd"
+            }
+      400:
+        description: Invalid input or Bad request
+        examples:
+          application/json:
+            {
+              "error": "Expected a JSON array of records"
+            }
+      503:
+        description: No model has been loaded yet
+      500:
+        description: Internal Server Error or An unexpected error occurred
+        examples:
+          application/json:
+            {
+              "error": "Internal server error"
+            }
+    """
+    try:
+        with INSTRUMENTATION.timer('parse'):
+            records = request.json
+        if not isinstance(records, list):
+            return jsonify({'error': 'Expected a JSON array of records'}), 400
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'Batch size exceeds the limit of {MAX_BATCH_SIZE}'
+              }), 400
+
+        loaded = registry.current
+        if loaded is None:
+            return _model_not_ready()
+
+        # Validate the whole batch at once, keeping the valid records
+        with INSTRUMENTATION.timer('validate'):
+            try:
+                data = PREDICTION_VALIDATOR.load(records, many=True)
+                errors = {}
+            except ValidationError as e:
+                data = e.valid_data
+                errors = e.normalized_messages()
+
+        valid_indices = [i for i in range(len(records)) if i not in errors]
+        predictions = make_predictions(loaded.engine,
+                                       [data[i] for i in valid_indices])
+
+        with INSTRUMENTATION.timer('serialize'):
+            results = [None] * len(records)
+            for i, prediction in zip(valid_indices, predictions):
+                results[i] = format_prediction(prediction)
+            for i, messages in errors.items():
+                results[i] = {'error': str(messages)}
+
+            return jsonify({
+                'results': results,
+                'model_version': loaded.version
+              })
+    except BadRequest as e:
+        INSTRUMENTATION.count_error('predict_batch', type(e).__name__)
+        logging.error("Bad request: %s", e)
         return jsonify({'error': 'Bad request'}), 400
     except InternalServerError as e:
-        logging.error(f"Internal server error: {e}")
+        INSTRUMENTATION.count_error('predict_batch', type(e).__name__)
+        logging.error("Internal server error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
     except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}")
+        INSTRUMENTATION.count_error('predict_batch', type(e).__name__)
+        logging.error("An unexpected error occurred: %s", e)
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 
@@ -191,14 +465,22 @@ def model_info():
                   type: string
             model_type:
               type: string
+            model_version:
+              type: string
             training_date:
               type: string
+      503:
+        description: No model has been loaded yet
     """
-    formatted_metrics = format_metrics(metrics)
+    loaded = registry.current
+    if loaded is None:
+        return _model_not_ready()
+    formatted_metrics = format_metrics(loaded.metrics)
     try:
         info = {
             'model_type': 'XGBoost',
-            'training_date': get_metrics_creation_date(MODEL_FILE_PATH),
+            'model_version': loaded.version,
+            'training_date': loaded.training_date,
             'metrics': formatted_metrics
         }
         return jsonify(info)
@@ -206,6 +488,240 @@ def model_info():
         return jsonify({'error': str(e)}), 400
 
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """
+    Retrieve runtime statistics of this worker
+    ---
+    responses:
+      200:
+        description: Runtime statistics
+        schema:
+          id: StatsOutput
+          properties:
+            prediction_cache:
+              type: object
+              properties:
+                size:
+                  type: integer
+                maxsize:
+                  type: integer
+                hits:
+                  type: integer
+                misses:
+                  type: integer
+                hit_rate:
+                  type: number
+            micro_batcher:
+              type: object
+              description: Batch size and queue wait histograms, present
+                           when micro-batching is enabled
+            logging:
+              type: object
+              description: Log queue size and dropped records, present in
+                           async logging mode
+              properties:
+                queue_size:
+                  type: integer
+                maxsize:
+                  type: integer
+                dropped:
+                  type: integer
+            admission:
+              type: object
+              description: Concurrency limit, current load and admitted,
+                           queued and shed request counts, present when
+                           admission control is enabled
+    """
+    worker_stats = {'prediction_cache': PREDICTION_CACHE.stats()}
+    if micro_batcher is not None:
+        worker_stats['micro_batcher'] = micro_batcher.stats()
+    if log_handler is not None:
+        worker_stats['logging'] = log_handler.stats()
+    if admission is not None:
+        worker_stats['admission'] = admission.stats()
+    return jsonify(worker_stats), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Retrieve latency histograms and counters of this worker in the
+    Prometheus text format
+    ---
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Per-stage and per-endpoint latency histograms, request
+                     counts by status code, error counts by type, admission
+                     control load and counts, dropped log records and the
+                     served model version
+    """
+    loaded = registry.current
+    histograms = {}
+    if micro_batcher is not None:
+        batcher_stats = micro_batcher.stats()
+        histograms['micro_batch_size'] = (
+            'Records per micro-batch.', batcher_stats['batch_size'])
+        histograms['micro_batch_queue_wait_seconds'] = (
+            'Time records wait for their micro-batch.',
+            batcher_stats['queue_wait_seconds'])
+    counters = {}
+    gauges = {}
+    if admission is not None:
+        admission_stats = admission.stats()
+        counters['admission_admitted_total'] = (
+            'Prediction requests admitted.',
+            admission_stats['admitted_total'])
+        counters['admission_queued_total'] = (
+            'Prediction requests that waited for a slot.',
+            admission_stats['queued_total'])
+        counters['admission_shed_total'] = (
+            'Prediction requests rejected, by reason.', 'reason',
+            admission_stats['shed_total'])
+        gauges['admission_in_flight'] = (
+            'Prediction requests being served.', admission_stats['in_flight'])
+        gauges['admission_queued'] = (
+            'Prediction requests waiting for a slot.',
+            admission_stats['queued'])
+    if log_handler is not None:
+        counters['log_records_dropped_total'] = (
+            'Log records dropped because the log queue was full.',
+            log_handler.dropped)
+    text = INSTRUMENTATION.render_prometheus(
+        model_version=loaded.version if loaded is not None else None,
+        histograms=histograms, counters=counters, gauges=gauges)
+    return Response(text, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Reload the model and metrics from disk in the background
+    ---
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+    responses:
+      202:
+        description: Reload started; the new model is swapped in once it
+                     is loaded and warmed
+        schema:
+          id: ReloadOutput
+          properties:
+            status:
+              type: string
+            model_version:
+              type: string
+              description: Version of the model served until the swap
+      403:
+        description: Missing or invalid admin token
+    """
+    if not _is_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    loaded = registry.current
+    registry.reload_in_background()
+    return jsonify({
+        'status': 'reloading',
+        'model_version': loaded.version if loaded is not None else None
+      }), 202
+
+
+@app.route('/admin/profile', methods=['GET'])
+def admin_profile():
+    """
+    Download the aggregated request profiles of this worker
+    ---
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: endpoint
+        in: query
+        type: string
+        required: false
+        description: Endpoint whose profile is returned; without it, the
+                     number of profiled requests per endpoint is listed
+      - name: format
+        in: query
+        type: string
+        enum: ["text", "pstats"]
+        required: false
+        description: pstats report sorted by cumulative time, or the binary
+                     pstats dump
+    responses:
+      200:
+        description: Profile of the endpoint, or the profiled endpoints
+        schema:
+          id: ProfileSummaryOutput
+          properties:
+            enabled:
+              type: boolean
+            sample_rate:
+              type: number
+            endpoints:
+              type: object
+              description: Number of profiled requests per endpoint
+      403:
+        description: Missing or invalid admin token
+      404:
+        description: No profile has been collected for the endpoint
+    """
+    if not _is_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    endpoint = request.args.get('endpoint')
+    if endpoint is None:
+        return jsonify({
+            'enabled': profiler.enabled,
+            'sample_rate': profiler.sample_rate,
+            'endpoints': profiler.summary()
+          }), 200
+
+    if request.args.get('format', 'text') == 'pstats':
+        content = profiler.dump(endpoint)
+        mimetype = 'application/octet-stream'
+    else:
+        content = profiler.render(endpoint)
+        mimetype = 'text/plain'
+    if content is None:
+        return jsonify({'error': f'No profile for endpoint {endpoint}'}), 404
+
+    response = Response(content, mimetype=mimetype)
+    if mimetype == 'application/octet-stream':
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename={endpoint}.prof'
+    return response
+
+
+@app.route('/admin/profile', methods=['DELETE'])
+def admin_profile_reset():
+    """
+    Drop the aggregated request profiles of this worker
+    ---
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+    responses:
+      200:
+        description: Profiles dropped
+      403:
+        description: Missing or invalid admin token
+    """
+    if not _is_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    profiler.reset()
+    return jsonify({'status': 'reset'}), 200
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
@@ -224,5 +740,32 @@ def health_check():
     return jsonify({'status': 'OK'}), 200
 
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Check whether the API has a loaded and warmed model to serve
+    ---
+    responses:
+      200:
+        description: A model is loaded and requests can be served
+        schema:
+          id: ReadinessOutput
+          properties:
+            status:
+              type: string
+              description: The readiness status of the API
+            model_version:
+              type: string
+              description: Version of the served model
+      503:
+        description: No model has been loaded yet, e.g. while the initial
+                     model is being trained
+    """
+    loaded = registry.current
+    if loaded is None:
+        return jsonify({'status': 'NOT READY'}), 503
+    return jsonify({'status': 'READY', 'model_version': loaded.version}), 200
+
+
 if __name__ == '__main__':
     app.run(debug=True, host=HOST, port=PORT)
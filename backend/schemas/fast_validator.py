@@ -0,0 +1,180 @@
+"""
+Precompiled request validator for the SkySatisfy project.
+
+A marshmallow schema is compiled once into plain per-field checks: set
+membership for OneOf validators and bound comparisons for Range validators.
+Values that pass these checks are accepted as they are; anything else, such
+as a missing field, a wrong type or an out-of-range value, is handed to the
+marshmallow field itself, so results and error messages are identical to
+`Schema.load`.
+"""
+
+from collections.abc import Mapping
+
+from marshmallow import RAISE, EXCLUDE, ValidationError, fields, validate
+from marshmallow.utils import is_collection, missing
+
+from backend.schemas.prediction_schema import PredictionSchema
+
+
+class CompiledSchema:
+    """
+    Validator compiled from the declared fields of a marshmallow schema.
+
+    `load` is a drop-in replacement for the schema's `load`: it returns the
+    same data and raises `ValidationError` with the same messages and
+    `valid_data`. Batches are validated column by column.
+
+    Parameters:
+    - schema (Schema): Schema instance to compile.
+
+    Raises:
+    - ValueError: If the schema uses load hooks or unknown=INCLUDE, which
+                  the compiled validator does not reproduce.
+
+    Example:
+    >>> validator = CompiledSchema(PredictionSchema())
+    >>> validator.load({'age': 36, ...})
+    {'customer_type': 'loyal_customer', 'age': 36, ...}
+    """
+
+    def __init__(self, schema):
+        if any(schema._hooks.values()):
+            raise ValueError("Schemas with load hooks cannot be compiled")
+        if schema.opts.unknown not in (RAISE, EXCLUDE):
+            raise ValueError("Only unknown=RAISE or EXCLUDE can be compiled")
+
+        self.fields = []
+        for attr_name, field in schema.load_fields.items():
+            data_key = field.data_key if field.data_key is not None \
+                else attr_name
+            self.fields.append((attr_name, data_key, field,
+                                _compile_check(field)))
+        self.data_keys = {data_key for _, data_key, _, _ in self.fields}
+        self.raise_unknown = schema.opts.unknown == RAISE
+        self.type_error = schema.error_messages['type']
+        self.unknown_error = schema.error_messages['unknown']
+
+    def load(self, data, many=False):
+        """
+        Validate and deserialize a record, or a list of records.
+
+        Parameters:
+        - data: Record (dict) or, with `many`, a list of records.
+        - many (bool): Whether `data` is a list of records.
+
+        Returns:
+        - dict or list: Deserialized record(s), keyed by attribute name.
+
+        Raises:
+        - ValidationError: With the same messages and valid data as the
+                           marshmallow schema.
+        """
+        if not many:
+            results, errors = self._load_many([data])
+            if errors:
+                raise ValidationError(errors[0], data=data,
+                                      valid_data=results[0])
+            return results[0]
+
+        if not is_collection(data):
+            raise ValidationError({'_schema': [self.type_error]}, data=data,
+                                  valid_data=[])
+        results, errors = self._load_many(list(data))
+        if errors:
+            raise ValidationError(errors, data=data, valid_data=results)
+        return results
+
+    def _load_many(self, records: list) -> tuple:
+        """Validate records column by column, returning (results, errors)
+        with errors keyed by record index."""
+        errors = {}
+        rows = []
+        for i, record in enumerate(records):
+            if isinstance(record, Mapping):
+                rows.append(i)
+            else:
+                errors[i] = {'_schema': [self.type_error]}
+        mappings = [records[i] for i in rows]
+
+        columns = []
+        for attr_name, data_key, field, check in self.fields:
+            values = [record.get(data_key, missing) for record in mappings]
+            if check is not None:
+                failed = [j for j, value in enumerate(values)
+                          if not check(value)]
+            else:
+                failed = range(len(values))
+
+            # Only values the plain checks reject go through marshmallow
+            for j in failed:
+                try:
+                    values[j] = field.deserialize(values[j], data_key,
+                                                  mappings[j])
+                except ValidationError as e:
+                    values[j] = missing
+                    errors.setdefault(rows[j], {})[data_key] = e.messages
+            columns.append((attr_name, values))
+
+        if self.raise_unknown:
+            for j, record in enumerate(mappings):
+                if record.keys() <= self.data_keys:
+                    continue
+                # Same iteration order as marshmallow's error messages
+                for key in set(record) - self.data_keys:
+                    errors.setdefault(rows[j], {})[key] = [self.unknown_error]
+
+        results = [{} for _ in records]
+        for attr_name, values in columns:
+            for j, value in zip(rows, values):
+                if value is not missing:
+                    results[j][attr_name] = value
+
+        return results, {i: errors[i] for i in sorted(errors)}
+
+
+def _compile_check(field):
+    """
+    Build a plain check accepting the values the field and its validators
+    would return unchanged, or None if the field cannot be checked this way.
+    """
+    if type(field) is fields.String:
+        value_type = str
+    elif type(field) is fields.Integer:
+        value_type = int
+    else:
+        return None
+
+    choices = None
+    bounds = []
+    for validator in field.validators:
+        if type(validator) is validate.OneOf:
+            choices = frozenset(validator.choices)
+        elif type(validator) is validate.Range:
+            bounds.append(validator)
+        else:
+            return None
+
+    def check(value):
+        if type(value) is not value_type:
+            return False
+        if choices is not None and value not in choices:
+            return False
+        return all(_in_range(value, r) for r in bounds)
+
+    return check
+
+
+def _in_range(value, validator: validate.Range) -> bool:
+    if validator.min is not None:
+        if value < validator.min or (value == validator.min and
+                                     not validator.min_inclusive):
+            return False
+    if validator.max is not None:
+        if value > validator.max or (value == validator.max and
+                                     not validator.max_inclusive):
+            return False
+    return True
+
+
+PREDICTION_VALIDATOR = CompiledSchema(PredictionSchema())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+"""
+Script for scoring large passenger extracts offline with the saved flight
+satisfaction model for the SkySatisfy project.
+
+The input (JSONL, CSV or Parquet) is read in fixed-size chunks. Each chunk is
+validated, encoded and scored in a pool of worker processes that load the
+model once each. Results are written in input order with a bounded number of
+chunks in flight, so memory use does not grow with the size of the input.
+Rejected rows go to a separate error file.
+"""
+import argparse
+import collections
+import csv
+import itertools
+import json
+import logging
+import logging.config
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from marshmallow import ValidationError
+
+from backend.schemas.fast_validator import PREDICTION_VALIDATOR
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.model_serializer import load_model
+from backend.utils.predictor import make_predictions, format_prediction
+from backend.config import LOGGING_CONFIG, MODEL_FILE_PATH, INFERENCE_ENGINE
+
+
+# number of input rows validated and scored together
+DEFAULT_CHUNK_SIZE = 10000
+
+# input formats by file extension
+INPUT_FORMATS = {'.jsonl': 'jsonl', '.json': 'jsonl', '.csv': 'csv',
+                 '.parquet': 'parquet'}
+
+# inference engine of the current worker process, set by _init_worker
+_worker_engine = None
+
+
+def score_file(input_path: str, output_path: str, errors_path=None,
+               model_path=MODEL_FILE_PATH, engine=INFERENCE_ENGINE,
+               chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+               input_format=None) -> dict:
+    """
+    Score every row of an input file and write the results in input order.
+
+    Parameters:
+    - input_path (str): Path of the JSONL, CSV or Parquet input.
+    - output_path (str): Path of the results, CSV if it ends in '.csv' and
+                         JSONL otherwise. Each result holds the 0-based
+                         input 'row', 'prediction' and 'verdict'.
+    - errors_path (str): Path of the JSONL file receiving rejected rows,
+                         defaults to the output path with '.errors.jsonl'.
+    - model_path (str): Path of the saved model.
+    - engine (str): Inference engine, see `load_inference_engine`.
+    - chunk_size (int): Number of rows per chunk.
+    - workers (int): Number of worker processes, defaults to the number of
+                     CPUs. 0 scores in the current process.
+    - input_format (str): 'jsonl', 'csv' or 'parquet', inferred from the
+                          input extension by default.
+
+    Returns:
+    - dict: Number of 'rows', 'scored' and 'rejected' rows, 'seconds' taken
+            and 'rows_per_second'.
+
+    Example:
+    >>> score_file('passengers.csv', 'scores.jsonl')
+    """
+    if errors_path is None:
+        errors_path = os.path.splitext(output_path)[0] + '.errors.jsonl'
+    if workers is None:
+        workers = os.cpu_count()
+    chunks = read_chunks(input_path, chunk_size, input_format)
+
+    started = time.perf_counter()
+    counts = {'rows': 0, 'scored': 0, 'rejected': 0}
+    with open(output_path, 'w', newline='') as output, \
+         open(errors_path, 'w') as errors:
+        write_result = _result_writer(output, output_path)
+        for results, rejected in _score_chunks(chunks, model_path, engine,
+                                               workers):
+            for result in results:
+                write_result(result)
+            for error in rejected:
+                errors.write(json.dumps(error, default=str) + '\n')
+            counts['rows'] += len(results) + len(rejected)
+            counts['scored'] += len(results)
+            counts['rejected'] += len(rejected)
+
+    seconds = time.perf_counter() - started
+    counts['seconds'] = seconds
+    counts['rows_per_second'] = counts['rows'] / seconds if seconds else 0.0
+    logging.info(f"Scored {counts['scored']} rows, rejected "
+                 f"{counts['rejected']}, in {seconds:.2f}s "
+                 f"({counts['rows_per_second']:.0f} rows/s)")
+    return counts
+
+
+def read_chunks(path: str, chunk_size=DEFAULT_CHUNK_SIZE,
+                input_format=None):
+    """
+    Read an input file as consecutive chunks of raw records.
+
+    JSONL lines that are not valid JSON are passed on as their raw text so
+    they are reported as rejected rows.
+
+    Parameters:
+    - path (str): Path of the JSONL, CSV or Parquet input.
+    - chunk_size (int): Maximum number of records per chunk.
+    - input_format (str): 'jsonl', 'csv' or 'parquet', inferred from the
+                          file extension by default.
+
+    Returns:
+    - generator: Yields (first row number, list of records) tuples.
+
+    Raises:
+    - ValueError: If the input format is unknown.
+    - ImportError: If a Parquet input is given without pyarrow installed.
+    """
+    if input_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in INPUT_FORMATS:
+            raise ValueError(f"Cannot infer the input format of {path}")
+        input_format = INPUT_FORMATS[extension]
+
+    if input_format == 'jsonl':
+        chunks = _read_jsonl_chunks(path, chunk_size)
+    elif input_format == 'csv':
+        chunks = _read_csv_chunks(path, chunk_size)
+    elif input_format == 'parquet':
+        chunks = _read_parquet_chunks(path, chunk_size)
+    else:
+        raise ValueError(f"Unknown input format: {input_format}")
+
+    start = 0
+    for records in chunks:
+        yield start, records
+        start += len(records)
+
+
+def score_chunk(start: int, records: list, engine=None) -> tuple:
+    """
+    Validate, encode and score one chunk of raw records.
+
+    Parameters:
+    - start (int): Row number of the first record in the input.
+    - records (list): Raw records of the chunk.
+    - engine: Inference engine, defaults to the one loaded by the worker
+              process.
+
+    Returns:
+    - tuple: (results, rejected) lists. Results hold 'row', 'prediction'
+             and 'verdict' and rejected rows hold 'row', 'error' and the
+             raw 'record', both in input order.
+    """
+    if engine is None:
+        engine = _worker_engine
+
+    try:
+        data = PREDICTION_VALIDATOR.load(records, many=True)
+        errors = {}
+    except ValidationError as e:
+        data = e.valid_data
+        errors = e.normalized_messages()
+
+    valid_indices = [i for i in range(len(records)) if i not in errors]
+    predictions = make_predictions(engine, [data[i] for i in valid_indices],
+                                   cache=None)
+
+    results = [{'row': start + i, **format_prediction(prediction)}
+               for i, prediction in zip(valid_indices, predictions)]
+    rejected = [{'row': start + i, 'error': str(errors[i]),
+                 'record': records[i]} for i in sorted(errors)]
+    return results, rejected
+
+
+def _score_chunks(chunks, model_path: str, engine: str, workers: int):
+    """Score chunks in order, keeping at most two chunks per worker in
+    flight."""
+    if workers == 0:
+        loaded_engine = load_inference_engine(load_model(model_path), engine)
+        for start, records in chunks:
+            yield score_chunk(start, records, loaded_engine)
+        return
+
+    # spawn, not fork: XGBoost's OpenMP runtime is not fork-safe
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(model_path, engine)) as executor:
+        in_flight = collections.deque()
+        for start, records in chunks:
+            in_flight.append(executor.submit(score_chunk, start, records))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def _init_worker(model_path: str, engine: str):
+    """Load the model once per worker process."""
+    global _worker_engine
+    model = load_model(model_path)
+    # Parallelism comes from the processes, one thread each avoids
+    # oversubscribing the CPUs
+    model.set_param({'nthread': 1})
+    _worker_engine = load_inference_engine(model, engine)
+    # Per-chunk info logs from make_predictions would flood the output
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _result_writer(output, output_path: str):
+    """Return a function writing one result as a CSV row or a JSON line."""
+    if output_path.endswith('.csv'):
+        writer = csv.DictWriter(output,
+                                fieldnames=['row', 'prediction', 'verdict'])
+        writer.writeheader()
+        return writer.writerow
+    return lambda result: output.write(json.dumps(result) + '\n')
+
+
+def _read_jsonl_chunks(path: str, chunk_size: int):
+    with open(path) as f:
+        lines = (line for line in f if line.strip())
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield [_parse_json_line(line) for line in chunk]
+
+
+def _parse_json_line(line: str):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return line.rstrip('\n')
+
+
+def _read_csv_chunks(path: str, chunk_size: int):
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        # Empty cells become None, which the schema rejects as null
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield chunk.to_dict('records')
+
+
+def _read_parquet_chunks(path: str, chunk_size: int):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet input requires pyarrow")
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+if __name__ == "__main__":
+    logging.config.dictConfig(LOGGING_CONFIG)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('input', help='JSONL, CSV or Parquet file to score')
+    parser.add_argument('output',
+                        help='results file, CSV if it ends in .csv and '
+                             'JSONL otherwise')
+    parser.add_argument('--errors', help='JSONL file for rejected rows')
+    parser.add_argument('--format',
+                        choices=sorted(set(INPUT_FORMATS.values())),
+                        help='input format, inferred from the extension by '
+                             'default')
+    parser.add_argument('--model', default=MODEL_FILE_PATH,
+                        help='path of the saved model')
+    parser.add_argument('--engine', default=INFERENCE_ENGINE,
+                        choices=['native', 'array', 'lookup'],
+                        help='inference engine')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='number of rows per chunk')
+    parser.add_argument('--workers', type=int,
+                        help='number of worker processes, 0 scores in this '
+                             'process; defaults to the number of CPUs')
+    args = parser.parse_args()
+    score_file(args.input, args.output, errors_path=args.errors,
+               model_path=args.model, engine=args.engine,
+               chunk_size=args.chunk_size, workers=args.workers,
+               input_format=args.format)
@@ -3,20 +3,34 @@
 """
 Script for training, evaluating, and saving the flight satisfaction model for
 the SkySatisfy project.
+
+With --incremental, the saved model is updated with the rows of a file of
+newly arrived data instead, and saved only if it does not regress.
 """
+import argparse
 import logging
 import logging.config
+import os
+import sys
 
 
-from backend.utils.data_loader import load_data, preprocess_data
-from backend.utils.metrics_storage import save_metrics
-from backend.utils.model_trainer import train_model
-from backend.utils.model_evaluator import evaluate_model
-from backend.utils.model_serializer import save_model
-from backend.config import LOGGING_CONFIG
-
-
-logging.config.dictConfig(LOGGING_CONFIG)
+from backend.utils.data_loader import (load_data, preprocess_data,
+                                       FEATURE_ENCODER)
+from backend.utils.external_memory import train_external
+from backend.utils.feature_encoder import model_encoder
+from backend.utils.incremental_trainer import (continue_training,
+                                               split_recent, evaluate_update)
+from backend.utils.metrics_storage import save_metrics, format_metrics
+from backend.utils.params_storage import load_params
+from backend.utils.model_serializer import (save_model, load_model,
+                                            read_model_header,
+                                            get_model_hash)
+from backend.utils.training_pipeline import run_pipeline
+from backend.utils.lookup_table import (compile_lookup_table,
+                                        save_lookup_table)
+from backend.config import (LOGGING_CONFIG, EXTERNAL_MEMORY,
+                            INCREMENTAL_TRAINING, MODEL_FILE_PATH,
+                            METRICS_FILE_PATH, LOOKUP_TABLE_FILE_PATH)
 
 
 def train_and_save_model():
@@ -26,11 +40,19 @@ def train_and_save_model():
     This function takes in the path to the training data and a folder path
     where the trained model and metrics will be saved. It performs the
     following steps:
-    1. Load the data from the given data path.
-    2. Preprocess the data.
-    3. Train the model using the preprocessed data.
-    4. Evaluate the model and print the metrics.
-    5. Save the trained model and metrics to the specified folder.
+    1. Load and preprocess the data.
+    2. Cross-validate the model and train it on all data, as parallel jobs
+       sharing one feature matrix. With external memory enabled, the data
+       is streamed from the file instead and the model is evaluated on one
+       holdout fold.
+    3. Print the cross-validation metrics.
+    4. Save the trained model and metrics to the specified folder, unless
+       the saved model is the same.
+    5. Compile the model into a lookup table and save it next to the model.
+
+    Steps 1 and 2 are stages of the training pipeline, each read from the
+    artifact store when its inputs are unchanged. The model parameters are
+    the tuned ones from the params file, if it exists.
 
     Parameters:
     - data_path (str): The path to the training data.
@@ -40,17 +62,118 @@ def train_and_save_model():
     Returns:
     None
     """
-    # Load the data and preprocess it
-    df = load_data()
-    X, y = preprocess_data(df)
-    model = train_model(X, y)
-    raw_metrics, formatted_metrics = evaluate_model(X, y)
-    logging.info(f"Model metrics: {formatted_metrics}")
+    params = load_params()
+    if EXTERNAL_MEMORY['ENABLED']:
+        model, raw_metrics = train_external(
+            xgb_params=params['XGB_PARAMS'],
+            num_boost_round=params['XGB_NUM_BOOST_ROUND'])
+    else:
+        result = run_pipeline(
+            xgb_params=params['XGB_PARAMS'],
+            num_boost_round=params['XGB_NUM_BOOST_ROUND'])
+        model = result['model']
+        raw_metrics = result['metrics']
+    logging.info(f"Model metrics: {format_metrics(raw_metrics)}")
+
+    if _is_saved(model):
+        logging.info("Saved model is up to date")
+        return
+    save_artifacts(model, raw_metrics)
+
+
+def update_and_save_model(
+        data_path=INCREMENTAL_TRAINING['NEW_DATA_FILE_PATH'],
+        model_path=MODEL_FILE_PATH, metrics_path=METRICS_FILE_PATH,
+        lookup_table_path=LOOKUP_TABLE_FILE_PATH,
+        mode=INCREMENTAL_TRAINING['MODE']) -> bool:
+    """
+    Update the saved model with newly arrived rows only.
+
+    The steps are:
+    1. Load the new rows, oldest first, and preprocess them with the
+       encoding of the saved model, whatever FEATURE_MODE is set to.
+    2. Hold out the most recent rows and update the saved model with the
+       others, by boosting more trees or refreshing its leaf values.
+    3. Compare the updated and the saved model on the holdout rows.
+    4. Unless the update regresses, save it with its holdout metrics and
+       lookup table as the new model version.
+
+    Parameters:
+    - data_path (str): The path to the new rows.
+    - model_path (str): The path of the saved model to update.
+    - metrics_path (str): The path of the saved metrics.
+    - lookup_table_path (str): The path of the saved lookup table.
+    - mode (str): 'boost' or 'refresh', see continue_training.
+
+    Returns:
+    - bool: Whether the updated model was saved.
+    """
+    model = load_model(model_path)
+    X, y = preprocess_data(load_data(data_path),
+                           model_encoder(model, FEATURE_ENCODER))
+    X_train, y_train, X_holdout, y_holdout = split_recent(X, y)
+
+    updated = continue_training(model, X_train, y_train,
+                                load_params()['XGB_PARAMS'], mode)
+    evaluation = evaluate_update(model, updated, X_holdout, y_holdout)
+    logging.info("Holdout AUC of the current model %.4f, updated %.4f",
+                 evaluation['current']['auc'][0],
+                 evaluation['updated']['auc'][0])
+
+    if not evaluation['accepted']:
+        logging.warning("Updated model regresses, keeping the current one")
+        return False
+    save_artifacts(updated, evaluation['updated'], model_path, metrics_path,
+                   lookup_table_path)
+    return True
+
+
+def save_artifacts(model, raw_metrics: dict, model_path=MODEL_FILE_PATH,
+                   metrics_path=METRICS_FILE_PATH,
+                   lookup_table_path=LOOKUP_TABLE_FILE_PATH):
+    """
+    Save a model with its metrics and compiled lookup table.
+
+    Parameters:
+    - model (xgb.Booster): Trained model.
+    - raw_metrics (dict): Lists of metric values keyed by metric name.
+    - model_path (str): The path to save the model to.
+    - metrics_path (str): The path to save the metrics to.
+    - lookup_table_path (str): The path to save the lookup table to.
+    """
+    save_model(model, model_path)
+    save_metrics(raw_metrics, metrics_path)
+
+    # Compile the lookup table used by the 'lookup' inference engine
+    try:
+        save_lookup_table(compile_lookup_table(model), lookup_table_path)
+    except ValueError as e:
+        logging.warning(f"Skipping lookup table: {e}")
+
 
-    # Save the model and metrics
-    save_model(model)
-    save_metrics(raw_metrics)
+def _is_saved(model, model_path=MODEL_FILE_PATH,
+              lookup_table_path=LOOKUP_TABLE_FILE_PATH) -> bool:
+    """Return whether the model and its lookup table are already saved."""
+    try:
+        saved_hash = read_model_header(model_path)['sha256']
+    except (OSError, ValueError):
+        return False
+    return (saved_hash == get_model_hash(model)
+            and os.path.exists(lookup_table_path))
 
 
 if __name__ == "__main__":
+    logging.config.dictConfig(LOGGING_CONFIG)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--incremental', nargs='?', metavar='PATH',
+                        const=INCREMENTAL_TRAINING['NEW_DATA_FILE_PATH'],
+                        help='update the saved model with the new rows in '
+                             'PATH only')
+    parser.add_argument('--mode', choices=['boost', 'refresh'],
+                        default=INCREMENTAL_TRAINING['MODE'],
+                        help='how --incremental updates the model')
+    args = parser.parse_args()
+    if args.incremental:
+        sys.exit(0 if update_and_save_model(args.incremental,
+                                            mode=args.mode) else 1)
     train_and_save_model()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""
+Script for tuning the parameters of the flight satisfaction model for the
+SkySatisfy project.
+
+Random configurations are compared by successive halving with early-stopped
+cross-validation, within a wall-clock budget. The best configuration and
+its number of boosting rounds are written to the params file, which later
+training runs use instead of MODEL_PARAMS.
+
+Examples:
+    python -m backend.tune
+    python -m backend.tune --budget 120 --trials 81 --jobs 4
+"""
+import argparse
+import logging
+import logging.config
+
+from backend.utils.data_loader import load_dataset, FEATURE_ENCODER
+from backend.utils.hyperparameter_search import (sample_configurations,
+                                                 successive_halving)
+from backend.utils.params_storage import save_params
+from backend.config import (LOGGING_CONFIG, DATASET_FILE_PATH,
+                            PARAMS_FILE_PATH, TUNING)
+
+
+def tune(data_path=DATASET_FILE_PATH, output_path=PARAMS_FILE_PATH,
+         n_trials=TUNING['N_TRIALS'], budget_seconds=TUNING['BUDGET_SECONDS'],
+         n_jobs=TUNING['JOBS'], seed=0) -> dict:
+    """
+    Tune the model parameters and save the best ones.
+
+    Parameters:
+    - data_path (str): The path to the training data.
+    - output_path (str): The path of the params file to write.
+    - n_trials (int): Number of random configurations.
+    - budget_seconds (float): Wall-clock time for the search.
+    - n_jobs (int): Parallel jobs, None for one per CPU.
+    - seed (int): Seed of the random configurations.
+
+    Returns:
+    - dict: The search result, see successive_halving.
+    """
+    X, y = load_dataset(data_path)
+    result = successive_halving(X, y,
+                                sample_configurations(n_trials, seed=seed),
+                                budget_seconds=budget_seconds, n_jobs=n_jobs,
+                                feature_types=FEATURE_ENCODER.feature_types)
+    logging.info("Best of %d trials: AUC %.4f with %d rounds, %s",
+                 n_trials, result['auc'], result['num_boost_round'],
+                 result['params'])
+
+    save_params(result['params'], result['num_boost_round'], output_path,
+                cv_auc=result['auc'], trials=len(result['trials']))
+    return result
+
+
+if __name__ == "__main__":
+    logging.config.dictConfig(LOGGING_CONFIG)
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--data', default=DATASET_FILE_PATH,
+                        help='training data')
+    parser.add_argument('--output', default=PARAMS_FILE_PATH,
+                        help='params file to write')
+    parser.add_argument('--trials', type=int, default=TUNING['N_TRIALS'],
+                        help='random configurations to compare')
+    parser.add_argument('--budget', type=float,
+                        default=TUNING['BUDGET_SECONDS'],
+                        help='wall-clock seconds for the search')
+    parser.add_argument('--jobs', type=int, default=TUNING['JOBS'],
+                        help='parallel jobs, one per CPU by default')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random configurations')
+    args = parser.parse_args()
+
+    result = tune(args.data, args.output, args.trials, args.budget,
+                  args.jobs, args.seed)
+    print(f"\n{'rounds':>7s} {'trial':>6s} {'auc':>8s} {'best rounds':>12s}")
+    for record in result['trials']:
+        print(f"{record['max_rounds']:7d} {record['trial']:6d} "
+              f"{record['auc']:8.4f} {record['num_boost_round']:12d}")
@@ -0,0 +1,159 @@
+"""
+Utility functions for admission control of prediction requests for the
+SkySatisfy project.
+
+Each worker scores at most a fixed number of requests at once; a bounded
+number of further requests wait for a slot, for a limited time. Requests
+beyond that, and requests that cannot finish before their client's deadline,
+are rejected at once with a Retry-After hint instead of being scored late.
+"""
+
+import math
+import threading
+import time
+
+from backend.config import ADMISSION_CONTROL
+
+
+# status code of each rejection reason
+REJECTION_STATUS = {
+    'queue_full': 429,
+    'queue_timeout': 503,
+    'deadline': 503,
+}
+
+# weight of the latest request in the service time average
+SERVICE_TIME_SMOOTHING = 0.1
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted.
+
+    Attributes:
+    - reason (str): 'queue_full', 'queue_timeout' or 'deadline'.
+    - status (int): HTTP status code of the rejection.
+    - retry_after (int): Seconds after which the client may retry.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+        self.status = REJECTION_STATUS[reason]
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limit the number of requests a worker scores concurrently.
+
+    Parameters:
+    - max_concurrency (int): Maximum number of requests admitted at once.
+    - max_queue (int): Maximum number of requests waiting for a slot.
+    - max_wait_ms (float): Maximum time a request waits for a slot.
+
+    Example:
+    >>> admission = AdmissionController(max_concurrency=4)
+    >>> admitted_at = admission.acquire(deadline=time.time() + 0.5)
+    >>> ...  # score the request
+    >>> admission.release(admitted_at)
+    """
+
+    def __init__(self, max_concurrency=ADMISSION_CONTROL['MAX_CONCURRENCY'],
+                 max_queue=ADMISSION_CONTROL['MAX_QUEUE'],
+                 max_wait_ms=ADMISSION_CONTROL['MAX_WAIT_MS']):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait_ms / 1000
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.shed = {reason: 0 for reason in REJECTION_STATUS}
+        # moving average of the time between admission and release
+        self.service_time = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline=None) -> float:
+        """
+        Admit a request, waiting for a slot if all are taken.
+
+        Parameters:
+        - deadline (float): Unix time by which the client needs the
+                            response, None for no deadline.
+
+        Returns:
+        - float: Admission time, to pass to release.
+
+        Raises:
+        - AdmissionRejected: If the queue is full, no slot frees up in time
+                             or the request cannot finish by its deadline.
+        """
+        with self._condition:
+            budget = None if deadline is None else deadline - time.time()
+            if budget is not None and budget <= self._expected_latency():
+                raise self._reject('deadline')
+
+            if self.in_flight >= self.max_concurrency:
+                if self.queued >= self.max_queue:
+                    raise self._reject('queue_full')
+
+                # Wait no longer than still leaves time to be served
+                timeout = self.max_wait
+                if budget is not None:
+                    timeout = min(timeout, budget - self.service_time)
+                self.queued += 1
+                self.queued_total += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self.in_flight < self.max_concurrency,
+                        timeout)
+                finally:
+                    self.queued -= 1
+                if not admitted:
+                    raise self._reject('queue_timeout' if timeout ==
+                                       self.max_wait else 'deadline')
+
+            self.in_flight += 1
+            self.admitted_total += 1
+            return time.perf_counter()
+
+    def release(self, admitted_at: float):
+        """
+        Free the slot of a request admitted at `admitted_at`.
+
+        Parameters:
+        - admitted_at (float): Admission time returned by acquire.
+        """
+        elapsed = time.perf_counter() - admitted_at
+        with self._condition:
+            self.in_flight -= 1
+            self.service_time += SERVICE_TIME_SMOOTHING * (
+                elapsed - self.service_time)
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        """Return the limits, current load and admission counters."""
+        with self._condition:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'admitted_total': self.admitted_total,
+                'queued_total': self.queued_total,
+                'shed_total': dict(self.shed),
+                'service_time_seconds': self.service_time,
+            }
+
+    def _expected_latency(self) -> float:
+        # Time to serve the queue ahead of the request, then the request
+        if self.in_flight < self.max_concurrency:
+            return self.service_time
+        return self.service_time * (
+            1 + (self.queued + 1) / self.max_concurrency)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.shed[reason] += 1
+        drain = self.service_time * (self.queued + 1) / self.max_concurrency
+        return AdmissionRejected(reason, max(1, math.ceil(drain)))
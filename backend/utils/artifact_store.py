@@ -0,0 +1,179 @@
+"""
+Utility functions for storing training artifacts for the SkySatisfy project.
+
+Every artifact is a folder of files named after a key hashed from the inputs
+and parameters that produced it, so an artifact computed once is found again
+whenever the same inputs recur, and a change to any input misses the cache
+instead of returning a stale result. The store is bounded in size: reading an
+entry marks it as used, and the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from backend.config import ARTIFACT_STORE
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of artifact folders.
+
+    Parameters:
+    - folder_path (str): Folder holding the entries.
+    - max_size_mb (float): Total size above which the least recently used
+                           entries are evicted.
+
+    Example:
+    >>> store = ArtifactStore()
+    >>> key = store.key('train', dataset_key, params)
+    >>> path = store.get(key) or store.put(key, write_model)
+    """
+
+    def __init__(self, folder_path=ARTIFACT_STORE['FOLDER_PATH'],
+                 max_size_mb=ARTIFACT_STORE['MAX_SIZE_MB']):
+        self.folder_path = folder_path
+        self.max_size = max_size_mb * 2**20
+
+    @staticmethod
+    def key(stage: str, *inputs) -> str:
+        """
+        Return the key of a stage's artifact for the given inputs.
+
+        Parameters:
+        - stage (str): Name of the stage producing the artifact.
+        - inputs: JSON-serializable inputs and parameters of the stage, such
+                  as content hashes or the keys of upstream artifacts.
+
+        Returns:
+        - str: The stage name followed by a hash of the inputs.
+        """
+        payload = json.dumps(inputs, sort_keys=True, default=str)
+        return f'{stage}-{hashlib.sha256(payload.encode()).hexdigest()[:32]}'
+
+    def get(self, key: str):
+        """
+        Look up an entry and mark it as used.
+
+        Parameters:
+        - key (str): Key of the entry.
+
+        Returns:
+        - str: Path of the entry's folder, or None if it is not stored.
+        """
+        path = os.path.join(self.folder_path, key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, write) -> str:
+        """
+        Store an entry, then evict entries beyond the size limit.
+
+        The files are written to a temporary folder which is renamed to the
+        entry, so concurrent or interrupted runs never see a partial entry.
+
+        Parameters:
+        - key (str): Key of the entry.
+        - write (callable): Called with the folder to write the files into.
+
+        Returns:
+        - str: Path of the entry's folder, or None if it could not be stored.
+
+        Raises:
+        - Exception: Any other than OSError raised by `write`, after the
+                     partial files are removed.
+        """
+        path = os.path.join(self.folder_path, key)
+        os.makedirs(self.folder_path, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.folder_path, prefix='.staging-')
+        try:
+            write(staging)
+            os.rename(staging, path)
+        except OSError as e:
+            # Another run stored the same entry first, or the store is not
+            # writable; the caller still has the artifact in hand
+            logging.warning("Could not store artifact %s: %s", key, e)
+            shutil.rmtree(staging, ignore_errors=True)
+            return path if os.path.isdir(path) else None
+        except BaseException:
+            # A failing writer, or an interrupt, must not leave the partial
+            # files behind
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+        return path
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used entries until the store fits its
+        size limit.
+
+        Parameters:
+        - keep (str): Key of an entry never to evict.
+
+        Returns:
+        - list: Keys of the removed entries.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry['used_at'])
+        total = sum(entry['size'] for entry in entries)
+        removed = []
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            if entry['key'] == keep:
+                continue
+            shutil.rmtree(os.path.join(self.folder_path, entry['key']),
+                          ignore_errors=True)
+            total -= entry['size']
+            removed.append(entry['key'])
+        if removed:
+            logging.info("Evicted %d artifacts: %s", len(removed),
+                         ', '.join(removed))
+        return removed
+
+    def entries(self) -> list:
+        """Return the key, size in bytes and last use of every entry."""
+        try:
+            names = os.listdir(self.folder_path)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            path = os.path.join(self.folder_path, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                entries.append({'key': name, 'size': _folder_size(path),
+                                'used_at': os.stat(path).st_mtime})
+            except FileNotFoundError:
+                # Evicted by a concurrent run
+                continue
+        return entries
+
+
+def file_hash(path: str) -> str:
+    """
+    Return the SHA-256 hash of a file's content.
+
+    Parameters:
+    - path (str): Path to the file.
+
+    Returns:
+    - str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _folder_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name))
+               for name in os.listdir(path))
@@ -0,0 +1,185 @@
+"""
+Non-blocking structured logging for the SkySatisfy project.
+
+In async mode log records are handed to a bounded in-memory queue and
+written by a background thread as JSON lines, so request threads never
+wait on log I/O. Records of frequent hot-path events are sampled, and
+records that find the queue full are dropped and counted instead of
+blocking the request.
+"""
+
+import copy
+import datetime
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import random
+import threading
+
+from backend.config import LOGGING_CONFIG, ASYNC_LOGGING
+
+
+# attributes every LogRecord has; anything else was passed with `extra`
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {
+    'message', 'asctime', 'taskName'}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects.
+
+    Every record has 'time', 'level', 'logger', 'process' and 'message';
+    fields passed with `extra`, such as 'event', are added as they are and
+    a formatted traceback goes into 'exception'.
+
+    Example:
+    >>> logging.info("Prediction made: %s", 0.9,
+    ...              extra={'event': 'prediction'})
+    {"time": "...", "level": "INFO", ..., "event": "prediction"}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fixed fraction of the records of each sampled event.
+
+    Records name their event with `extra={'event': ...}`; records of events
+    without a sample rate, and records without an event, are always kept.
+
+    Parameters:
+    - sample_rates (dict): Fraction of records kept, keyed by event.
+    """
+
+    def __init__(self, sample_rates: dict):
+        super().__init__()
+        self.sample_rates = dict(sample_rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.sample_rates.get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """
+    Queue records for a background thread that passes them to the target
+    handlers.
+
+    The queue is bounded; records that find it full are dropped and
+    counted. Threads do not survive fork, so every process starts its own
+    writer thread and queue on its first record.
+
+    Parameters:
+    - handlers (list): Handlers the background thread writes records to.
+    - maxsize (int): Maximum number of queued records.
+
+    Example:
+    >>> handler = AsyncLogHandler([logging.StreamHandler()])
+    >>> logging.getLogger().addHandler(handler)
+    """
+
+    def __init__(self, handlers: list, maxsize=ASYNC_LOGGING['QUEUE_SIZE']):
+        super().__init__(queue.Queue(maxsize))
+        self.handlers = list(handlers)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now so later changes to them are not logged;
+        # formatting is left to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        """Return the queue size and the number of dropped records."""
+        return {
+            'queue_size': self.queue.qsize(),
+            'maxsize': self.maxsize,
+            'dropped': self.dropped,
+        }
+
+    def close(self):
+        """Write the queued records and stop the writer thread."""
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                self._listener.stop()
+                self._listener_pid = None
+        super().close()
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                self.queue = queue.Queue(self.maxsize)
+                self._listener = _Listener(self.queue, *self.handlers,
+                                           respect_handler_level=True)
+                self._listener.start()
+                self._listener_pid = os.getpid()
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when the queue is full on stop
+        self.queue.put(self._sentinel)
+
+
+def configure_logging(config=LOGGING_CONFIG, settings=ASYNC_LOGGING):
+    """
+    Configure logging for the service.
+
+    Applies `config`; in async mode the root handlers are then moved behind
+    an AsyncLogHandler, switched to JSON output and sampled per event.
+
+    Parameters:
+    - config (dict): dictConfig configuration.
+    - settings (dict): Async logging settings, see ASYNC_LOGGING.
+
+    Returns:
+    - AsyncLogHandler: The root's async handler, or None in sync mode.
+    """
+    logging.config.dictConfig(config)
+    if not settings['ENABLED']:
+        return None
+
+    root = logging.getLogger()
+    targets = list(root.handlers)
+    for handler in targets:
+        handler.setFormatter(JSONFormatter())
+        root.removeHandler(handler)
+
+    async_handler = AsyncLogHandler(targets, settings['QUEUE_SIZE'])
+    async_handler.addFilter(SamplingFilter(settings['SAMPLE_RATES']))
+    root.addHandler(async_handler)
+    return async_handler
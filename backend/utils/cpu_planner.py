@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+Utility functions for planning CPU threads and workers for the SkySatisfy
+project.
+
+The number of usable CPUs is the process's affinity mask, capped by the
+cgroup CPU quota of the container it runs in. Training gets all of them.
+Inference runs in several gunicorn workers sharing those CPUs, so each
+worker's booster gets only its share; otherwise a one-row predict in every
+worker spins up a thread per core and the workers fight over the CPUs.
+
+With admission control, workers get enough request threads to hand the
+service every request its admission limits account for, so requests
+beyond the wait queue reach it and are shed instead of waiting in
+gunicorn's backlog.
+
+Example:
+    python -m backend.utils.cpu_planner
+"""
+
+import json
+import math
+import os
+
+import xgboost as xgb
+
+from backend.config import CPU_PLAN, GUNICORN, ADMISSION_CONTROL
+
+
+# mount point of the cgroup filesystem
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+
+def cgroup_cpu_limit(root=CGROUP_ROOT):
+    """
+    Read the CPU quota of the process's cgroup.
+
+    Both cgroup v2 (cpu.max) and v1 (cpu.cfs_quota_us and
+    cpu.cfs_period_us) are supported.
+
+    Parameters:
+    - root (str): Mount point of the cgroup filesystem.
+
+    Returns:
+    - float: The quota in CPUs, e.g. 1.5, or None without a quota.
+
+    Example:
+    >>> cgroup_cpu_limit()
+    2.0
+    """
+    # cgroup v2: "<quota> <period>", or "max <period>" without a quota
+    fields = _read_fields(os.path.join(root, 'cpu.max'))
+    if fields is not None:
+        if len(fields) == 2 and fields[0] != 'max':
+            return int(fields[0]) / int(fields[1])
+        return None
+
+    # cgroup v1: a quota of -1 means no quota
+    for controller in ('cpu', 'cpu,cpuacct'):
+        quota = _read_fields(os.path.join(root, controller,
+                                          'cpu.cfs_quota_us'))
+        period = _read_fields(os.path.join(root, controller,
+                                           'cpu.cfs_period_us'))
+        if quota is not None and period is not None:
+            if int(quota[0]) > 0 and int(period[0]) > 0:
+                return int(quota[0]) / int(period[0])
+            return None
+    return None
+
+
+def available_cpus(root=CGROUP_ROOT) -> int:
+    """
+    Return the number of CPUs the process can use.
+
+    Parameters:
+    - root (str): Mount point of the cgroup filesystem.
+
+    Returns:
+    - int: CPUs in the affinity mask, capped by the cgroup quota rounded
+           up, and at least 1.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+
+    limit = cgroup_cpu_limit(root)
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def plan_cpus(cpus=None, workers=GUNICORN['WORKERS'],
+              threads=GUNICORN['THREADS'],
+              inference_nthread=CPU_PLAN['INFERENCE_NTHREAD'],
+              training_nthread=CPU_PLAN['TRAINING_NTHREAD'],
+              admission=ADMISSION_CONTROL) -> dict:
+    """
+    Plan gunicorn workers and XGBoost threads for the available CPUs.
+
+    Values given explicitly are kept; None values are planned. Request
+    threads default to one more than admission control admits and queues,
+    or to one without it. Workers default to one per CPU for each request
+    thread that may score at once, and each worker's booster gets an
+    equal share of the CPUs.
+
+    Parameters:
+    - cpus (int): Usable CPUs, detected by available_cpus by default.
+    - workers (int): gunicorn worker processes.
+    - threads (int): Request threads per worker.
+    - inference_nthread (int): XGBoost threads per serving booster.
+    - training_nthread (int): XGBoost threads for training.
+    - admission (dict): Admission control settings, see ADMISSION_CONTROL.
+
+    Returns:
+    - dict: 'cpus', 'workers', 'threads', 'inference_nthread' and
+            'training_nthread'.
+
+    Example:
+    >>> plan_cpus(cpus=8, workers=2)['inference_nthread']
+    4
+    """
+    cpus = cpus or available_cpus()
+    scoring = threads = threads or admission_threads(admission)
+    if admission['ENABLED']:
+        scoring = min(threads, admission['MAX_CONCURRENCY'])
+    workers = workers or max(1, cpus // scoring)
+    return {
+        'cpus': cpus,
+        'workers': workers,
+        'threads': threads,
+        'inference_nthread': (inference_nthread
+                              or max(1, cpus // (workers * scoring))),
+        'training_nthread': training_nthread or cpus,
+    }
+
+
+def admission_threads(admission=ADMISSION_CONTROL) -> int:
+    """
+    Return the request threads a worker needs for its admission limits.
+
+    A worker only sees as many requests at once as it has threads; the
+    rest wait in gunicorn's backlog, where admission control cannot shed
+    them. One thread more than the admitted and queued requests lets the
+    first request beyond the queue reach the service and get a 429.
+
+    Parameters:
+    - admission (dict): Admission control settings, see ADMISSION_CONTROL.
+
+    Returns:
+    - int: Request threads per worker, 1 without admission control.
+    """
+    if not admission['ENABLED']:
+        return 1
+    return admission['MAX_CONCURRENCY'] + admission['MAX_QUEUE'] + 1
+
+
+def configure_booster(model, nthread: int):
+    """
+    Limit the threads a loaded booster predicts with.
+
+    Parameters:
+    - model (xgb.Booster): Loaded model; other objects are left unchanged.
+    - nthread (int): Number of threads.
+    """
+    if isinstance(model, xgb.Booster):
+        model.set_param({'nthread': nthread})
+
+
+def training_params(params: dict) -> dict:
+    """
+    Return training parameters with the planned thread count, unless they
+    set one.
+
+    Parameters:
+    - params (dict): XGBoost parameters.
+
+    Returns:
+    - dict: A copy of the parameters including 'nthread'.
+    """
+    return {'nthread': plan_cpus()['training_nthread'], **params}
+
+
+def _read_fields(path: str):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    plan = plan_cpus()
+    print(json.dumps(plan, indent=2))
+    print(f"gunicorn --workers={plan['workers']} --threads={plan['threads']}")
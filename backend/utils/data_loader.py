@@ -1,16 +1,26 @@
 """
 Utility functions for loading and preprocessing data for the
 SkySatisfy project.
+
+The dataset is read with only the columns the model uses, in compact
+dtypes. The preprocessed feature matrix and target are stored as NumPy
+files in the artifact store, keyed by the hash of the dataset file, so
+repeated training runs on the same file skip parsing and preprocessing.
 """
 
+import hashlib
+import json
 import logging
-import logging.config
-import pandas as pd
+import os
 
-from backend.config import DATASET_FILE_PATH, LOGGING_CONFIG
+import numpy as np
+import pandas as pd
 
+from backend.config import (DATASET_FILE_PATH, ARTIFACT_STORE, CSV_ENGINE,
+                            FEATURE_MODE)
+from backend.utils.artifact_store import ArtifactStore, file_hash
+from backend.utils.feature_encoder import FeatureEncoder
 
-logging.config.dictConfig(LOGGING_CONFIG)
 
 COLUMNS_TO_KEEP = [
     'satisfaction',
@@ -25,23 +35,55 @@ COLUMNS_TO_KEEP = [
 
 TARGET_COLUMN = 'satisfaction'
 FEATURES = [c for c in COLUMNS_TO_KEEP if c != TARGET_COLUMN]
+TARGET_ENCODING = {'satisfied': 1, 'dissatisfied': 0}
+
+# encoder shared by training (preprocess_data) and serving (predictor) of
+# models saved without their own encoding
+FEATURE_ENCODER = FeatureEncoder(FEATURES,
+                                 categorical=FEATURE_MODE == 'categorical')
+
+# compact dtypes of the kept columns
+COLUMN_DTYPES = {
+    'satisfaction': 'category',
+    'customer_type': 'category',
+    'age': 'uint8',
+    'type_of_travel': 'category',
+    'class': 'category',
+    'flight_distance': 'uint16',
+    'ease_of_online_booking': 'int8',
+    'online_boarding': 'int8',
+}
 
+# preprocessing that cached datasets were built with; a change invalidates
+# the cache
+PREPROCESSING_VERSION = hashlib.sha256(json.dumps(
+    [COLUMNS_TO_KEEP, TARGET_ENCODING, FEATURE_ENCODER.feature_names]
+).encode()).hexdigest()[:8]
 
-def load_data(data_path=DATASET_FILE_PATH) -> pd.DataFrame:
+
+def load_data(data_path=DATASET_FILE_PATH,
+              engine=CSV_ENGINE) -> pd.DataFrame:
     """
-    Load data from a CSV file.
+    Load the columns in COLUMNS_TO_KEEP from a CSV file.
+
+    Columns are matched after normalizing their names, so 'Flight Distance'
+    is read as flight_distance. Categorical columns are read as categories
+    and numeric ones as the smallest integer type that fits.
 
     Parameters:
     - data_path (str): Path to the CSV file.
+    - engine (str): pandas CSV parser, None for pyarrow when installed.
 
     Returns:
-    - pd.DataFrame: Loaded data.
+    - pd.DataFrame: Loaded data, with the file's column names.
 
     Example:
     >>> df = load_data('data.csv')
     """
     try:
-        df = pd.read_csv(data_path)
+        dtypes = _column_dtypes(data_path)
+        df = pd.read_csv(data_path, usecols=list(dtypes), dtype=dtypes,
+                         engine=engine or _default_engine())
         logging.info(f"Successfully loaded data from {data_path}")
         return df
     except FileNotFoundError:
@@ -55,12 +97,14 @@ def load_data(data_path=DATASET_FILE_PATH) -> pd.DataFrame:
         raise
 
 
-def preprocess_data(df: pd.DataFrame) -> (pd.DataFrame, pd.Series):
+def preprocess_data(df: pd.DataFrame, encoder: FeatureEncoder = FEATURE_ENCODER
+                    ) -> (pd.DataFrame, pd.Series):
     """
     Preprocess the data and return features and target variable.
 
     Parameters:
     - df (pd.DataFrame): Dataframe to preprocess.
+    - encoder (FeatureEncoder): Encoder of the features.
 
     Returns:
     - tuple: Feature matrix (pd.DataFrame) and target vector (pd.Series).
@@ -71,13 +115,16 @@ def preprocess_data(df: pd.DataFrame) -> (pd.DataFrame, pd.Series):
     logging.info("Preprocessing data")
 
     try:
-        df = df.copy()
-        df = _preprocess_column_names(df)
-        df = df[COLUMNS_TO_KEEP]
-        df = _encode_categorical_features(df)
+        # Only the kept columns are normalized, without copying the frame
+        columns = {_normalize_name(name): name for name in df.columns}
+        df = {name: _normalize_values(df[columns.get(name, name)])
+              for name in COLUMNS_TO_KEEP}
 
-        X = df[[c for c in df.columns if c != TARGET_COLUMN]]
-        y = df[TARGET_COLUMN]
+        target = df[TARGET_COLUMN]
+        X = pd.DataFrame(encoder.encode_columns(df),
+                         columns=encoder.feature_names,
+                         index=target.index)
+        y = target.map(TARGET_ENCODING).astype('int64')
 
         logging.info("Data preprocessing completed successfully")
 
@@ -91,24 +138,162 @@ def preprocess_data(df: pd.DataFrame) -> (pd.DataFrame, pd.Series):
         raise
 
 
-def _preprocess_column_names(df):
-    ''' Convert column names to lowercase & replace spaces with underscores'''
-    df = df.copy()
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    string_columns = list(df.dtypes[df.dtypes == 'object'].index)
-    for col in string_columns:
-        df[col] = df[col].str.lower().str.replace(' ', '_')
-    return df
-
-
-def _encode_categorical_features(df):
-    """Replace string labels with numerical labels."""
-    df = df.copy()
-    df['satisfaction'] = df['satisfaction'].replace({'satisfied': 1,
-                                                     'dissatisfied': 0})
-    df['customer_type'] = df['customer_type'].replace({'loyal_customer': 1,
-                                                       'disloyal_customer': 0})
-    df['type_of_travel'] = df['type_of_travel'].replace({'business_travel': 1,
-                                                         'personal_travel': 0})
-    df = pd.get_dummies(df, columns=['class'], prefix='class')
-    return df
+def iter_dataset(data_path=DATASET_FILE_PATH, chunk_size=100_000):
+    """
+    Stream the dataset as preprocessed chunks.
+
+    Only one chunk of parsed rows is held at a time, so memory does not
+    depend on the size of the file.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - chunk_size (int): Rows per chunk.
+
+    Returns:
+    - generator: Yields feature matrix (pd.DataFrame) and target vector
+                 (pd.Series) tuples, indexed by row number in the file.
+
+    Example:
+    >>> for X, y in iter_dataset(chunk_size=10000):
+    ...     ...
+    """
+    dtypes = _column_dtypes(data_path)
+    # The pyarrow parser cannot read in chunks
+    with pd.read_csv(data_path, usecols=list(dtypes), dtype=dtypes,
+                     chunksize=chunk_size, engine='c') as reader:
+        for chunk in reader:
+            yield preprocess_data(chunk)
+
+
+def estimate_row_size(data_path=DATASET_FILE_PATH, sample_rows=1000) -> float:
+    """
+    Estimate the memory one row of the dataset takes once preprocessed.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - sample_rows (int): Number of rows to measure.
+
+    Returns:
+    - float: Bytes per row of the feature matrix and target vector.
+    """
+    X, y = next(iter_dataset(data_path, sample_rows))
+    size = X.memory_usage(deep=True).sum() + y.memory_usage(deep=True)
+    return size / len(y)
+
+
+def load_dataset(data_path=DATASET_FILE_PATH,
+                 cache_folder_path=ARTIFACT_STORE['FOLDER_PATH'],
+                 engine=CSV_ENGINE) -> (pd.DataFrame, pd.Series):
+    """
+    Load and preprocess the dataset, through the artifact store.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - cache_folder_path (str): Folder of the artifact store, None to bypass
+                               it.
+    - engine (str): pandas CSV parser, None for pyarrow when installed.
+
+    Returns:
+    - tuple: Feature matrix (pd.DataFrame) and target vector (pd.Series),
+             backed by memory-mapped files when read from the store.
+
+    Example:
+    >>> X, y = load_dataset()
+    """
+    if cache_folder_path is None:
+        return preprocess_data(load_data(data_path, engine))
+    return load_stored_dataset(ArtifactStore(cache_folder_path),
+                               dataset_cache_key(data_path), data_path,
+                               engine)
+
+
+def load_stored_dataset(store: ArtifactStore, key: str,
+                        data_path=DATASET_FILE_PATH,
+                        engine=CSV_ENGINE) -> (pd.DataFrame, pd.Series):
+    """
+    Read a preprocessed dataset from the artifact store, preprocessing and
+    storing it first if it is missing.
+
+    Parameters:
+    - store (ArtifactStore): Artifact store.
+    - key (str): Key of the dataset, see dataset_cache_key.
+    - data_path (str): Path to the CSV file.
+    - engine (str): pandas CSV parser, None for pyarrow when installed.
+
+    Returns:
+    - tuple: Feature matrix (pd.DataFrame) and target vector (pd.Series).
+    """
+    entry_path = store.get(key)
+    if entry_path is not None:
+        logging.info("Loading preprocessed data from %s", entry_path)
+        return _read_dataset_entry(entry_path)
+
+    X, y = preprocess_data(load_data(data_path, engine))
+    store.put(key, lambda folder: _write_dataset_entry(folder, X, y))
+    return X, y
+
+
+def dataset_cache_key(data_path: str) -> str:
+    """
+    Return the artifact key of a dataset file: the hash of its content and
+    of the preprocessing.
+
+    Parameters:
+    - data_path (str): Path to the dataset file.
+
+    Returns:
+    - str: Artifact key.
+    """
+    return ArtifactStore.key('preprocess', file_hash(data_path),
+                             PREPROCESSING_VERSION)
+
+
+def _read_dataset_entry(entry_path: str) -> (pd.DataFrame, pd.Series):
+    with open(os.path.join(entry_path, 'columns.json')) as f:
+        columns = json.load(f)
+    features = np.load(os.path.join(entry_path, 'X.npy'), mmap_mode='r')
+    target = np.load(os.path.join(entry_path, 'y.npy'), mmap_mode='r')
+    return (pd.DataFrame(features, columns=columns, copy=False),
+            pd.Series(target, name=TARGET_COLUMN, copy=False))
+
+
+def _write_dataset_entry(folder: str, X: pd.DataFrame, y: pd.Series):
+    np.save(os.path.join(folder, 'X.npy'), X.to_numpy(np.float32))
+    np.save(os.path.join(folder, 'y.npy'), y.to_numpy(np.int64))
+    with open(os.path.join(folder, 'columns.json'), 'w') as f:
+        json.dump(X.columns.tolist(), f)
+
+
+def _column_dtypes(data_path: str) -> dict:
+    """Map the file's names of the kept columns to their dtypes."""
+    header = pd.read_csv(data_path, nrows=0).columns
+    columns = {_normalize_name(name): name for name in header}
+    return {columns[name]: dtype for name, dtype in COLUMN_DTYPES.items()
+            if name in columns}
+
+
+def _normalize_name(name: str) -> str:
+    """Lowercase a name and replace spaces with underscores."""
+    return str(name).lower().replace(' ', '_')
+
+
+def _normalize_values(values: pd.Series) -> pd.Series:
+    """Normalize the labels of a string or categorical column."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = [_normalize_name(c) for c in values.cat.categories]
+        if len(set(categories)) == len(categories):
+            return values.cat.rename_categories(categories)
+        values = values.astype(object)
+    if values.dtype == object:
+        return values.str.lower().str.replace(' ', '_')
+    return values
+
+
+def _default_engine() -> str:
+    """Return 'pyarrow' when it is installed, the C parser otherwise."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'c'
+    return 'pyarrow'
+
@@ -0,0 +1,185 @@
+"""
+Utility functions for out-of-core training for the SkySatisfy project.
+
+The dataset is streamed from the CSV file in chunks, preprocessed chunk by
+chunk, into an external-memory DMatrix whose pages XGBoost keeps on disk,
+so the full dataset is never loaded. Chunks are sized to keep the parsed
+rows under a memory cap. XGBoost itself still keeps a few bytes of training
+state per row (labels, gradients, predictions), far less than the parsed
+data.
+
+Cross-validation folds cannot be sliced out of an external-memory matrix,
+so the model is evaluated on one holdout fold, chosen by a hash of the row
+number so that every pass over the file selects the same rows.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import xgboost as xgb
+
+from backend.config import (DATASET_FILE_PATH, MODEL_PARAMS,
+                            EXTERNAL_MEMORY)
+from backend.utils.cpu_planner import training_params
+from backend.utils.data_loader import (iter_dataset, estimate_row_size,
+                                       FEATURE_ENCODER)
+from backend.utils.model_evaluator import N_SPLITS, fold_metrics
+
+
+# memory needed per chunk, in preprocessed chunks: parsing, normalizing,
+# encoding and handing a chunk to XGBoost peak at about 4.2 times its size
+CHUNK_COPIES = 6
+
+# smallest chunk, so tiny caps do not degrade into row-by-row parsing
+MIN_CHUNK_SIZE = 1000
+
+# odd multiplier spreading consecutive row numbers over the folds
+_ROW_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+class DatasetIter(xgb.DataIter):
+    """
+    Feed preprocessed chunks of the dataset to XGBoost.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - chunk_size (int): Rows per chunk.
+    - rows (str): 'all' rows, the 'train' rows outside the holdout fold or
+                  only the 'holdout' rows.
+    - cache_prefix (str): Path prefix of XGBoost's on-disk pages.
+
+    Example:
+    >>> dtrain = xgb.DMatrix(DatasetIter('data.csv', 50000,
+    ...                                  cache_prefix='cache/train'))
+    """
+
+    def __init__(self, data_path: str, chunk_size: int, rows='all',
+                 cache_prefix=None):
+        self.data_path = data_path
+        self.chunk_size = chunk_size
+        self.rows = rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> int:
+        chunk = self._next_chunk()
+        if chunk is None:
+            return 0
+        X, y = chunk
+        input_data(data=X, label=y)
+        return 1
+
+    def reset(self):
+        self._chunks = None
+
+    def chunks(self):
+        """Iterate over the selected (X, y) chunks once."""
+        self.reset()
+        while (chunk := self._next_chunk()) is not None:
+            yield chunk
+
+    def _next_chunk(self):
+        if self._chunks is None:
+            self._chunks = iter_dataset(self.data_path, self.chunk_size)
+        for X, y in self._chunks:
+            if self.rows != 'all':
+                holdout = in_holdout(X.index.to_numpy())
+                keep = holdout if self.rows == 'holdout' else ~holdout
+                X, y = X[keep], y[keep]
+            if len(y):
+                return X, y
+        return None
+
+
+def in_holdout(row_numbers: np.ndarray) -> np.ndarray:
+    """
+    Return which rows belong to the holdout fold.
+
+    Parameters:
+    - row_numbers (np.ndarray): Row numbers in the file.
+
+    Returns:
+    - np.ndarray: Boolean mask, true for about 1 / N_SPLITS of the rows.
+    """
+    hashed = row_numbers.astype(np.uint64) * _ROW_HASH
+    return (hashed >> np.uint64(32)) % np.uint64(N_SPLITS) == 0
+
+
+def chunk_size_for(data_path=DATASET_FILE_PATH,
+                   memory_cap_mb=EXTERNAL_MEMORY['MEMORY_CAP_MB']) -> int:
+    """
+    Return the number of rows per chunk that keeps parsing under a cap.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - memory_cap_mb (float): Memory cap for the parsed data, in MB.
+
+    Returns:
+    - int: Rows per chunk.
+    """
+    row_size = estimate_row_size(data_path)
+    rows = int(memory_cap_mb * 2**20 / (CHUNK_COPIES * row_size))
+    return max(MIN_CHUNK_SIZE, rows)
+
+
+def train_external(data_path=DATASET_FILE_PATH,
+                   xgb_params=MODEL_PARAMS['XGB_PARAMS'],
+                   memory_cap_mb=EXTERNAL_MEMORY['MEMORY_CAP_MB'],
+                   cache_folder_path=EXTERNAL_MEMORY['CACHE_FOLDER_PATH'],
+                   num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND']):
+    """
+    Evaluate and train a model without loading the dataset into memory.
+
+    A model trained on the rows outside the holdout fold is evaluated on
+    the holdout rows; the returned model is trained on all rows.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - xgb_params (dict): Parameters for the XGBoost model.
+    - memory_cap_mb (float): Memory cap for the parsed data, in MB.
+    - cache_folder_path (str): Folder for XGBoost's on-disk pages.
+    - num_boost_round (int): Number of boosting rounds.
+
+    Returns:
+    - tuple: Trained model (xgb.Booster), carrying the encoding of its
+             features, and raw metrics of the holdout fold, with one
+             value each for 'auc', 'precision', 'recall' and 'f1'.
+
+    Raises:
+    - ValueError: If the features include categorical ones.
+
+    Example:
+    >>> model, raw_metrics = train_external('data/history.csv')
+    """
+    if 'c' in (FEATURE_ENCODER.feature_types or []):
+        # XGBoost trains categorical features from data iterators poorly
+        raise ValueError("External memory training does not support "
+                         "categorical features, use the one-hot mode")
+    params = training_params(xgb_params)
+    chunk_size = chunk_size_for(data_path, memory_cap_mb)
+    os.makedirs(cache_folder_path, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=cache_folder_path) as folder:
+        model = _train(DatasetIter(data_path, chunk_size, 'train',
+                                   os.path.join(folder, 'train')),
+                       params, num_boost_round)
+
+        labels, predictions = [], []
+        for X, y in DatasetIter(data_path, chunk_size, 'holdout').chunks():
+            labels.append(y.to_numpy())
+            predictions.append(model.predict(xgb.DMatrix(X)))
+        labels = np.concatenate(labels)
+        raw_metrics = fold_metrics(labels, np.concatenate(predictions),
+                                   np.zeros(len(labels), dtype=np.int64))
+
+        model = _train(DatasetIter(data_path, chunk_size, 'all',
+                                   os.path.join(folder, 'all')),
+                       params, num_boost_round)
+    return FEATURE_ENCODER.attach(model), raw_metrics
+
+
+def _train(batches: DatasetIter, params: dict,
+           num_boost_round: int) -> xgb.Booster:
+    dtrain = xgb.DMatrix(batches)
+    return xgb.train(params, dtrain, num_boost_round=num_boost_round)
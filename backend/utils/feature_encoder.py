@@ -0,0 +1,242 @@
+"""
+Feature encoder shared by training and serving for the SkySatisfy project.
+
+The encoder is compiled once from the list of raw features and writes
+validated records or column arrays straight into a NumPy matrix laid out in
+the exact column order the model was trained on.
+
+Categorical features are either one-hot encoded or, in categorical mode,
+kept as a single column of integer codes that XGBoost splits natively on.
+Trained models carry their encoding as an attribute, so serving rebuilds
+the encoder the model was trained with.
+"""
+
+import json
+
+import numpy as np
+
+
+# binary categorical features and their integer codes
+CATEGORICAL_ENCODINGS = {
+    'customer_type': {'loyal_customer': 1, 'disloyal_customer': 0},
+    'type_of_travel': {'business_travel': 1, 'personal_travel': 0},
+}
+
+# categorical features that are one-hot encoded, with their categories
+ONE_HOT_CATEGORIES = {
+    'class': ['business', 'eco', 'eco_plus'],
+}
+
+# booster attribute holding the encoding a model was trained with
+ENCODING_ATTR = 'feature_encoding'
+
+
+class FeatureEncoder:
+    """
+    Encode raw features into the model's feature matrix.
+
+    Plain and binary categorical features keep their position in `features`;
+    one-hot encoded features are replaced by one column per category appended
+    at the end, the same layout `pd.get_dummies` produced during training.
+    In categorical mode nothing is one-hot encoded: every categorical feature
+    keeps its position as a column of category codes, typed 'c' in
+    `feature_types` for XGBoost.
+
+    `columns` lists (name, column, codes) for plain and coded features and
+    `one_hot_groups` lists (name, start column, categories, category index)
+    for one-hot encoded features.
+
+    Parameters:
+    - features (list): Raw feature names, in training order.
+    - categorical_encodings (dict): Integer codes per categorical feature.
+    - one_hot_categories (dict): Categories per one-hot encoded feature.
+    - categorical (bool): Whether to code the one-hot encoded features
+                          instead, by their position among the categories,
+                          and type all categorical features as such.
+
+    Example:
+    >>> encoder = FeatureEncoder(['age', 'class'])
+    >>> encoder.feature_names
+    ['age', 'class_business', 'class_eco', 'class_eco_plus']
+    >>> FeatureEncoder(['age', 'class'], categorical=True).feature_types
+    ['q', 'c']
+    """
+
+    def __init__(self, features: list,
+                 categorical_encodings=CATEGORICAL_ENCODINGS,
+                 one_hot_categories=ONE_HOT_CATEGORIES, categorical=False):
+        self.features = list(features)
+        self.categorical_encodings = dict(categorical_encodings)
+        self.one_hot_categories = dict(one_hot_categories)
+        self.categorical = categorical
+        self.feature_names = []
+        self.columns = []
+        self.one_hot_groups = []
+
+        if categorical:
+            categorical_encodings = {
+                **categorical_encodings,
+                **{name: {c: i for i, c in enumerate(categories)}
+                   for name, categories in one_hot_categories.items()}}
+            one_hot_categories = {}
+
+        for name in self.features:
+            if name in one_hot_categories:
+                continue
+            self.columns.append((name, len(self.feature_names),
+                                 categorical_encodings.get(name)))
+            self.feature_names.append(name)
+
+        for name in self.features:
+            if name not in one_hot_categories:
+                continue
+            categories = list(one_hot_categories[name])
+            self.one_hot_groups.append(
+                (name, len(self.feature_names), categories,
+                 {c: i for i, c in enumerate(categories)}))
+            self.feature_names.extend(f'{name}_{c}' for c in categories)
+
+        self.n_features = len(self.feature_names)
+        # XGBoost feature types, None to leave them all numerical
+        self.feature_types = [
+            'q' if mapping is None else 'c' for _, _, mapping in self.columns
+        ] if categorical else None
+
+    def to_dict(self) -> dict:
+        """Return the arguments that rebuild this encoder, as JSON types."""
+        return {
+            'features': self.features,
+            'categorical_encodings': self.categorical_encodings,
+            'one_hot_categories': self.one_hot_categories,
+            'categorical': self.categorical,
+        }
+
+    @classmethod
+    def from_dict(cls, encoding: dict) -> 'FeatureEncoder':
+        """Rebuild an encoder from the output of `to_dict`."""
+        return cls(**encoding)
+
+    def attach(self, model):
+        """
+        Store the encoding in a model, so it is saved along with it.
+
+        Parameters:
+        - model (xgb.Booster): Model trained on this encoder's features.
+
+        Returns:
+        - xgb.Booster: The same model.
+        """
+        model.set_attr(**{ENCODING_ATTR: json.dumps(self.to_dict())})
+        return model
+
+    def encode_records(self, records: list, out=None) -> np.ndarray:
+        """
+        Encode a list of validated records.
+
+        Records may use either the feature name or the schema attribute name
+        with a trailing underscore (e.g. 'class_') as key.
+
+        Parameters:
+        - records (list): Validated records (dicts).
+        - out (np.ndarray): Optional preallocated float32 buffer of shape
+                            (len(records), n_features).
+
+        Returns:
+        - np.ndarray: Encoded feature matrix.
+        """
+        out = self._allocate(len(records), out)
+
+        for name, column, mapping in self.columns:
+            values = [_record_value(record, name) for record in records]
+            if mapping is not None:
+                values = [mapping[value] for value in values]
+            out[:, column] = values
+
+        for name, start, categories, index in self.one_hot_groups:
+            codes = [index[_record_value(record, name)] for record in records]
+            out[:, start:start + len(categories)] = 0
+            out[np.arange(len(records)), start + np.asarray(codes, int)] = 1
+
+        return out
+
+    def encode_columns(self, columns, out=None) -> np.ndarray:
+        """
+        Encode whole columns of raw feature values.
+
+        Parameters:
+        - columns (Mapping): Column arrays keyed by feature name, e.g. a
+                             pd.DataFrame or a dict of NumPy arrays.
+        - out (np.ndarray): Optional preallocated float32 buffer.
+
+        Returns:
+        - np.ndarray: Encoded feature matrix.
+
+        Raises:
+        - KeyError: If a feature column is missing.
+        - ValueError: If a categorical column holds an unknown category.
+        """
+        arrays = {name: np.asarray(columns[name]) for name in self.features}
+        n_rows = len(arrays[self.features[0]]) if self.features else 0
+        out = self._allocate(n_rows, out)
+
+        for name, column, mapping in self.columns:
+            values = arrays[name]
+            if mapping is not None:
+                values = _map_categories(name, values, mapping)
+            out[:, column] = values
+
+        for name, start, categories, index in self.one_hot_groups:
+            codes = _map_categories(name, arrays[name], index)
+            out[:, start:start + len(categories)] = 0
+            out[np.arange(n_rows), start + codes] = 1
+
+        return out
+
+    def _allocate(self, n_rows: int, out) -> np.ndarray:
+        if out is None:
+            return np.empty((n_rows, self.n_features), dtype=np.float32)
+        if out.shape != (n_rows, self.n_features):
+            raise ValueError(
+                f"Expected buffer of shape {(n_rows, self.n_features)}, "
+                f"got {out.shape}")
+        return out
+
+
+def model_encoder(model, default=None):
+    """
+    Return the encoder a model was trained with.
+
+    Parameters:
+    - model (xgb.Booster): Trained model.
+    - default (FeatureEncoder): Encoder of models saved without one.
+
+    Returns:
+    - FeatureEncoder: The encoder stored in the model, or `default`.
+
+    Example:
+    >>> model_encoder(load_model(), FEATURE_ENCODER).feature_types
+    ['c', 'q', 'c', 'c', 'q', 'q', 'q']
+    """
+    encoding = model.attr(ENCODING_ATTR)
+    if encoding is None:
+        return default
+    return FeatureEncoder.from_dict(json.loads(encoding))
+
+
+def _record_value(record: dict, name: str):
+    """Read a feature from a record, falling back to the schema attribute."""
+    try:
+        return record[name]
+    except KeyError:
+        return record[name + '_']
+
+
+def _map_categories(name: str, values: np.ndarray, mapping: dict):
+    """Map an array of category labels to their integer codes."""
+    codes = np.full(len(values), -1, dtype=np.int64)
+    for label, code in mapping.items():
+        codes[values == label] = code
+    if (codes == -1).any():
+        unknown = sorted(set(values[codes == -1].tolist()), key=str)
+        raise ValueError(f"Unknown categories for '{name}': {unknown}")
+    return codes
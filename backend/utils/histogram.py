@@ -0,0 +1,57 @@
+"""
+Fixed-bucket histogram for runtime statistics of the SkySatisfy project.
+"""
+
+import bisect
+import threading
+
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed, cumulative upper-bound buckets.
+
+    Parameters:
+    - buckets (list): Sorted bucket upper bounds; a final +Inf bucket is
+                      always added.
+
+    Example:
+    >>> histogram = Histogram([1, 5, 10])
+    >>> histogram.observe(3)
+    >>> histogram.snapshot()['buckets']
+    {'1': 0, '5': 1, '10': 1, '+Inf': 1}
+    """
+
+    def __init__(self, buckets: list):
+        self.buckets = list(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        """
+        Return cumulative bucket counts, the total count and the sum.
+
+        Returns:
+        - dict: {'buckets': {upper bound: count}, 'count': int, 'sum': float}
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets + ['+Inf'], counts):
+            cumulative += count
+            buckets[_format_bound(bound)] = cumulative
+        return {'buckets': buckets, 'count': cumulative, 'sum': total}
+
+
+def _format_bound(bound) -> str:
+    return bound if isinstance(bound, str) else f'{bound:g}'
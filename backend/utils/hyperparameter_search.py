@@ -0,0 +1,295 @@
+"""
+Utility functions for tuning model parameters for the SkySatisfy project.
+
+Random configurations compete by successive halving: all of them are
+cross-validated with a few boosting rounds, the best fraction moves on with
+several times as many rounds, and so on until one is left or the time
+budget runs out. Every fold stops early once its validation AUC stops
+improving, so the number of rounds a configuration needs is found on the
+way.
+
+Trials run as one job per configuration and fold in a process pool. Each
+worker quantizes the training and validation rows of every fold once, into
+QuantileDMatrix objects, and reuses them for all the trials it runs.
+"""
+
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from backend.config import MODEL_PARAMS, TUNING
+from backend.utils.cpu_planner import plan_cpus
+from backend.utils.model_evaluator import fold_assignment
+
+
+# histogram bins of the quantized matrices, XGBoost's default
+MAX_BIN = 256
+
+# feature matrix, labels, folds, feature types and quantized fold matrices
+# of a worker
+_worker_state = None
+
+
+def sample_configurations(n_trials: int, space=TUNING['SPACE'],
+                          base_params=MODEL_PARAMS['XGB_PARAMS'],
+                          seed=0) -> list:
+    """
+    Draw random model configurations from a search space.
+
+    Parameters:
+    - n_trials (int): Number of configurations.
+    - space (dict): (distribution, low, high) of each tuned parameter, the
+                    distribution being 'log', 'uniform' or 'int'.
+    - base_params (dict): Parameters shared by all configurations.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    - list: XGBoost parameters of each configuration.
+
+    Raises:
+    - ValueError: If a distribution is unknown.
+
+    Example:
+    >>> sample_configurations(2, {'max_depth': ('int', 2, 8)}, {})
+    [{'max_depth': 7}, {'max_depth': 5}]
+    """
+    rng = np.random.default_rng(seed)
+    configurations = []
+    for _ in range(n_trials):
+        params = dict(base_params)
+        for name, (distribution, low, high) in space.items():
+            if distribution == 'log':
+                value = math.exp(rng.uniform(math.log(low), math.log(high)))
+            elif distribution == 'uniform':
+                value = rng.uniform(low, high)
+            elif distribution == 'int':
+                value = int(rng.integers(low, high + 1))
+            else:
+                raise ValueError(f"Unknown distribution of {name}: "
+                                 f"{distribution}")
+            params[name] = value if distribution == 'int' else float(value)
+        configurations.append(params)
+    return configurations
+
+
+def successive_halving(X: pd.DataFrame, y: pd.Series,
+                       configurations: list,
+                       min_rounds=TUNING['MIN_ROUNDS'],
+                       reduction_factor=TUNING['REDUCTION_FACTOR'],
+                       budget_seconds=TUNING['BUDGET_SECONDS'],
+                       early_stopping_rounds=TUNING[
+                           'EARLY_STOPPING_ROUNDS'],
+                       n_jobs=TUNING['JOBS'], feature_types=None) -> dict:
+    """
+    Find the best configuration by successive halving with cross-validation.
+
+    Every rung cross-validates the remaining configurations with up to
+    `reduction_factor` times the rounds of the previous one, and keeps the
+    best 1 / `reduction_factor` of them. The search ends with a single
+    configuration or when the budget runs out, and the best configuration
+    of the last rung wins.
+
+    Parameters:
+    - X (pd.DataFrame): Feature matrix.
+    - y (pd.Series): Target vector.
+    - configurations (list): XGBoost parameters of each configuration.
+    - min_rounds (int): Maximum boosting rounds in the first rung.
+    - reduction_factor (int): Factor by which every rung cuts the
+                              configurations and multiplies the rounds.
+    - budget_seconds (float): Wall-clock time after which no further trials
+                              are started.
+    - early_stopping_rounds (int): Rounds without improvement of the
+                                   validation AUC after which a fold stops.
+    - n_jobs (int): Parallel jobs, None for one per CPU; 1 runs the trials
+                    in this process.
+    - feature_types (list): XGBoost type of every column, 'c' for the
+                            categorical ones; None for all numerical.
+
+    Returns:
+    - dict: 'params' and 'num_boost_round' of the best configuration, its
+            cross-validated 'auc', and 'trials', a record of every trial of
+            every rung.
+
+    Raises:
+    - TimeoutError: If no trial finished within the budget.
+
+    Example:
+    >>> result = successive_halving(X, y, sample_configurations(27))
+    >>> result['params']['max_depth'], result['num_boost_round']
+    (5, 84)
+    """
+    deadline = time.monotonic() + budget_seconds
+    folds = fold_assignment(len(y))
+    cpus = plan_cpus()['training_nthread']
+    n_jobs = n_jobs or cpus
+    nthread = max(1, cpus // n_jobs)
+
+    candidates = list(range(len(configurations)))
+    rounds = min_rounds
+    trials = []
+    best = None
+    with _TrialRunner(X.to_numpy(dtype=np.float32),
+                      y.to_numpy(dtype=np.float32), folds,
+                      n_jobs, feature_types) as runner:
+        while candidates:
+            jobs = [(trial, {**configurations[trial], 'nthread': nthread},
+                     rounds, early_stopping_rounds)
+                    for trial in candidates]
+            scores = runner.run(jobs, deadline)
+            rung = [{'trial': trial, 'max_rounds': rounds,
+                     'params': configurations[trial], **scores[trial]}
+                    for trial in candidates if trial in scores]
+            trials.extend(rung)
+            if not rung:
+                break
+            rung.sort(key=lambda record: -record['auc'])
+            best = rung[0]
+            if len(candidates) == 1 or time.monotonic() >= deadline:
+                break
+            candidates = [record['trial'] for record in
+                          rung[:max(1, len(rung) // reduction_factor)]]
+            rounds *= reduction_factor
+
+    if best is None:
+        raise TimeoutError("No trial finished within the time budget")
+    return {
+        'params': best['params'],
+        'num_boost_round': best['num_boost_round'],
+        'auc': best['auc'],
+        'trials': trials,
+    }
+
+
+def fit_fold(params: dict, fold: int, num_boost_round: int,
+             early_stopping_rounds: int) -> tuple:
+    """
+    Train on every fold but one with early stopping, on the quantized
+    matrices of the process.
+
+    Parameters:
+    - params (dict): Parameters for the XGBoost model.
+    - fold (int): Fold held out for validation.
+    - num_boost_round (int): Maximum number of boosting rounds.
+    - early_stopping_rounds (int): Rounds without improvement of the
+                                   validation AUC after which training stops.
+
+    Returns:
+    - tuple: Best validation AUC and the number of rounds reaching it.
+    """
+    dtrain, dvalid = _fold_matrices(fold)
+    model = xgb.train({**params, 'eval_metric': 'auc', 'max_bin': MAX_BIN},
+                      dtrain, num_boost_round=num_boost_round,
+                      evals=[(dvalid, 'valid')],
+                      early_stopping_rounds=early_stopping_rounds,
+                      verbose_eval=False)
+    return model.best_score, model.best_iteration + 1
+
+
+class _TrialRunner:
+    """Run the folds of trials in this process or in a process pool."""
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray,
+                 folds: np.ndarray, n_jobs: int, feature_types=None):
+        self.arrays = (features, labels, folds)
+        self.n_jobs = n_jobs
+        self.feature_types = feature_types
+        self.pool = None
+        self.folder = None
+
+    def __enter__(self):
+        if self.n_jobs == 1:
+            _set_worker_state(*self.arrays, self.feature_types)
+            return self
+
+        # Forking a process with OpenMP threads is unsafe, so workers are
+        # spawned and map the matrix instead of inheriting it
+        self.folder = tempfile.TemporaryDirectory()
+        paths = []
+        for name, array in zip(('features', 'labels', 'folds'),
+                               self.arrays):
+            paths.append(os.path.join(self.folder.name, f'{name}.npy'))
+            np.save(paths[-1], array)
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.n_jobs,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(*paths, self.feature_types))
+        return self
+
+    def __exit__(self, *exc_info):
+        global _worker_state
+        if self.pool is None:
+            _worker_state = None
+        else:
+            self.pool.shutdown(cancel_futures=True)
+            self.folder.cleanup()
+
+    def run(self, jobs: list, deadline: float) -> dict:
+        """Return the mean AUC and rounds of the trials finished in time."""
+        n_folds = int(self.arrays[2].max()) + 1
+        tasks = [(trial, fold, params, rounds, early_stopping_rounds)
+                 for trial, params, rounds, early_stopping_rounds in jobs
+                 for fold in range(n_folds)]
+
+        results = {}
+        if self.pool is None:
+            for trial, fold, params, *rounds in tasks:
+                if time.monotonic() >= deadline:
+                    break
+                results[trial, fold] = fit_fold(params, fold, *rounds)
+        else:
+            futures = {self.pool.submit(fit_fold, params, fold, *rounds):
+                       (trial, fold)
+                       for trial, fold, params, *rounds in tasks}
+            done, not_done = wait(futures,
+                                  timeout=max(0, deadline - time.monotonic()))
+            for future in not_done:
+                future.cancel()
+            results = {futures[future]: future.result() for future in done}
+
+        scores = {}
+        for trial, *_ in jobs:
+            fold_results = [results.get((trial, fold))
+                            for fold in range(n_folds)]
+            if None in fold_results:
+                continue
+            aucs, rounds = zip(*fold_results)
+            scores[trial] = {'auc': float(np.mean(aucs)),
+                             'num_boost_round': int(round(np.mean(rounds)))}
+        return scores
+
+
+def _init_worker(features_path: str, labels_path: str, folds_path: str,
+                 feature_types):
+    """Memory-map the training data once per worker process."""
+    _set_worker_state(np.load(features_path, mmap_mode='r'),
+                      np.load(labels_path, mmap_mode='r'),
+                      np.load(folds_path, mmap_mode='r'), feature_types)
+
+
+def _set_worker_state(features: np.ndarray, labels: np.ndarray,
+                      folds: np.ndarray, feature_types):
+    global _worker_state
+    _worker_state = (features, labels, folds, feature_types, {})
+
+
+def _fold_matrices(fold: int) -> tuple:
+    """Quantize the training and validation rows of a fold, once."""
+    features, labels, folds, feature_types, matrices = _worker_state
+    if fold not in matrices:
+        train = folds != fold
+        dtrain = xgb.QuantileDMatrix(features[train], label=labels[train],
+                                     feature_types=feature_types,
+                                     max_bin=MAX_BIN)
+        # The validation rows share the bins of the training rows
+        dvalid = xgb.QuantileDMatrix(features[~train], label=labels[~train],
+                                     feature_types=feature_types, ref=dtrain)
+        matrices[fold] = (dtrain, dvalid)
+    return matrices[fold]
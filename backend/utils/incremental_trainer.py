@@ -0,0 +1,126 @@
+"""
+Utility functions for incremental retraining of models for the SkySatisfy
+project.
+
+Instead of retraining from scratch on the full dataset, the saved model is
+updated with newly arrived rows only: either boosting continues with more
+trees fitted to the new rows, or the leaf values of the existing trees are
+refitted to them. The update is judged on the most recent of the new rows,
+held out from training, against the current model.
+"""
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from backend.config import MODEL_PARAMS, INCREMENTAL_TRAINING
+from backend.utils.cpu_planner import training_params
+from backend.utils.model_evaluator import fold_metrics
+
+
+# ways of updating a model with new rows
+UPDATE_MODES = ('boost', 'refresh')
+
+
+def continue_training(model: xgb.Booster, X: pd.DataFrame, y: pd.Series,
+                      params=MODEL_PARAMS['XGB_PARAMS'],
+                      mode=INCREMENTAL_TRAINING['MODE'],
+                      num_boost_round=INCREMENTAL_TRAINING['NUM_BOOST_ROUND']
+                      ) -> xgb.Booster:
+    """
+    Update a trained model with new rows.
+
+    Parameters:
+    - model (xgb.Booster): Trained model; it is left unchanged.
+    - X (pd.DataFrame): Feature matrix of the new rows.
+    - y (pd.Series): Target vector of the new rows.
+    - params (dict): Parameters for the XGBoost model.
+    - mode (str): 'boost' to add num_boost_round trees fitted to the new
+                  rows, 'refresh' to refit the leaf values of the existing
+                  trees to them.
+    - num_boost_round (int): Trees added in 'boost' mode.
+
+    Returns:
+    - xgb.Booster: The updated model, with the attributes of `model`.
+
+    Raises:
+    - ValueError: If the mode is unknown.
+
+    Example:
+    >>> updated = continue_training(load_model(), X_new, y_new)
+    """
+    if mode not in UPDATE_MODES:
+        raise ValueError(f"Unknown update mode: {mode}")
+
+    params = training_params(params)
+    if mode == 'refresh':
+        params.update(process_type='update', updater='refresh',
+                      refresh_leaf=True)
+        num_boost_round = model.num_boosted_rounds()
+
+    # The new rows are typed like the rows the model was trained on
+    dtrain = xgb.DMatrix(X, label=y, feature_names=X.columns.tolist(),
+                         feature_types=model.feature_types)
+    # xgb.train copies the model it continues from
+    return xgb.train(params, dtrain, num_boost_round=num_boost_round,
+                     xgb_model=model)
+
+
+def split_recent(X: pd.DataFrame, y: pd.Series,
+                 holdout_fraction=INCREMENTAL_TRAINING['HOLDOUT_FRACTION']):
+    """
+    Split rows in arrival order into older training rows and a recent
+    holdout window.
+
+    Parameters:
+    - X (pd.DataFrame): Feature matrix, oldest rows first.
+    - y (pd.Series): Target vector.
+    - holdout_fraction (float): Fraction of the rows held out.
+
+    Returns:
+    - tuple: X_train, y_train, X_holdout and y_holdout.
+
+    Raises:
+    - ValueError: If either part would be empty.
+    """
+    n_holdout = int(round(len(y) * holdout_fraction))
+    if not 0 < n_holdout < len(y):
+        raise ValueError(f"Cannot hold out {holdout_fraction:.0%} of "
+                         f"{len(y)} rows")
+    split = len(y) - n_holdout
+    return X.iloc[:split], y.iloc[:split], X.iloc[split:], y.iloc[split:]
+
+
+def evaluate_update(current: xgb.Booster, updated: xgb.Booster,
+                    X: pd.DataFrame, y: pd.Series,
+                    max_auc_drop=INCREMENTAL_TRAINING['MAX_AUC_DROP']
+                    ) -> dict:
+    """
+    Compare an updated model against the current one on holdout rows.
+
+    Parameters:
+    - current (xgb.Booster): The model in use.
+    - updated (xgb.Booster): The candidate model.
+    - X (pd.DataFrame): Feature matrix of the holdout rows.
+    - y (pd.Series): Target vector of the holdout rows.
+    - max_auc_drop (float): Largest AUC decrease that is still accepted.
+
+    Returns:
+    - dict: 'current' and 'updated' raw metrics, with one value each for
+            'auc', 'precision', 'recall' and 'f1', and whether the update
+            is 'accepted'.
+
+    Example:
+    >>> evaluate_update(model, updated, X_holdout, y_holdout)['accepted']
+    True
+    """
+    dholdout = xgb.DMatrix(X, feature_names=X.columns.tolist(),
+                           feature_types=current.feature_types)
+    labels = y.to_numpy()
+    folds = np.zeros(len(labels), dtype=np.int64)
+    metrics = {name: fold_metrics(labels, model.predict(dholdout), folds)
+               for name, model in (('current', current),
+                                   ('updated', updated))}
+    metrics['accepted'] = (metrics['updated']['auc'][0] >=
+                           metrics['current']['auc'][0] - max_auc_drop)
+    return metrics
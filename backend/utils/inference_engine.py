@@ -0,0 +1,56 @@
+"""
+Utility functions for selecting the inference engine used to score requests
+for the SkySatisfy project.
+"""
+
+import logging
+import os
+
+import xgboost as xgb
+
+from backend.config import INFERENCE_ENGINE, LOOKUP_TABLE_FILE_PATH
+from backend.utils.lookup_table import load_lookup_table
+from backend.utils.model_serializer import get_model_hash
+from backend.utils.tree_evaluator import TreeEnsemble
+
+
+def load_inference_engine(model: xgb.Booster, engine=INFERENCE_ENGINE,
+                          lookup_table_path=LOOKUP_TABLE_FILE_PATH):
+    """
+    Return the object the predictor should score requests with.
+
+    Parameters:
+    - model (xgb.Booster): Loaded XGBoost model.
+    - engine (str): 'native', 'array' or 'lookup'.
+    - lookup_table_path (str): Path of the compiled lookup table.
+
+    Returns:
+    - xgb.Booster, TreeEnsemble or LookupTable: The model itself for the
+      native engine, otherwise the compiled engine. The lookup engine falls
+      back to the model if its table is unavailable or was built from a
+      different model.
+
+    Example:
+    >>> engine = load_inference_engine(load_model(), 'lookup')
+    >>> prediction = make_prediction(engine, data)
+    """
+    if engine == 'native':
+        return model
+    if engine == 'array':
+        return TreeEnsemble.from_booster(model)
+    if engine != 'lookup':
+        raise ValueError(f"Unknown inference engine: {engine}")
+
+    if not os.path.isfile(lookup_table_path):
+        logging.warning("Lookup table %s not found, using the native engine",
+                        lookup_table_path)
+        return model
+
+    lookup_table = load_lookup_table(lookup_table_path)
+    if lookup_table.model_hash != get_model_hash(model):
+        logging.warning("Lookup table was compiled from a different model, "
+                        "using the native engine")
+        return model
+
+    logging.info("Using lookup table from %s", lookup_table_path)
+    return lookup_table
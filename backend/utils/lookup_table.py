@@ -0,0 +1,282 @@
+"""
+Utility functions for compiling an XGBoost model into an exact lookup table
+for the SkySatisfy project.
+
+Every tree only compares a feature against a finite set of split thresholds,
+so the model is constant inside each cell of the grid formed by those
+thresholds. Categorical splits partition a feature's categories instead,
+so a categorical feature has one bin per category and its code is the bin.
+The table stores the model output for every cell; serving then needs one
+`searchsorted` per plain feature and a single array index.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+import xgboost as xgb
+
+from backend.config import LOOKUP_TABLE_FILE_PATH, LOOKUP_TABLE_MAX_CELLS
+from backend.utils.data_loader import FEATURE_ENCODER
+from backend.utils.feature_encoder import FeatureEncoder, model_encoder
+from backend.utils.model_serializer import get_model_hash
+
+
+# number of grid cells scored per Booster.predict call while compiling
+_CHUNK_SIZE = 1 << 18
+
+
+class LookupTable:
+    """
+    Model output for every cell of the split-threshold grid.
+
+    The grid has one dimension per plain feature column, binned by the
+    thresholds the trees split that column on, and one dimension per
+    one-hot encoded or categorical feature with a bin for each category.
+
+    Parameters:
+    - dims (list): Grid dimensions, dicts with either 'column' and 'edges'
+                   (plain feature), 'start' and 'size' (one-hot group) or
+                   'column' and 'size' (categorical feature).
+    - table (np.ndarray): Model output per cell, shaped like the grid.
+    - model_hash (str): Hash of the model the table was compiled from.
+    - encoder (FeatureEncoder): Encoder the model was trained with, None
+                                for FEATURE_ENCODER.
+    """
+
+    def __init__(self, dims: list, table: np.ndarray, model_hash: str,
+                 encoder=None):
+        self.dims = dims
+        self.table = table
+        self.model_hash = model_hash
+        self.encoder = encoder
+        self._flat_table = table.reshape(-1)
+        self._edges = [np.asarray(d['edges'], dtype=np.float32)
+                       if 'edges' in d else None for d in dims]
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Look up the model output for an encoded feature matrix.
+
+        Parameters:
+        - features (np.ndarray): Matrix produced by the feature encoder.
+
+        Returns:
+        - np.ndarray: Model output per row, identical to Booster.predict.
+        """
+        return self._flat_table[self._cell_index(features)]
+
+    def _cell_index(self, features: np.ndarray) -> np.ndarray:
+        index = np.zeros(len(features), dtype=np.int64)
+        for dim, edges, size in zip(self.dims, self._edges, self.table.shape):
+            if edges is not None:
+                # x < threshold goes left, so equal values fall right
+                bins = np.searchsorted(edges, features[:, dim['column']],
+                                       side='right')
+            elif 'start' in dim:
+                start = dim['start']
+                bins = features[:, start:start + dim['size']].argmax(axis=1)
+            else:
+                # The category code is the bin
+                bins = features[:, dim['column']].astype(np.int64)
+            index = index * size + bins
+        return index
+
+
+def compile_lookup_table(model: xgb.Booster, encoder=None,
+                         max_cells=LOOKUP_TABLE_MAX_CELLS) -> LookupTable:
+    """
+    Compile a model into a lookup table over its split-threshold grid.
+
+    Parameters:
+    - model (xgb.Booster): Trained XGBoost model.
+    - encoder (FeatureEncoder): Encoder that produces the model's features,
+                                None for the one saved with the model or
+                                else FEATURE_ENCODER.
+    - max_cells (int): Upper bound on the number of grid cells.
+
+    Returns:
+    - LookupTable: Compiled lookup table.
+
+    Raises:
+    - ValueError: If the grid would exceed `max_cells` cells.
+
+    Example:
+    >>> table = compile_lookup_table(load_model())
+    """
+    encoder = encoder or model_encoder(model, FEATURE_ENCODER)
+    thresholds = _split_thresholds(model, encoder.n_features)
+
+    dims = []
+    for name, column, mapping in encoder.columns:
+        if encoder.feature_types and encoder.feature_types[column] == 'c':
+            dims.append({'name': name, 'column': column,
+                         'size': max(mapping.values()) + 1})
+            continue
+        dims.append({'name': name, 'column': column,
+                     'edges': sorted(thresholds[column])})
+    for name, start, categories, _ in encoder.one_hot_groups:
+        dims.append({'name': name, 'start': start, 'size': len(categories)})
+
+    shape = tuple(len(d['edges']) + 1 if 'edges' in d else d['size']
+                  for d in dims)
+    n_cells = int(np.prod(shape))
+    if n_cells > max_cells:
+        raise ValueError(f"Lookup table would have {n_cells} cells, "
+                         f"more than the limit of {max_cells}")
+
+    table = np.empty(n_cells, dtype=np.float32)
+    for start in range(0, n_cells, _CHUNK_SIZE):
+        cells = np.arange(start, min(start + _CHUNK_SIZE, n_cells))
+        features = _representative_features(dims, shape, cells,
+                                            encoder.n_features, upper=False)
+        dmatrix = xgb.DMatrix(features, feature_names=encoder.feature_names,
+                              feature_types=encoder.feature_types)
+        table[cells] = model.predict(dmatrix)
+
+    logging.info(f"Compiled lookup table with {n_cells} cells")
+    return LookupTable(dims, table.reshape(shape), get_model_hash(model),
+                       encoder)
+
+
+def verify_lookup_table(lookup_table: LookupTable, model: xgb.Booster,
+                        encoder=None) -> int:
+    """
+    Check a lookup table against Booster.predict across the whole grid.
+
+    Every cell is scored through the lookup path at both the lowest and the
+    highest value of its bins and compared with the model output.
+
+    Parameters:
+    - lookup_table (LookupTable): Table to verify.
+    - model (xgb.Booster): Model the table was compiled from.
+    - encoder (FeatureEncoder): Encoder that produces the model's features,
+                                None for the table's.
+
+    Returns:
+    - int: Number of mismatching cells, 0 if the table is exact.
+    """
+    encoder = encoder or lookup_table.encoder or FEATURE_ENCODER
+    dims, shape = lookup_table.dims, lookup_table.table.shape
+    n_cells = lookup_table.table.size
+    mismatches = 0
+    for start in range(0, n_cells, _CHUNK_SIZE):
+        cells = np.arange(start, min(start + _CHUNK_SIZE, n_cells))
+        for upper in (False, True):
+            features = _representative_features(dims, shape, cells,
+                                                encoder.n_features, upper)
+            dmatrix = xgb.DMatrix(features,
+                                  feature_names=encoder.feature_names,
+                                  feature_types=encoder.feature_types)
+            expected = model.predict(dmatrix)
+            mismatches += int(
+                (lookup_table.predict(features) != expected).sum())
+
+    if mismatches:
+        logging.error(f"Lookup table has {mismatches} mismatching cells")
+    else:
+        logging.info(f"Lookup table verified over {n_cells} cells")
+    return mismatches
+
+
+def save_lookup_table(lookup_table: LookupTable,
+                      path=LOOKUP_TABLE_FILE_PATH):
+    """
+    Save a lookup table as a .npy array with a JSON file of its grid.
+
+    Parameters:
+    - lookup_table (LookupTable): Table to save.
+    - path (str): Path of the .npy file; the grid goes next to it as .json.
+
+    Example:
+    >>> save_lookup_table(table, 'models/lookup_table.npy')
+    """
+    try:
+        np.save(path, lookup_table.table)
+        with open(_meta_path(path), 'w') as f:
+            meta = {'dims': lookup_table.dims,
+                    'model_hash': lookup_table.model_hash}
+            if lookup_table.encoder is not None:
+                meta['encoding'] = lookup_table.encoder.to_dict()
+            json.dump(meta, f)
+        logging.info(f"Successfully saved lookup table to {path}")
+    except Exception as e:
+        logging.error(f"Failed to save lookup table: {e}")
+        raise
+
+
+def load_lookup_table(path=LOOKUP_TABLE_FILE_PATH,
+                      mmap_mode='r') -> LookupTable:
+    """
+    Load a lookup table saved by `save_lookup_table`.
+
+    The table is memory-mapped by default, so all worker processes share
+    the same pages of the file instead of holding private copies.
+
+    Parameters:
+    - path (str): Path of the .npy file.
+    - mmap_mode (str): Memory-map mode passed to np.load, None to read the
+                       table into memory.
+
+    Returns:
+    - LookupTable: Loaded lookup table.
+
+    Example:
+    >>> table = load_lookup_table('models/lookup_table.npy')
+    """
+    with open(_meta_path(path), 'r') as f:
+        meta = json.load(f)
+    table = np.load(path, mmap_mode=mmap_mode)
+    encoder = None
+    if 'encoding' in meta:
+        encoder = FeatureEncoder.from_dict(meta['encoding'])
+    return LookupTable(meta['dims'], table, meta['model_hash'], encoder)
+
+
+def _meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _split_thresholds(model: xgb.Booster, n_features: int) -> list:
+    """Collect the exact float32 split thresholds used for each feature;
+    categorical splits have none."""
+    trees = json.loads(model.save_raw('json'))[
+        'learner']['gradient_booster']['model']['trees']
+
+    thresholds = [set() for _ in range(n_features)]
+    for tree in trees:
+        for left, feature, condition, split_type in zip(
+                tree['left_children'], tree['split_indices'],
+                tree['split_conditions'], tree['split_type']):
+            if left != -1 and split_type == 0:
+                thresholds[feature].add(float(np.float32(condition)))
+    return thresholds
+
+
+def _representative_features(dims: list, shape: tuple, cells: np.ndarray,
+                             n_features: int, upper: bool) -> np.ndarray:
+    """
+    Build one encoded row per grid cell, using either the lowest or the
+    highest float32 value of each bin.
+    """
+    bins = np.unravel_index(cells, shape)
+    features = np.zeros((len(cells), n_features), dtype=np.float32)
+    for dim, dim_bins in zip(dims, bins):
+        if 'edges' in dim:
+            edges = np.asarray(dim['edges'], dtype=np.float32)
+            if len(edges) == 0:
+                continue
+            # bin i covers [edges[i - 1], edges[i]), open at both ends
+            lower = np.concatenate([[edges[0] - 1], edges])
+            highest = np.concatenate([
+                np.nextafter(edges, np.float32(-np.inf)),
+                [edges[-1] + 1]
+            ])
+            values = highest if upper else lower
+            features[:, dim['column']] = values[dim_bins]
+        elif 'start' in dim:
+            features[np.arange(len(cells)), dim['start'] + dim_bins] = 1
+        else:
+            features[:, dim['column']] = dim_bins
+    return features
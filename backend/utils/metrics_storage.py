@@ -1,13 +1,11 @@
 import json
 import logging
-import logging.config
 import os
 import time
 
-from backend.config import METRICS_FILE_PATH, LOGGING_CONFIG
+import numpy as np
 
-
-logging.config.dictConfig(LOGGING_CONFIG)
+from backend.config import METRICS_FILE_PATH
 
 
 def get_metrics_creation_date(file_path=METRICS_FILE_PATH) -> str:
@@ -39,8 +37,12 @@ def save_metrics(metrics: dict, path=METRICS_FILE_PATH):
     >>> save_metrics({'accuracy': 0.9}, 'metrics.json')
     """
     try:
-        with open(path, 'w') as f:
+        # Write next to the destination and rename, so readers never see a
+        # partially written file
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
             json.dump(metrics, f)
+        os.replace(tmp_path, path)
         logging.info(f"Successfully saved metrics to {path}")
     except Exception as e:
         logging.error(f"Failed to save metrics: {e}")
@@ -71,3 +73,25 @@ def load_metrics(path=METRICS_FILE_PATH) -> dict:
     except Exception as e:
         logging.error(f"Failed to load metrics: {e}")
         raise
+
+
+def format_metrics(metrics: dict) -> dict:
+    """
+    Format each metric as 'mean ± std' over its cross-validation folds.
+
+    Parameters:
+    - metrics (dict): Lists of fold values keyed by metric name.
+
+    Returns:
+    - dict: Formatted metrics keyed by metric name.
+
+    Example:
+    >>> format_metrics({'auc': [0.9, 0.92]})
+    {'auc': '0.910 ± 0.010'}
+    """
+    formatted_metrics = {}
+    for key, values in metrics.items():
+        mean_value = np.mean(values)
+        std_value = np.std(values)
+        formatted_metrics[key] = f"{mean_value:.3f} \u00B1 {std_value:.3f}"
+    return formatted_metrics
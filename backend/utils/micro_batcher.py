@@ -0,0 +1,135 @@
+"""
+Micro-batching of concurrent prediction requests for the SkySatisfy project.
+
+Requests that arrive within a short window are scored together with a single
+batched predict call, so concurrent callers share the per-call overhead of
+the model. Each caller blocks until its own result is ready.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from backend.config import MICRO_BATCHING
+from backend.utils.histogram import Histogram
+
+
+# bucket upper bounds for the number of records per batch
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+# bucket upper bounds for the time a record waits in the queue, in seconds
+QUEUE_WAIT_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01,
+                      0.025, 0.05, 0.1]
+
+
+class MicroBatcher:
+    """
+    Collect records submitted by concurrent callers and score them in
+    batches.
+
+    A batch is closed when it holds `max_batch_size` records or when
+    `max_wait_ms` have passed since its first record arrived.
+
+    Parameters:
+    - score_batch (callable): Scores a list of records, returning a list of
+                              results in the same order.
+    - max_batch_size (int): Maximum number of records per batch.
+    - max_wait_ms (float): Maximum time the first record of a batch waits
+                           for more records, in milliseconds.
+
+    Example:
+    >>> batcher = MicroBatcher(lambda records: make_predictions(model,
+    ...                                                         records))
+    >>> prediction = batcher.submit(data)
+    """
+
+    def __init__(self, score_batch,
+                 max_batch_size=MICRO_BATCHING['MAX_BATCH_SIZE'],
+                 max_wait_ms=MICRO_BATCHING['MAX_WAIT_MS']):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+    def submit(self, record):
+        """
+        Queue a record and block until its batch has been scored.
+
+        Parameters:
+        - record: Record to score.
+
+        Returns:
+        - The result `score_batch` produced for this record.
+
+        Raises:
+        - Exception: Whatever `score_batch` raised for the batch.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((time.perf_counter(), record, future))
+        return future.result()
+
+    def stats(self) -> dict:
+        """Return the batch size and queue wait histograms."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_seconds': self.queue_wait.snapshot(),
+        }
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, daemon=True,
+                                 name='micro-batcher').start()
+                self._worker_pid = os.getpid()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            for enqueued, _, _ in batch:
+                self.queue_wait.observe(started - enqueued)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                results = self.score_batch([record for _, record, _ in batch])
+                if len(results) != len(batch):
+                    # Callers left without a result would block forever
+                    raise ValueError(f"Scored {len(results)} results for a "
+                                     f"batch of {len(batch)} records")
+            except Exception as e:
+                logging.error("Error in micro-batch of %d: %s", len(batch), e)
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _next_batch(self) -> list:
+        """Block for the first record, then collect until full or timed out."""
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
@@ -1,21 +1,119 @@
 """
 Utility functions for evaluating machine learning models for
 the SkySatisfy project.
+
+Cross-validation folds, and optionally the final model, are trained as
+independent jobs. With several CPUs they run in a process pool sharing one
+memory-mapped feature matrix, each job with its share of the CPUs as
+XGBoost threads.
 """
 
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
+from scipy.stats import rankdata
 from sklearn.model_selection import KFold
-from sklearn.metrics import (roc_auc_score,
-                             precision_score,
-                             recall_score,
-                             f1_score)
 import xgboost as xgb
-from backend.config import MODEL_PARAMS
+from backend.config import MODEL_PARAMS, CPU_PLAN
+from backend.utils.cpu_planner import plan_cpus
+from backend.utils.metrics_storage import format_metrics
+
+
+# number of cross-validation folds
+N_SPLITS = 5
+
+# probability above which a prediction counts as positive
+THRESHOLD = 0.5
+
+# feature matrix and labels of a pool worker, memory-mapped once
+_worker_data = None
+
+
+def cross_validate(X: pd.DataFrame, y: pd.Series,
+                   xgb_params=MODEL_PARAMS['XGB_PARAMS'],
+                   n_jobs=CPU_PLAN['CV_JOBS'], train_full=False,
+                   num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND'],
+                   feature_types=None) -> dict:
+    """
+    Cross-validate an XGBoost model with 5 folds.
+
+    Parameters:
+    - X (pd.DataFrame): Feature matrix.
+    - y (pd.Series): Target vector.
+    - xgb_params (dict): Parameters for the XGBoost model; 'nthread' is
+                         replaced by each job's share of the CPUs.
+    - n_jobs (int): Parallel training jobs, None for one per CPU up to the
+                    number of jobs; 1 trains in this process.
+    - train_full (bool): Also train the model on all data, in parallel
+                         with the folds.
+    - num_boost_round (int): Number of boosting rounds.
+    - feature_types (list): XGBoost type of every column, 'c' for the
+                            categorical ones; None for all numerical.
+
+    Returns:
+    - dict: 'metrics', with one value per fold for 'auc', 'precision',
+            'recall' and 'f1'; 'oof_predictions', the prediction for every
+            row from the fold that held it out; 'folds', the fold of every
+            row; and 'model', the model trained on all data, or None.
+
+    Raises:
+    - ValueError: If X is not a DataFrame, y is not a Series, their sizes
+                  differ or there are fewer rows than folds.
+
+    Example:
+    >>> result = cross_validate(X, y, train_full=True)
+    >>> result['metrics']['auc']
+    [0.93, 0.94, 0.93, 0.94, 0.93]
+    """
+    if not isinstance(X, pd.DataFrame) or not isinstance(y, pd.Series):
+        raise ValueError("X must be a DataFrame and y a Series")
+    if len(X) != len(y):
+        raise ValueError(f"X has {len(X)} rows but y has {len(y)}")
+
+    folds = fold_assignment(len(y))
+    splits = [(np.flatnonzero(folds != fold), np.flatnonzero(folds == fold))
+              for fold in range(N_SPLITS)]
+
+    # One job per fold, and one for the final model
+    jobs = [(train_index, val_index, None) for train_index, val_index
+            in splits]
+    if train_full:
+        jobs.append((np.arange(len(y)), None, X.columns.tolist()))
+
+    cpus = plan_cpus()['training_nthread']
+    n_jobs = min(n_jobs or cpus, len(jobs))
+    params = {**xgb_params, 'nthread': max(1, cpus // n_jobs)}
+
+    features = X.to_numpy(dtype=np.float32)
+    labels = y.to_numpy(dtype=np.float32)
+    if n_jobs == 1:
+        results = [_fit(features, labels, params, num_boost_round,
+                        feature_types, *job)
+                   for job in jobs]
+    else:
+        results = _fit_in_pool(features, labels, params, num_boost_round,
+                               feature_types, jobs, n_jobs)
+
+    oof_predictions = np.empty(len(y), dtype=np.float32)
+    for (_, val_index, _), result in zip(jobs[:N_SPLITS], results):
+        oof_predictions[val_index] = result
+
+    return {
+        'metrics': fold_metrics(labels, oof_predictions, folds),
+        'oof_predictions': oof_predictions,
+        'folds': folds,
+        'model': results[N_SPLITS] if train_full else None,
+    }
 
 
 def evaluate_model(X: pd.DataFrame, y: pd.Series,
-                   xgb_params=MODEL_PARAMS['XGB_PARAMS']) -> (dict, dict):
+                   xgb_params=MODEL_PARAMS['XGB_PARAMS'],
+                   num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND']
+                   ) -> (dict, dict):
     """
     Evaluate an XGBoost model using 5-fold cross-validation.
 
@@ -23,6 +121,7 @@ def evaluate_model(X: pd.DataFrame, y: pd.Series,
     - X (pd.DataFrame): Feature matrix.
     - y (pd.Series): Target vector.
     - xgb_params (dict): Parameters for the XGBoost model.
+    - num_boost_round (int): Number of boosting rounds.
 
     Returns:
     - tuple: Raw metrics and formatted metrics.
@@ -33,42 +132,140 @@ def evaluate_model(X: pd.DataFrame, y: pd.Series,
     >>> params = {'eta': 0.3, 'max_depth': 6}
     >>> raw_metrics, formatted_metrics = evaluate_model(X, y, params)
     """
-    metrics_storage = {
-        'auc': [],
-        'precision': [],
-        'recall': [],
-        'f1': []
+    metrics_storage = cross_validate(
+        X, y, xgb_params, num_boost_round=num_boost_round)['metrics']
+    formatted_metrics = format_metrics(metrics_storage)
+
+    return metrics_storage, formatted_metrics
+
+
+def fold_assignment(n_rows: int) -> np.ndarray:
+    """
+    Assign rows to the cross-validation folds.
+
+    Parameters:
+    - n_rows (int): Number of rows.
+
+    Returns:
+    - np.ndarray: Fold of every row, from 0, shuffled with a fixed seed so
+                  that every evaluation uses the same folds.
+    """
+    kf = KFold(n_splits=N_SPLITS, shuffle=True, random_state=42)
+    folds = np.empty(n_rows, dtype=np.int64)
+    for fold, (_, val_index) in enumerate(kf.split(np.empty(n_rows))):
+        folds[val_index] = fold
+    return folds
+
+
+def fold_metrics(y_true: np.ndarray, y_pred_proba: np.ndarray,
+                 folds: np.ndarray) -> dict:
+    """
+    Compute AUC, precision, recall and F1 of every fold.
+
+    The confusion matrices of all folds come from one pass over the rows.
+    Undefined ratios follow scikit-learn: precision is 1, recall and F1
+    are 0.
+
+    Parameters:
+    - y_true (np.ndarray): Binary labels.
+    - y_pred_proba (np.ndarray): Predicted probabilities.
+    - folds (np.ndarray): Fold of every row, from 0.
+
+    Returns:
+    - dict: Lists of per-fold 'auc', 'precision', 'recall' and 'f1'.
+
+    Raises:
+    - ValueError: If a fold has only one class, so its AUC is undefined.
+    """
+    n_folds = int(folds.max()) + 1
+    actual = y_true.astype(bool)
+    predicted = y_pred_proba > THRESHOLD
+
+    # Cell 2 * actual + predicted of every fold's confusion matrix
+    cells = np.bincount(folds * 4 + 2 * actual + predicted,
+                        minlength=n_folds * 4).reshape(n_folds, 4)
+    fp, tp, fn = cells[:, 1], cells[:, 3], cells[:, 2]
+
+    precision = _ratio(tp, tp + fp, 1.0)
+    recall = _ratio(tp, tp + fn, 0.0)
+    f1 = _ratio(2 * tp, 2 * tp + fp + fn, 0.0)
+    auc = [_rank_auc(actual[folds == fold], y_pred_proba[folds == fold])
+           for fold in range(n_folds)]
+
+    return {
+        'auc': auc,
+        'precision': precision.tolist(),
+        'recall': recall.tolist(),
+        'f1': f1.tolist(),
     }
 
-    dtrain = xgb.DMatrix(X, label=y)
 
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
+def _ratio(numerator: np.ndarray, denominator: np.ndarray,
+           undefined: float) -> np.ndarray:
+    ratio = np.full(len(numerator), undefined)
+    defined = denominator > 0
+    ratio[defined] = numerator[defined] / denominator[defined]
+    return ratio
 
-    for train_index, val_index in kf.split(y):
-        dtrain_fold = dtrain.slice(train_index)
-        dval_fold = dtrain.slice(val_index)
 
-        model = xgb.train(xgb_params, dtrain_fold, num_boost_round=25)
+def _rank_auc(actual: np.ndarray, scores: np.ndarray) -> float:
+    """ROC AUC as the Mann-Whitney statistic, with ties counted as half."""
+    n_pos = int(actual.sum())
+    n_neg = len(actual) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("Only one class present in a fold, ROC AUC is "
+                         "not defined")
+    ranks = rankdata(scores)
+    return float((ranks[actual].sum() - n_pos * (n_pos + 1) / 2)
+                 / (n_pos * n_neg))
 
-        y_pred_proba = model.predict(dval_fold)
-        y_true = dtrain.get_label()[val_index]
 
-        metrics_storage['auc'].append(roc_auc_score(y_true, y_pred_proba))
-        y_pred = (y_pred_proba > 0.5).astype(int)
-        metrics_storage['precision'].append(
-            precision_score(y_true, y_pred, zero_division=1))
-        metrics_storage['recall'].append(recall_score(y_true, y_pred))
-        metrics_storage['f1'].append(f1_score(y_true, y_pred))
+def _fit(features: np.ndarray, labels: np.ndarray, params: dict,
+         num_boost_round: int, feature_types, train_index: np.ndarray,
+         val_index, feature_names):
+    """Train on the given rows; return the predictions for the held-out
+    rows, or the model when there are none."""
+    dtrain = xgb.DMatrix(features[train_index], label=labels[train_index],
+                         feature_names=feature_names,
+                         feature_types=feature_types)
+    model = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+    if val_index is None:
+        return model
+    return model.predict(xgb.DMatrix(features[val_index],
+                                     feature_names=feature_names,
+                                     feature_types=feature_types))
 
-    formatted_metrics = format_metrics(metrics_storage)
 
-    return metrics_storage, formatted_metrics
+def _fit_in_pool(features: np.ndarray, labels: np.ndarray, params: dict,
+                 num_boost_round: int, feature_types, jobs: list,
+                 n_jobs: int) -> list:
+    with tempfile.TemporaryDirectory() as folder:
+        features_path = os.path.join(folder, 'features.npy')
+        labels_path = os.path.join(folder, 'labels.npy')
+        np.save(features_path, features)
+        np.save(labels_path, labels)
+
+        # Forking a process with OpenMP threads is unsafe, so workers are
+        # spawned and map the matrix instead of inheriting it
+        with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(features_path, labels_path)) as pool:
+            futures = [pool.submit(_fit_in_worker, params, num_boost_round,
+                                   feature_types, *job)
+                       for job in jobs]
+            return [future.result() for future in futures]
+
+
+def _init_worker(features_path: str, labels_path: str):
+    """Memory-map the training data once per worker process."""
+    global _worker_data
+    _worker_data = (np.load(features_path, mmap_mode='r'),
+                    np.load(labels_path, mmap_mode='r'))
 
 
-def format_metrics(metrics: dict) -> str:
-    formatted_metrics = {}
-    for key, values in metrics.items():
-        mean_value = np.mean(values)
-        std_value = np.std(values)
-        formatted_metrics[key] = f"{mean_value:.3f} \u00B1 {std_value:.3f}"
-    return formatted_metrics
+def _fit_in_worker(params: dict, num_boost_round: int, feature_types,
+                   train_index: np.ndarray, val_index, feature_names):
+    return _fit(*_worker_data, params, num_boost_round, feature_types,
+                train_index, val_index, feature_names)
@@ -0,0 +1,210 @@
+"""
+Model registry with zero-downtime hot reload for the SkySatisfy project.
+
+The registry holds the currently served model, its inference engine and its
+metrics as one immutable snapshot. A reload builds and warms a new snapshot
+off the request path and then replaces the reference in a single assignment,
+so requests that already picked up the old snapshot finish on it while new
+requests use the new one.
+
+XGBoost's OpenMP runtime is not fork-safe, so a process that forks workers,
+such as a preloading gunicorn master, must not load or warm a model: every
+worker loads its own after the fork, see `ensure_loaded`.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from backend.config import (MODEL_FILE_PATH, METRICS_FILE_PATH,
+                            INFERENCE_ENGINE, MODEL_RELOAD)
+from backend.utils.cpu_planner import configure_booster, plan_cpus
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.metrics_storage import (load_metrics,
+                                           get_metrics_creation_date)
+from backend.utils.model_serializer import load_model, get_model_hash
+from backend.utils.predictor import make_predictions
+
+
+# records scored once by every new model before it starts serving
+WARMUP_RECORDS = [
+    {
+        'customer_type': 'loyal_customer',
+        'age': 40,
+        'type_of_travel': 'business_travel',
+        'flight_distance': 1000,
+        'ease_of_online_booking': 3,
+        'online_boarding': 3,
+        'class_': 'business'
+    },
+    {
+        'customer_type': 'disloyal_customer',
+        'age': 25,
+        'type_of_travel': 'personal_travel',
+        'flight_distance': 300,
+        'ease_of_online_booking': 1,
+        'online_boarding': 2,
+        'class_': 'eco'
+    },
+]
+
+
+class LoadedModel:
+    """
+    Immutable snapshot of a served model.
+
+    Attributes:
+    - model (xgb.Booster): The loaded booster.
+    - engine: Inference engine requests are scored with.
+    - metrics (dict): Raw evaluation metrics of the model.
+    - version (str): Short content hash identifying the model.
+    - training_date (str): Date the model file was written.
+    """
+
+    def __init__(self, model, engine, metrics: dict, version: str,
+                 training_date: str):
+        self.model = model
+        self.engine = engine
+        self.metrics = metrics
+        self.version = version
+        self.training_date = training_date
+
+
+class ModelRegistry:
+    """
+    Hold the served model and swap in new versions without downtime.
+
+    Parameters:
+    - model_path (str): Path of the model file.
+    - metrics_path (str): Path of the metrics file.
+    - engine (str): Inference engine, see `load_inference_engine`.
+    - poll_interval (float): Seconds between checks of the model and metrics
+                             files while watching.
+
+    Example:
+    >>> registry = ModelRegistry()
+    >>> registry.load()
+    >>> prediction = make_prediction(registry.current.engine, data)
+    """
+
+    def __init__(self, model_path=MODEL_FILE_PATH,
+                 metrics_path=METRICS_FILE_PATH, engine=INFERENCE_ENGINE,
+                 poll_interval=MODEL_RELOAD['POLL_INTERVAL']):
+        self.model_path = model_path
+        self.metrics_path = metrics_path
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.current = None
+        self._reload_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_pid = None
+        self._watcher_lock = threading.Lock()
+        self._watcher_pid = None
+        self._stamp = None
+
+    def load(self) -> LoadedModel:
+        """
+        Load, warm and swap in the model currently on disk.
+
+        Returns:
+        - LoadedModel: The snapshot now being served.
+
+        Raises:
+        - Exception: Whatever loading or warming the model raised; the
+                     previous snapshot keeps being served.
+        """
+        with self._reload_lock:
+            stamp = self._files_stamp()
+            loaded = self._build()
+            # A single reference assignment swaps the model atomically
+            self.current = loaded
+            self._stamp = stamp
+            logging.info("Serving model version %s", loaded.version)
+            return loaded
+
+    def ensure_loaded(self):
+        """
+        Load the model in this process if it has not been loaded here yet.
+
+        Nothing is loaded while the model or metrics file is missing; the
+        watcher loads the model once it is trained. A failed load is logged
+        and not retried on every call, the watcher retries it when the
+        files change.
+        """
+        if self._loaded_pid == os.getpid():
+            return
+        with self._load_lock:
+            if self._loaded_pid == os.getpid():
+                return
+            if (os.path.isfile(self.model_path)
+                    and os.path.isfile(self.metrics_path)):
+                try:
+                    self.load()
+                except Exception as e:
+                    logging.error("An error occurred while loading the model "
+                                  "or metrics: %s", e)
+            # Only once the load is over, so concurrent first requests wait
+            # for it instead of finding no model
+            self._loaded_pid = os.getpid()
+
+    def reload_in_background(self) -> threading.Thread:
+        """Start a reload on a background thread and return the thread."""
+        thread = threading.Thread(target=self._safe_reload, daemon=True,
+                                  name='model-reload')
+        thread.start()
+        return thread
+
+    def ensure_watching(self):
+        """
+        Start the file watcher in this process if it is not running yet.
+
+        Threads do not survive fork, so every worker starts its own watcher
+        the first time it is called.
+        """
+        if self._watcher_pid == os.getpid():
+            return
+        with self._watcher_lock:
+            if self._watcher_pid != os.getpid():
+                threading.Thread(target=self._watch, daemon=True,
+                                 name='model-watcher').start()
+                self._watcher_pid = os.getpid()
+
+    def _build(self) -> LoadedModel:
+        model = load_model(self.model_path)
+        configure_booster(model, plan_cpus()['inference_nthread'])
+        engine = load_inference_engine(model, self.engine)
+        metrics = load_metrics(self.metrics_path)
+
+        # Warm the new engine before any request reaches it
+        make_predictions(engine, WARMUP_RECORDS, cache=None)
+
+        return LoadedModel(model=model, engine=engine, metrics=metrics,
+                           version=get_model_hash(model)[:12],
+                           training_date=get_metrics_creation_date(
+                               self.model_path))
+
+    def _safe_reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            logging.error("Model reload failed, keeping the current "
+                          "model: %s", e)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                stamp = self._files_stamp()
+            except FileNotFoundError:
+                continue
+            if stamp != self._stamp:
+                logging.info("Model files changed, reloading")
+                self._safe_reload()
+
+    def _files_stamp(self) -> tuple:
+        stamps = []
+        for path in (self.model_path, self.metrics_path):
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
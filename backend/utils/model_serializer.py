@@ -1,32 +1,65 @@
 """
 Utility functions for saving and loading machine learning models for
 the SkySatisfy project.
+
+Models are stored in XGBoost's native UBJSON or JSON format behind a one-line
+header holding the format version and a SHA-256 hash of the model bytes.
+Paths ending in '.pkl' keep using pickle for older artifacts.
 """
 
+import hashlib
+import json
+import os
 import pickle
 import xgboost as xgb
 
 from backend.config import MODEL_FILE_PATH
 
 
+# first bytes of every model file written in the native format
+MODEL_FILE_MAGIC = b'SKYSATISFY-MODEL '
+
+# version of the header layout written by save_model
+MODEL_FORMAT_VERSION = 1
+
+
 def save_model(model: xgb.Booster, path=MODEL_FILE_PATH):
     """
     Save the XGBoost model to disk.
 
+    The file is written next to its destination first and then renamed over
+    it, so readers never see a partially written model.
+
     Parameters:
     - model (xgb.Booster): Trained XGBoost model.
-    - path (str): File path to save the model.
+    - path (str): File path to save the model. '.ubj' and '.json' use the
+                  native format, '.pkl' uses pickle.
 
     Example:
     >>> model = xgb.Booster(model_file='model.json')
-    >>> save_model(model, 'saved_model.pkl')
+    >>> save_model(model, 'saved_model.ubj')
     """
     if not isinstance(model, xgb.Booster):
         raise TypeError("Expected model to be an instance of xgb.Booster")
 
     try:
-        with open(path, 'wb') as f:
-            pickle.dump(model, f)
+        if path.endswith('.pkl'):
+            content = pickle.dumps(model)
+        else:
+            raw_format = _raw_format(path)
+            payload = bytes(model.save_raw(raw_format=raw_format))
+            header = {
+                'format_version': MODEL_FORMAT_VERSION,
+                'format': raw_format,
+                'sha256': hashlib.sha256(payload).hexdigest(),
+            }
+            content = (MODEL_FILE_MAGIC + json.dumps(header).encode() +
+                       b'\n' + payload)
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
     except Exception as e:
         raise IOError(f"An error occurred while saving the model: {e}")
 
@@ -41,8 +74,75 @@ def load_model(path=MODEL_FILE_PATH) -> xgb.Booster:
     Returns:
     - xgb.Booster: Loaded XGBoost model.
 
+    Raises:
+    - ValueError: If a native model file has an unsupported format version
+                  or its content does not match the hash in its header.
+
+    Example:
+    >>> model = load_model('saved_model.ubj')
+    """
+    if path.endswith('.pkl'):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    with open(path, 'rb') as f:
+        header = _parse_header(f.readline(), path)
+        payload = f.read()
+
+    if hashlib.sha256(payload).hexdigest() != header['sha256']:
+        raise ValueError(f"Model file {path} is corrupted: hash mismatch")
+    return xgb.Booster(model_file=bytearray(payload))
+
+
+def read_model_header(path=MODEL_FILE_PATH) -> dict:
+    """
+    Read the header of a native model file without loading the model.
+
+    Parameters:
+    - path (str): File path of the model.
+
+    Returns:
+    - dict: Header with 'format_version', 'format' and 'sha256'.
+
     Example:
-    >>> model = load_model('saved_model.pkl')
+    >>> read_model_header('saved_model.ubj')['sha256']
     """
     with open(path, 'rb') as f:
-        return pickle.load(f)
+        return _parse_header(f.readline(), path)
+
+
+def get_model_hash(model: xgb.Booster) -> str:
+    """
+    Return a content hash of the model, stable across save/load cycles.
+
+    Parameters:
+    - model (xgb.Booster): XGBoost model.
+
+    Returns:
+    - str: Hex SHA-256 digest of the model in XGBoost's UBJSON format, the
+           same hash save_model writes into a '.ubj' file header.
+
+    Example:
+    >>> model_hash = get_model_hash(load_model())
+    """
+    return hashlib.sha256(model.save_raw(raw_format='ubj')).hexdigest()
+
+
+def _raw_format(path: str) -> str:
+    extension = os.path.splitext(path)[1]
+    if extension == '.ubj':
+        return 'ubj'
+    if extension == '.json':
+        return 'json'
+    raise ValueError(f"Unsupported model file extension: {extension}")
+
+
+def _parse_header(line: bytes, path: str) -> dict:
+    if not line.startswith(MODEL_FILE_MAGIC):
+        raise ValueError(f"{path} is not a SkySatisfy model file")
+    header = json.loads(line[len(MODEL_FILE_MAGIC):])
+    if header['format_version'] > MODEL_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported model format version {header['format_version']} "
+            f"in {path}")
+    return header
@@ -6,17 +6,24 @@ the SkySatisfy project.
 import pandas as pd
 import xgboost as xgb
 from backend.config import MODEL_PARAMS
+from backend.utils.cpu_planner import training_params
 
 
 def train_model(X: pd.DataFrame, y: pd.Series,
-                params=MODEL_PARAMS['XGB_PARAMS']) -> xgb.Booster:
+                params=MODEL_PARAMS['XGB_PARAMS'],
+                num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND'],
+                feature_types=None) -> xgb.Booster:
     """
     Train an XGBoost model.
 
     Parameters:
     - X (pd.DataFrame): Feature matrix.
     - y (pd.Series): Target vector.
-    - params (dict): Parameters for the XGBoost model.
+    - params (dict): Parameters for the XGBoost model; without 'nthread'
+                     training uses the planned number of threads.
+    - num_boost_round (int): Number of boosting rounds.
+    - feature_types (list): XGBoost type of every column, 'c' for the
+                            categorical ones; None for all numerical.
 
     Returns:
     - xgb.Booster: Trained XGBoost model.
@@ -27,7 +34,8 @@ def train_model(X: pd.DataFrame, y: pd.Series,
     >>> params = {'eta': 0.3, 'max_depth': 6}
     >>> model = train_model(X, y, params)
     """
-    dtrain = xgb.DMatrix(X, label=y, feature_names=X.columns.tolist())
-    model = xgb.train(params, dtrain,
-                      num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND'])
+    dtrain = xgb.DMatrix(X, label=y, feature_names=X.columns.tolist(),
+                         feature_types=feature_types)
+    model = xgb.train(training_params(params), dtrain,
+                      num_boost_round=num_boost_round)
     return model
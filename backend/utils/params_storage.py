@@ -0,0 +1,72 @@
+"""
+Utility functions for saving and loading tuned model parameters for the
+SkySatisfy project.
+
+The parameters found by backend/tune.py are written to a JSON file, which
+training reads instead of MODEL_PARAMS from backend/config.py when it
+exists.
+"""
+
+import json
+import logging
+import os
+
+from backend.config import MODEL_PARAMS, PARAMS_FILE_PATH
+
+
+def save_params(xgb_params: dict, num_boost_round: int,
+                path=PARAMS_FILE_PATH, **details):
+    """
+    Save tuned model parameters to a JSON file.
+
+    Parameters:
+    - xgb_params (dict): Parameters for the XGBoost model.
+    - num_boost_round (int): Number of boosting rounds.
+    - path (str): File path to save the parameters.
+    - details: Further JSON-serializable information to record, such as
+               the cross-validation score.
+
+    Example:
+    >>> save_params({'eta': 0.1, 'max_depth': 4}, 120, cv_auc=0.94)
+    """
+    content = {
+        'XGB_PARAMS': xgb_params,
+        'XGB_NUM_BOOST_ROUND': num_boost_round,
+        **details,
+    }
+    # Write next to the destination and rename, so training never reads a
+    # partially written file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(content, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+    logging.info("Saved tuned parameters to %s", path)
+
+
+def load_params(path=PARAMS_FILE_PATH) -> dict:
+    """
+    Load the model parameters training should use.
+
+    Parameters:
+    - path (str): File path of the tuned parameters.
+
+    Returns:
+    - dict: 'XGB_PARAMS' and 'XGB_NUM_BOOST_ROUND' from the file, or from
+            MODEL_PARAMS if the file does not exist.
+
+    Example:
+    >>> params = load_params()
+    >>> model = train_model(X, y, params['XGB_PARAMS'],
+    ...                     params['XGB_NUM_BOOST_ROUND'])
+    """
+    if not os.path.exists(path):
+        return MODEL_PARAMS
+    with open(path) as f:
+        content = json.load(f)
+    logging.info("Using tuned parameters from %s", path)
+    return {
+        'XGB_PARAMS': content['XGB_PARAMS'],
+        'XGB_NUM_BOOST_ROUND': content['XGB_NUM_BOOST_ROUND'],
+    }
@@ -1,93 +1,268 @@
+import threading
+import weakref
+from collections import OrderedDict
+
 import pandas as pd
 import xgboost as xgb
 import logging
-import logging.config
 
-from backend.config import LOGGING_CONFIG
+from backend.config import PREDICTION_CACHE_SIZE
+from backend.utils.data_loader import FEATURES, FEATURE_ENCODER
+from backend.utils.feature_encoder import FeatureEncoder, model_encoder
+from backend.utils.instrumentation import INSTRUMENTATION
+
 
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions keyed on the encoded feature vector.
 
-logging.config.dictConfig(LOGGING_CONFIG)
+    The cache remembers which model object its entries were computed with
+    and drops them all as soon as it is used with a different model.
 
+    Parameters:
+    - maxsize (int): Maximum number of cached predictions, 0 disables it.
 
-def make_prediction(model: xgb.Booster, data: dict) -> float:
+    Example:
+    >>> cache = PredictionCache(maxsize=1000)
+    >>> prediction = make_prediction(model, data, cache=cache)
+    """
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, key: bytes):
+        """Return the cached prediction for `key`, or None on a miss."""
+        with self._lock:
+            self._check_model(model)
+            prediction = self._entries.get(key)
+            if prediction is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return prediction
+
+    def put(self, model, key: bytes, prediction: float):
+        """Store a prediction, evicting the least recently used entry."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_model(model)
+            self._entries[key] = prediction
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached predictions and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._model = None
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _check_model(self, model):
+        # Predictions of a previous model must never be served
+        if model is not self._model:
+            self._entries.clear()
+            self._model = model
+
+
+# cache shared by all predictions made in this process
+PREDICTION_CACHE = PredictionCache()
+
+# encoders of the boosters served in this process, read once per booster
+_BOOSTER_ENCODERS = weakref.WeakKeyDictionary()
+
+
+def make_prediction(model: xgb.Booster, data: dict,
+                    cache: PredictionCache = PREDICTION_CACHE) -> float:
     """
     Make a prediction using an XGBoost model.
 
     Parameters:
-    - model (xgb.Booster): Trained XGBoost model.
+    - model (xgb.Booster): Trained XGBoost model, or an inference engine with
+                           a `predict(features)` method such as LookupTable.
     - data (dict): Data for prediction.
+    - cache (PredictionCache): Prediction cache, None to bypass it.
 
     Returns:
     - float: Prediction result.
     """
     try:
-        # Convert the input data to a DataFrame
-        df = pd.DataFrame([data])
+        # Encode the record straight into the model's feature matrix
+        encoder = _encoder_for(model)
+        with INSTRUMENTATION.timer('encode'):
+            features = encoder.encode_records([data])
 
-        # Prepare the data for prediction
-        df = _prepare_data(df)
-
-        # Convert the DataFrame to DMatrix, which is required by XGBoost
-        dmatrix = xgb.DMatrix(df)
+        # Repeated profiles are answered from the cache
+        key = features[0].tobytes()
+        if cache is not None:
+            prediction = cache.get(model, key)
+            if prediction is not None:
+                return prediction
 
         # Make the prediction
-        prediction = model.predict(dmatrix)[0]
-        logging.info(f"Prediction made: {prediction}")
+        prediction = float(_predict_features(model, features, encoder)[0])
+        logging.info("Prediction made: %s", prediction,
+                     extra={'event': 'prediction'})
+
+        if cache is not None:
+            cache.put(model, key, prediction)
 
         # Return the prediction as a float
-        return float(prediction)
+        return prediction
     except Exception as e:
-        logging.error(f"Error in make_prediction: {e}")
+        logging.error("Error in make_prediction: %s", e)
         raise e  # Re-raise the exception to handle it
 
 
+def make_predictions(model: xgb.Booster, data: list,
+                     cache: PredictionCache = PREDICTION_CACHE) -> list:
+    """
+    Make predictions for a batch of records with a single model call.
+
+    Parameters:
+    - model (xgb.Booster): Trained XGBoost model or inference engine.
+    - data (list): List of validated records (dicts) for prediction.
+    - cache (PredictionCache): Prediction cache, None to bypass it.
+
+    Returns:
+    - list: Prediction results as floats, in the same order as the input.
+    """
+    if not data:
+        return []
+
+    try:
+        # Encode the whole batch into one feature matrix
+        encoder = _encoder_for(model)
+        with INSTRUMENTATION.timer('encode'):
+            features = encoder.encode_records(data)
+
+        # Only the records missing from the cache go to the model
+        keys = [row.tobytes() for row in features]
+        if cache is not None:
+            predictions = [cache.get(model, key) for key in keys]
+        else:
+            predictions = [None] * len(keys)
+        missing = [i for i, p in enumerate(predictions) if p is None]
+
+        if missing:
+            # A single predict call for all misses
+            scores = _predict_features(model, features[missing], encoder)
+            for i, prediction in zip(missing, scores):
+                predictions[i] = float(prediction)
+                if cache is not None:
+                    cache.put(model, keys[i], predictions[i])
+        logging.info("Batch prediction made for %d records", len(data),
+                     extra={'event': 'batch_prediction'})
+
+        return predictions
+    except Exception as e:
+        logging.error("Error in make_predictions: %s", e)
+        raise e  # Re-raise the exception to handle it
+
+
+def format_prediction(prediction: float) -> dict:
+    """
+    Build the result payload for a single prediction score.
+
+    Parameters:
+    - prediction (float): Predicted probability of satisfaction.
+
+    Returns:
+    - dict: Rounded 'prediction' and its 'verdict'.
+
+    Example:
+    >>> format_prediction(0.9912)
+    {'prediction': 0.991, 'verdict': 'satisfied'}
+    """
+    verdict = "satisfied" if prediction > 0.5 else "Not satisfied"
+    return {
+        'prediction': round(prediction, 3),
+        'verdict': verdict
+    }
+
+
+def _encoder_for(model) -> FeatureEncoder:
+    """
+    Return the encoder of a booster or inference engine: the encoding saved
+    with the model, or FEATURE_ENCODER for models saved without one.
+    """
+    if isinstance(model, xgb.Booster):
+        encoder = _BOOSTER_ENCODERS.get(model)
+        if encoder is None:
+            encoder = model_encoder(model, FEATURE_ENCODER)
+            _BOOSTER_ENCODERS[model] = encoder
+        return encoder
+    return getattr(model, 'encoder', None) or FEATURE_ENCODER
+
+
+def _predict_features(model, features, encoder=FEATURE_ENCODER):
+    """Score an encoded feature matrix with a booster or inference engine."""
+    if isinstance(model, xgb.Booster):
+        # Convert the matrix to DMatrix, which is required by XGBoost
+        with INSTRUMENTATION.timer('dmatrix'):
+            dmatrix = xgb.DMatrix(features,
+                                  feature_names=encoder.feature_names,
+                                  feature_types=encoder.feature_types)
+        with INSTRUMENTATION.timer('predict'):
+            return model.predict(dmatrix)
+    with INSTRUMENTATION.timer('predict'):
+        return model.predict(features)
+
+
 def _prepare_data(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Prepare data for prediction by encoding categorical variables and ensuring
-    all expected columns are present.
+    Prepare a data frame for prediction by encoding categorical variables and
+    ensuring all expected columns are present.
+
+    The prediction functions encode records directly with the shared feature
+    encoder; this helper keeps the same encoding available for DataFrames.
+
+    Missing numerical features are filled with 0. Categorical features have
+    no neutral value, so a missing one raises a KeyError.
 
     Parameters:
     - df (pd.DataFrame): The input data frame with raw data.
 
     Returns:
     - pd.DataFrame: The processed data frame ready for prediction.
+
+    Raises:
+    - KeyError: If a categorical feature is missing.
     """
 
     try:
         # If the data has the column named 'class_', rename it to 'class'
-        if 'class_' in df.columns:
-            df.rename(columns={'class_': 'class'}, inplace=True)
-
-        # Encode 'customer_type' and 'type_of_travel' as integers
-        df['customer_type'] = df['customer_type'].map({
-            'loyal_customer': 1,
-            'disloyal_customer': 0
-        })
-        df['type_of_travel'] = df['type_of_travel'].map({
-            'business_travel': 1,
-            'personal_travel': 0
-        })
-
-        # Create dummy variables for the 'class' column
-        class_dummies = pd.get_dummies(df['class'], prefix='class')
-
-        # Drop the original 'class' column
-        df = df.drop('class', axis=1)
-
-        # Concatenate the dummy columns
-        df = pd.concat([df, class_dummies], axis=1)
-
-        # Ensure the DF has all the expected columns, in the correct order
-        expected_columns = ['customer_type', 'age', 'type_of_travel',
-                            'flight_distance', 'ease_of_online_booking',
-                            'online_boarding', 'class_business', 'class_eco',
-                            'class_eco_plus']
-        df = df.reindex(columns=expected_columns, fill_value=0)
-
-        # Convert all columns to integer type
-        df = df.astype(int)
-
-        return df
+        df = df.rename(columns={'class_': 'class'})
+
+        # Fill missing numerical features and encode all in training order
+        categorical = {**FEATURE_ENCODER.categorical_encodings,
+                       **FEATURE_ENCODER.one_hot_categories}
+        df = df.assign(**{name: 0 for name in FEATURES
+                          if name not in df and name not in categorical})
+        features = FEATURE_ENCODER.encode_columns(df)
+
+        return pd.DataFrame(features, columns=FEATURE_ENCODER.feature_names,
+                            index=df.index).astype(int)
     except Exception as e:
-        logging.error(f"Error in _prepare_data: {e}")
+        logging.error("Error in _prepare_data: %s", e)
         raise e  # Re-raise the exception to handle it further
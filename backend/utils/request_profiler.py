@@ -0,0 +1,140 @@
+"""
+On-demand profiling of live requests for the SkySatisfy project.
+
+Selected requests run under cProfile and their statistics are aggregated per
+endpoint, so a profile of a live worker can be downloaded without restarting
+it. Only one request per worker is profiled at a time: the profiler hooks
+into the interpreter, and keeping it to a single request bounds the overhead.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+
+from backend.config import PROFILING
+
+
+class RequestProfiler:
+    """
+    Profile selected requests and aggregate their statistics per endpoint.
+
+    Parameters:
+    - enabled (bool): Whether any request is profiled at all.
+    - sample_rate (float): Fraction of requests profiled at random.
+
+    Example:
+    >>> profiler = RequestProfiler(enabled=True, sample_rate=0.01)
+    >>> profile = profiler.start(forced=False)
+    >>> ...  # serve the request
+    >>> profiler.stop(profile, 'predict')
+    >>> print(profiler.render('predict'))
+    """
+
+    def __init__(self, enabled=PROFILING['ENABLED'],
+                 sample_rate=PROFILING['SAMPLE_RATE']):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self._stats = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+
+    def start(self, forced=False):
+        """
+        Start profiling the current request if it is selected.
+
+        Parameters:
+        - forced (bool): Profile the request regardless of sampling, e.g.
+                         when it carries an authorized debug header.
+
+        Returns:
+        - cProfile.Profile: The running profile, or None if the request is
+                            not profiled.
+        """
+        if not self.enabled:
+            return None
+        if not forced and random.random() >= self.sample_rate:
+            return None
+        # Skip rather than wait when another request is being profiled
+        if not self._active.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception:
+            self._active.release()
+            raise
+        return profile
+
+    def stop(self, profile: cProfile.Profile, endpoint: str):
+        """
+        Stop a profile started by `start` and add it to its endpoint.
+
+        Parameters:
+        - profile (cProfile.Profile): Profile returned by `start`.
+        - endpoint (str): Endpoint the request was served by.
+        """
+        try:
+            profile.disable()
+        finally:
+            self._active.release()
+
+        with self._lock:
+            if endpoint in self._stats:
+                self._stats[endpoint].add(profile)
+            else:
+                self._stats[endpoint] = pstats.Stats(profile)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self) -> dict:
+        """Return the number of profiled requests per endpoint."""
+        with self._lock:
+            return dict(self._counts)
+
+    def render(self, endpoint: str, limit=50) -> str:
+        """
+        Render the aggregated profile of an endpoint as text.
+
+        Parameters:
+        - endpoint (str): Endpoint to render.
+        - limit (int): Number of functions listed, by cumulative time.
+
+        Returns:
+        - str: pstats report, or None if the endpoint has no profile.
+        """
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                return None
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self, endpoint: str) -> bytes:
+        """
+        Return the aggregated profile of an endpoint in the binary format
+        written by `pstats.Stats.dump_stats`, readable by `pstats.Stats`
+        and tools such as snakeviz.
+
+        Parameters:
+        - endpoint (str): Endpoint to dump.
+
+        Returns:
+        - bytes: Profile data, or None if the endpoint has no profile.
+        """
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                return None
+            return marshal.dumps(stats.stats)
+
+    def reset(self):
+        """Drop all aggregated profiles."""
+        with self._lock:
+            self._stats.clear()
+            self._counts.clear()
@@ -0,0 +1,136 @@
+"""
+Utility functions for generating synthetic passenger data for the SkySatisfy
+project.
+
+Values are drawn from the domains declared by PredictionSchema: the choices
+of OneOf validators and the bounds of Range validators. Benchmarks and tests
+use this data in place of the real dataset.
+"""
+
+import numpy as np
+import pandas as pd
+from marshmallow import validate
+
+from backend.schemas.prediction_schema import PredictionSchema
+from backend.utils.data_loader import TARGET_COLUMN, TARGET_ENCODING
+
+
+# bounds of integer fields the schema leaves unbounded, inclusive
+DEFAULT_INT_RANGES = {
+    'flight_distance': (31, 4983),
+}
+
+# bounds of any other unbounded integer field, inclusive
+FALLBACK_INT_RANGE = (0, 1000)
+
+
+def schema_domains(schema=None) -> dict:
+    """
+    Return the domain of every field of a schema, keyed by data key.
+
+    Parameters:
+    - schema (Schema): Schema instance, PredictionSchema by default.
+
+    Returns:
+    - dict: A list of choices for fields with a OneOf validator, otherwise
+            inclusive (min, max) bounds of an integer field.
+
+    Example:
+    >>> schema_domains()['ease_of_online_booking']
+    (0, 5)
+    """
+    schema = schema or PredictionSchema()
+    domains = {}
+    for attr_name, field in schema.load_fields.items():
+        data_key = field.data_key or attr_name
+        domain = None
+        for validator in field.validators:
+            if isinstance(validator, validate.OneOf):
+                domain = list(validator.choices)
+            elif isinstance(validator, validate.Range):
+                domain = (validator.min, validator.max)
+        if domain is None:
+            domain = DEFAULT_INT_RANGES.get(data_key, FALLBACK_INT_RANGE)
+        domains[data_key] = domain
+    return domains
+
+
+def generate_columns(n_rows: int, seed=0) -> dict:
+    """
+    Generate raw feature columns drawn uniformly from the schema domains.
+
+    Parameters:
+    - n_rows (int): Number of rows.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    - dict: NumPy arrays keyed by feature name, e.g. for
+            FEATURE_ENCODER.encode_columns.
+
+    Example:
+    >>> features = FEATURE_ENCODER.encode_columns(generate_columns(1000))
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, domain in schema_domains().items():
+        if isinstance(domain, list):
+            columns[name] = rng.choice(domain, n_rows)
+        else:
+            columns[name] = rng.integers(domain[0], domain[1] + 1, n_rows)
+    return columns
+
+
+def generate_records(n_rows: int, seed=0) -> list:
+    """
+    Generate prediction requests, as sent to the /predict endpoint.
+
+    Parameters:
+    - n_rows (int): Number of records.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    - list: Records (dicts) keyed by the schema's data keys.
+
+    Example:
+    >>> data = PredictionSchema(many=True).load(generate_records(100))
+    """
+    columns = {name: values.tolist()
+               for name, values in generate_columns(n_rows, seed).items()}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def generate_dataset(n_rows: int, seed=0) -> pd.DataFrame:
+    """
+    Generate a labelled dataset in the layout of the raw CSV data.
+
+    Column names and categories are capitalized with spaces, as in the
+    original file, so the data goes through preprocess_data unchanged. The
+    satisfaction label depends on online boarding, type of travel and class,
+    with noise, so models trained on it learn a non-trivial function.
+
+    Parameters:
+    - n_rows (int): Number of rows.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    - pd.DataFrame: Raw dataset including the satisfaction column.
+
+    Example:
+    >>> X, y = preprocess_data(generate_dataset(10000))
+    """
+    rng = np.random.default_rng(seed)
+    columns = generate_columns(n_rows, seed)
+
+    score = (0.8 * (columns['online_boarding'] - 2.5)
+             + 1.5 * (columns['type_of_travel'] == 'business_travel')
+             + 1.0 * (columns['class'] == 'business')
+             - 1.5 + rng.normal(0, 1, n_rows))
+    labels = {code: label for label, code in TARGET_ENCODING.items()}
+    satisfaction = np.where(score > 0, labels[1], labels[0])
+
+    df = pd.DataFrame({TARGET_COLUMN: satisfaction})
+    for name, values in columns.items():
+        if values.dtype.kind in 'US':
+            values = np.char.title(np.char.replace(values, '_', ' '))
+        df[name.replace('_', ' ').title()] = values
+    return df
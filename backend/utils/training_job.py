@@ -0,0 +1,115 @@
+"""
+Background training job for the SkySatisfy project.
+
+Training runs in a separate Python process, so the service never imports the
+training stack and keeps serving (or reporting not-ready) while it runs. A
+lock file holding the job's pid makes sure gunicorn workers started together
+launch only one job.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+from backend.config import TRAINING_LOCK_FILE_PATH
+
+
+TRAINING_COMMAND = [sys.executable, '-m', 'backend.train_and_save_model']
+
+
+def start_training_job(lock_path=TRAINING_LOCK_FILE_PATH,
+                       command=TRAINING_COMMAND):
+    """
+    Start training in a background process unless a job is already running.
+
+    Parameters:
+    - lock_path (str): Path of the lock file holding the running job's pid.
+    - command (list): Command that trains and saves the model.
+
+    Returns:
+    - subprocess.Popen: The started process, or None if another job holds
+                        the lock.
+
+    Example:
+    >>> process = start_training_job()
+    """
+    if not _acquire_lock(lock_path):
+        logging.info("Training job already running")
+        return None
+
+    try:
+        process = subprocess.Popen(command)
+    except Exception:
+        _release_lock(lock_path)
+        raise
+
+    _write_pid(lock_path, process.pid)
+    logging.info("Started training job with pid %d", process.pid)
+
+    # Release the lock once training has finished, whatever its outcome
+    threading.Thread(target=_wait_and_release, args=(process, lock_path),
+                     daemon=True, name='training-job').start()
+    return process
+
+
+def is_training_running(lock_path=TRAINING_LOCK_FILE_PATH) -> bool:
+    """Return whether a live process holds the training lock."""
+    pid = _read_pid(lock_path)
+    return pid is not None and _pid_alive(pid)
+
+
+def _acquire_lock(lock_path: str) -> bool:
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        pid = _read_pid(lock_path)
+        if pid is None or _pid_alive(pid):
+            # Held by a live job, or just created and not written yet
+            return False
+        logging.warning("Removing stale training lock of pid %d", pid)
+        _release_lock(lock_path)
+        return _acquire_lock(lock_path)
+    os.close(fd)
+    return True
+
+
+def _wait_and_release(process: subprocess.Popen, lock_path: str):
+    returncode = process.wait()
+    if returncode == 0:
+        logging.info("Training job finished")
+    else:
+        logging.error("Training job failed with exit code %d", returncode)
+    _release_lock(lock_path)
+
+
+def _write_pid(lock_path: str, pid: int):
+    with open(lock_path, 'w') as f:
+        f.write(str(pid))
+
+
+def _read_pid(lock_path: str):
+    try:
+        with open(lock_path) as f:
+            return int(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _release_lock(lock_path: str):
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,120 @@
+"""
+Utility functions for running the training pipeline for the SkySatisfy
+project.
+
+Training runs in stages, each memoized in the artifact store under a key
+derived from its inputs:
+- preprocess: the hash of the dataset file and the preprocessing version;
+- cross_validate: the preprocess key and the model parameters;
+- train: the preprocess key and the model parameters.
+A rerun with unchanged inputs only hashes the dataset file and reads the
+stored artifacts, and a run with changed parameters reuses the stored
+preprocessed dataset. Trained models carry the encoding of their features.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+
+from backend.config import DATASET_FILE_PATH, MODEL_PARAMS
+from backend.utils.artifact_store import ArtifactStore
+from backend.utils.data_loader import (dataset_cache_key, load_stored_dataset,
+                                       FEATURE_ENCODER)
+from backend.utils.model_evaluator import cross_validate, N_SPLITS
+from backend.utils.model_serializer import save_model, load_model
+from backend.utils.model_trainer import train_model
+
+
+def run_pipeline(data_path=DATASET_FILE_PATH,
+                 xgb_params=MODEL_PARAMS['XGB_PARAMS'],
+                 num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND'],
+                 store=None) -> dict:
+    """
+    Cross-validate and train a model, reusing stored stage artifacts.
+
+    Parameters:
+    - data_path (str): Path to the CSV file.
+    - xgb_params (dict): Parameters for the XGBoost model.
+    - num_boost_round (int): Number of boosting rounds.
+    - store (ArtifactStore): Artifact store, the configured one by default.
+
+    Returns:
+    - dict: 'model', trained on all data; 'metrics', with one value per
+            fold for 'auc', 'precision', 'recall' and 'f1'; 'keys', the
+            artifact key of every stage; and 'reused', the stages whose
+            artifact was read from the store.
+
+    Example:
+    >>> result = run_pipeline()
+    >>> save_model(result['model'])
+    """
+    store = store or ArtifactStore()
+    dataset_key = dataset_cache_key(data_path)
+    # Thread counts do not change the model, so they do not change the keys
+    params = [{name: value for name, value in xgb_params.items()
+               if name != 'nthread'}, num_boost_round]
+    keys = {
+        'preprocess': dataset_key,
+        'cross_validate': store.key('cross_validate', dataset_key, *params,
+                                    N_SPLITS),
+        'train': store.key('train', dataset_key, *params),
+    }
+
+    metrics = _read_metrics(store.get(keys['cross_validate']))
+    model = _read_model(store.get(keys['train']))
+    reused = [stage for stage, artifact in (('cross_validate', metrics),
+                                            ('train', model))
+              if artifact is not None]
+    if len(reused) < 2:
+        if store.get(dataset_key) is not None:
+            reused.insert(0, 'preprocess')
+        X, y = load_stored_dataset(store, dataset_key, data_path)
+    logging.info("Reusing stored stages: %s", ', '.join(reused) or 'none')
+
+    if metrics is None:
+        # The folds and the final model train as parallel jobs
+        result = cross_validate(X, y, xgb_params, train_full=model is None,
+                                num_boost_round=num_boost_round,
+                                feature_types=FEATURE_ENCODER.feature_types)
+        metrics = result['metrics']
+        store.put(keys['cross_validate'],
+                  lambda folder: _write_cross_validation(folder, result))
+        if model is None:
+            model = _store_model(store, keys['train'], result['model'])
+    elif model is None:
+        model = _store_model(store, keys['train'],
+                             train_model(X, y, xgb_params, num_boost_round,
+                                         FEATURE_ENCODER.feature_types))
+
+    return {'model': model, 'metrics': metrics, 'keys': keys,
+            'reused': reused}
+
+
+def _store_model(store: ArtifactStore, key: str, model):
+    FEATURE_ENCODER.attach(model)
+    store.put(key, lambda folder: save_model(
+        model, os.path.join(folder, 'model.ubj')))
+    return model
+
+
+def _read_metrics(entry_path):
+    if entry_path is None:
+        return None
+    with open(os.path.join(entry_path, 'metrics.json')) as f:
+        return json.load(f)
+
+
+def _read_model(entry_path):
+    if entry_path is None:
+        return None
+    return load_model(os.path.join(entry_path, 'model.ubj'))
+
+
+def _write_cross_validation(folder: str, result: dict):
+    with open(os.path.join(folder, 'metrics.json'), 'w') as f:
+        json.dump(result['metrics'], f)
+    np.save(os.path.join(folder, 'oof_predictions.npy'),
+            result['oof_predictions'])
+    np.save(os.path.join(folder, 'folds.npy'), result['folds'])
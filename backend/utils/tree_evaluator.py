@@ -0,0 +1,254 @@
+"""
+Array-backed tree evaluator for the SkySatisfy project.
+
+The booster's trees are flattened into struct-of-arrays form and all trees
+are evaluated for a whole batch with vectorized NumPy node traversal. This
+avoids DMatrix construction and XGBoost's OpenMP thread pool, which dominate
+latency for single-row and small-batch scoring.
+
+Categorical splits send the categories in their set right and every other
+code left. Each distinct (feature, categories) pair gets an extra column,
+1 where the feature's code is in the set and 0 elsewhere, computed once per
+batch, so that the split becomes a numerical split at 0.5 on that column
+and traversal stays the same for both kinds of split.
+"""
+
+import json
+
+import numpy as np
+import xgboost as xgb
+
+from backend.utils.feature_encoder import model_encoder
+
+
+# objectives whose output is the sigmoid of the margin
+_LOGISTIC_OBJECTIVES = {'binary:logistic', 'reg:logistic'}
+
+# objectives whose output is the margin itself
+_IDENTITY_OBJECTIVES = {'reg:squarederror', 'binary:logitraw'}
+
+# category codes a categorical split may test
+_MAX_CATEGORIES = 64
+
+# extra entries of a category column's value table: larger codes, which are
+# not in the set, missing values, which stay missing, and negative codes
+# (index -1), which are not in the set
+_TOO_LARGE, _MISSING = _MAX_CATEGORIES, _MAX_CATEGORIES + 1
+
+
+class TreeEnsemble:
+    """
+    Flat struct-of-arrays representation of a tree ensemble.
+
+    Nodes of all trees are concatenated; child indices point into the flat
+    arrays. Leaves point to themselves, so traversal can run a fixed number
+    of steps without checking which rows have already reached a leaf.
+
+    Parameters:
+    - roots (np.ndarray): Index of each tree's root node.
+    - feature (np.ndarray): Split feature index per node.
+    - threshold (np.ndarray): Split threshold per node, x < threshold goes
+                              to the left child.
+    - left (np.ndarray): Left child per node.
+    - right (np.ndarray): Right child per node.
+    - default_left (np.ndarray): Whether missing values go left, per node.
+    - leaf_value (np.ndarray): Leaf value per node, 0 for split nodes.
+    - max_depth (int): Depth of the deepest tree.
+    - base_margin (float): Margin added to the sum of the leaf values.
+    - objective (str): Objective of the model, decides the output transform.
+    - category_feature (np.ndarray): Feature of every category column, None
+                                     if no split is categorical.
+    - category_value (np.ndarray): Value of every category column for each
+                                   code, see _TOO_LARGE and _MISSING.
+    - encoder (FeatureEncoder): Encoder the model was trained with, None
+                                if it was saved without one.
+    """
+
+    def __init__(self, roots, feature, threshold, left, right, default_left,
+                 leaf_value, max_depth: int, base_margin: float,
+                 objective: str, category_feature=None, category_value=None,
+                 encoder=None):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.max_depth = max_depth
+        self.base_margin = np.float32(base_margin)
+        self.objective = objective
+        self.category_feature = category_feature
+        self.category_value = category_value
+        self.encoder = encoder
+
+    @classmethod
+    def from_booster(cls, model: xgb.Booster) -> 'TreeEnsemble':
+        """
+        Flatten the trees of a trained booster.
+
+        Parameters:
+        - model (xgb.Booster): Trained XGBoost model.
+
+        Returns:
+        - TreeEnsemble: Flattened ensemble.
+
+        Raises:
+        - ValueError: If the model uses an unsupported objective or a
+                      categorical split on codes beyond 63.
+
+        Example:
+        >>> ensemble = TreeEnsemble.from_booster(load_model())
+        """
+        learner = json.loads(model.save_raw('json'))['learner']
+        objective = learner['objective']['name']
+        if objective not in _LOGISTIC_OBJECTIVES | _IDENTITY_OBJECTIVES:
+            raise ValueError(f"Unsupported objective: {objective}")
+
+        trees = learner['gradient_booster']['model']['trees']
+        roots, features, thresholds, lefts, rights = [], [], [], [], []
+        default_lefts, leaf_values = [], []
+        max_depth = 0
+        offset = 0
+        # column of every distinct (feature, categories) split
+        category_columns = {}
+        for tree in trees:
+            _replace_categorical_splits(tree, model.num_features(),
+                                        category_columns)
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            condition = np.asarray(tree['split_conditions'],
+                                   dtype=np.float32)
+            is_leaf = left == -1
+            node = np.arange(len(left))
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree['split_indices']))
+            thresholds.append(np.where(is_leaf, 0, condition))
+            lefts.append(np.where(is_leaf, node, left) + offset)
+            rights.append(np.where(is_leaf, node, right) + offset)
+            default_lefts.append(np.asarray(tree['default_left'], dtype=bool))
+            # XGBoost stores the leaf value in the split condition slot
+            leaf_values.append(np.where(is_leaf, condition, 0))
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += len(left)
+
+        base_score = np.float32(learner['learner_model_param']['base_score'])
+        if objective in _LOGISTIC_OBJECTIVES:
+            # Same float32 steps as XGBoost's ProbToMargin
+            odds = np.float32(1) / base_score - np.float32(1)
+            base_margin = -np.log(np.float64(odds))
+        else:
+            base_margin = base_score
+
+        return cls(roots=np.asarray(roots, dtype=np.int64),
+                   feature=np.concatenate(features).astype(np.int64),
+                   threshold=np.concatenate(thresholds).astype(np.float32),
+                   left=np.concatenate(lefts),
+                   right=np.concatenate(rights),
+                   default_left=np.concatenate(default_lefts),
+                   leaf_value=np.concatenate(leaf_values).astype(np.float32),
+                   max_depth=max_depth,
+                   base_margin=base_margin,
+                   objective=objective,
+                   **_category_values(category_columns),
+                   encoder=model_encoder(model))
+
+    def predict_margin(self, features: np.ndarray) -> np.ndarray:
+        """
+        Compute the raw margin for each row of an encoded feature matrix.
+
+        Parameters:
+        - features (np.ndarray): Encoded feature matrix.
+
+        Returns:
+        - np.ndarray: Margin per row.
+        """
+        features = np.asarray(features, dtype=np.float32)
+        if self.category_feature is not None:
+            codes = np.clip(features[:, self.category_feature], -1,
+                            _TOO_LARGE)
+            codes[np.isnan(codes)] = _MISSING
+            columns = np.arange(len(self.category_feature))
+            features = np.hstack([
+                features, self.category_value[columns,
+                                              codes.astype(np.int64)]])
+        rows = np.arange(len(features))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(features), len(self.roots)))
+
+        for _ in range(self.max_depth):
+            values = features[rows, self.feature[nodes]]
+            go_left = values < self.threshold[nodes]
+            go_left |= np.isnan(values) & self.default_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        # Accumulate tree by tree in float32, the way XGBoost does
+        leaves = self.leaf_value[nodes]
+        margin = np.full(len(features), self.base_margin, dtype=np.float32)
+        for tree in range(leaves.shape[1]):
+            margin += leaves[:, tree]
+        return margin
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Compute the model output for each row of an encoded feature matrix.
+
+        Parameters:
+        - features (np.ndarray): Encoded feature matrix.
+
+        Returns:
+        - np.ndarray: Model output per row, matching Booster.predict.
+        """
+        margin = self.predict_margin(features)
+        if self.objective in _LOGISTIC_OBJECTIVES:
+            # float32 sigmoid with a correctly rounded exp, as in XGBoost
+            one = np.float32(1)
+            exp = np.exp(-margin.astype(np.float64)).astype(np.float32)
+            return one / (one + exp)
+        return margin
+
+
+def _replace_categorical_splits(tree: dict, n_features: int,
+                                category_columns: dict):
+    """Turn the categorical splits of a tree into numerical splits at 0.5
+    on category columns, numbered from n_features."""
+    segments = zip(tree['categories_nodes'], tree['categories_segments'],
+                   tree['categories_sizes'])
+    categories = {node: tuple(tree['categories'][start:start + size])
+                  for node, start, size in segments}
+    for node, split_type in enumerate(tree['split_type']):
+        if split_type != 1:
+            continue
+        key = (tree['split_indices'][node], categories.get(node, ()))
+        if key[1] and max(key[1]) >= _MAX_CATEGORIES:
+            raise ValueError(f"Categorical splits on codes beyond "
+                             f"{_MAX_CATEGORIES - 1} are not supported")
+        column = category_columns.setdefault(key, len(category_columns))
+        tree['split_indices'][node] = n_features + column
+        tree['split_conditions'][node] = 0.5
+
+
+def _category_values(category_columns: dict) -> dict:
+    """Build the value table of the category columns: 1 for the codes in
+    the split's set, 0 for other codes and NaN for missing values."""
+    if not category_columns:
+        return {}
+    values = np.zeros((len(category_columns), _MAX_CATEGORIES + 3),
+                      dtype=np.float32)
+    values[:, _MISSING] = np.nan
+    features = np.empty(len(category_columns), dtype=np.int64)
+    for (feature, categories), column in category_columns.items():
+        features[column] = feature
+        values[column, list(categories)] = 1
+    return {'category_feature': features, 'category_value': values}
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Return the number of edges on the longest root-to-leaf path."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    # Children always have larger ids than their parents
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max())
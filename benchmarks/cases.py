@@ -0,0 +1,129 @@
+"""
+Benchmark cases for the inference and training hot paths of the SkySatisfy
+project.
+
+Every case is a name and a setup function. The setup prepares its input
+outside the timed region and returns the zero-argument callable that is
+timed. Inputs are synthetic, generated from the schema domains, so the
+suite runs without the real dataset.
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+
+from backend.config import MODEL_PARAMS
+from backend.schemas.fast_validator import PREDICTION_VALIDATOR
+from backend.schemas.prediction_schema import PredictionSchema
+from backend.utils.data_loader import preprocess_data, load_dataset
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.model_evaluator import evaluate_model
+from backend.utils.model_serializer import load_model
+from backend.utils.model_trainer import train_model
+from backend.utils.predictor import (make_prediction, make_predictions,
+                                     _prepare_data)
+from backend.utils.synthetic_data import generate_records, generate_dataset
+
+
+# engines benchmarked for inference, see load_inference_engine
+ENGINES = ['native', 'array']
+
+# records per call for the batch inference and validation cases
+BATCH_SIZES = [1, 100, 10000]
+
+# rows of the synthetic dataset for the training cases
+DATASET_SIZES = [1000, 10000]
+
+
+def _validated(n_rows: int) -> list:
+    return PredictionSchema(many=True).load(generate_records(n_rows))
+
+
+def _engine(name: str):
+    return load_inference_engine(load_model(), name)
+
+
+def _make_prediction(engine: str):
+    model = _engine(engine)
+    data = _validated(1)[0]
+    return lambda: make_prediction(model, data, cache=None)
+
+
+def _make_predictions(engine: str, n_rows: int):
+    model = _engine(engine)
+    data = _validated(n_rows)
+    return lambda: make_predictions(model, data, cache=None)
+
+
+def _prepare(n_rows: int):
+    df = pd.DataFrame(generate_records(n_rows))
+    return lambda: _prepare_data(df)
+
+
+def _schema_load(n_rows: int):
+    records = generate_records(n_rows)
+    return lambda: PredictionSchema(many=True).load(records)
+
+
+def _validator_load(n_rows: int):
+    records = generate_records(n_rows)
+    return lambda: PREDICTION_VALIDATOR.load(records, many=True)
+
+
+def _preprocess(n_rows: int):
+    df = generate_dataset(n_rows)
+    return lambda: preprocess_data(df)
+
+
+def _load_dataset(n_rows: int, cached: bool):
+    # The folder lives as long as the returned callable references it
+    folder = tempfile.TemporaryDirectory()
+    path = os.path.join(folder.name, 'data.csv')
+    generate_dataset(n_rows).to_csv(path, index=False)
+    cache = os.path.join(folder.name, 'cache') if cached else None
+    if cached:
+        load_dataset(path, cache)
+    return lambda folder=folder: load_dataset(path, cache)
+
+
+def _evaluate(n_rows: int):
+    X, y = preprocess_data(generate_dataset(n_rows))
+    return lambda: evaluate_model(X, y)
+
+
+def _train(n_rows: int):
+    X, y = preprocess_data(generate_dataset(n_rows))
+    return lambda: train_model(X, y, MODEL_PARAMS['XGB_PARAMS'])
+
+
+def build_cases() -> list:
+    """
+    Return all benchmark cases.
+
+    Returns:
+    - list: (name, setup) tuples, where setup() returns the callable to
+            time.
+    """
+    cases = []
+    for engine in ENGINES:
+        cases.append((f'make_prediction[{engine}]',
+                      lambda e=engine: _make_prediction(e)))
+        for n in BATCH_SIZES:
+            cases.append((f'make_predictions[{engine},n={n}]',
+                          lambda e=engine, n=n: _make_predictions(e, n)))
+    for n in BATCH_SIZES:
+        cases.append((f'_prepare_data[n={n}]', lambda n=n: _prepare(n)))
+        cases.append((f'PredictionSchema.load[n={n}]',
+                      lambda n=n: _schema_load(n)))
+        cases.append((f'PREDICTION_VALIDATOR.load[n={n}]',
+                      lambda n=n: _validator_load(n)))
+    for n in DATASET_SIZES:
+        cases.append((f'preprocess_data[n={n}]', lambda n=n: _preprocess(n)))
+        cases.append((f'load_dataset[n={n}]',
+                      lambda n=n: _load_dataset(n, False)))
+        cases.append((f'load_dataset[n={n},cached]',
+                      lambda n=n: _load_dataset(n, True)))
+        cases.append((f'evaluate_model[n={n}]', lambda n=n: _evaluate(n)))
+        cases.append((f'train_model[n={n}]', lambda n=n: _train(n)))
+    return cases
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark validating the CPU plan of the SkySatisfy prediction service.
+
+Runs as many concurrent processes as the plan has gunicorn workers, each
+scoring the same batch in a loop with its own booster, once for every
+candidate number of inference threads: one, the planned count and all CPUs.
+The plan is accepted when its p99 latency is within the threshold of the
+best candidate's.
+
+Examples:
+    python -m benchmarks.cpu_plan
+    python -m benchmarks.cpu_plan --workers 4 --batch-size 1 --batch-size 500
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from backend.config import MODEL_FILE_PATH
+from backend.schemas.prediction_schema import PredictionSchema
+from backend.utils.cpu_planner import configure_booster, plan_cpus
+from backend.utils.model_serializer import load_model
+from backend.utils.predictor import make_predictions
+from backend.utils.synthetic_data import generate_records
+
+
+# relative p99 latency over the best candidate that fails the plan
+DEFAULT_THRESHOLD = 0.1
+
+# seconds every configuration is measured for
+DURATION = 3.0
+
+# records per predict call
+BATCH_SIZES = [1, 100]
+
+
+def run_configuration(workers: int, nthread: int, batch_size: int,
+                      duration=DURATION, model_path=MODEL_FILE_PATH) -> dict:
+    """
+    Measure concurrent workers predicting with a given thread count.
+
+    Parameters:
+    - workers (int): Number of concurrent worker processes.
+    - nthread (int): XGBoost threads per worker's booster.
+    - batch_size (int): Records per predict call.
+    - duration (float): Seconds to measure for.
+    - model_path (str): Path of the model file.
+
+    Returns:
+    - dict: Configuration, calls, throughput in records per second and
+            latency p50 and p99 in milliseconds.
+    """
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(
+                     model_path, nthread, batch_size, duration, barrier,
+                     results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    latencies = []
+    for _ in processes:
+        latencies.extend(results.get())
+    for process in processes:
+        process.join()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'workers': workers,
+        'nthread': nthread,
+        'batch_size': batch_size,
+        'calls': len(latencies),
+        'throughput': len(latencies) * batch_size / duration,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def validate_plan(plan: dict, batch_sizes=BATCH_SIZES, duration=DURATION,
+                  threshold=DEFAULT_THRESHOLD,
+                  model_path=MODEL_FILE_PATH) -> list:
+    """
+    Compare the planned inference thread count against the alternatives.
+
+    Parameters:
+    - plan (dict): CPU plan, see plan_cpus.
+    - batch_sizes (list): Records per predict call to measure.
+    - duration (float): Seconds to measure every configuration for.
+    - threshold (float): Relative p99 latency over the best candidate that
+                         fails the plan.
+    - model_path (str): Path of the model file.
+
+    Returns:
+    - list: Per batch size, a dict with the candidates' results, the best
+            thread count and whether the planned one passes.
+    """
+    candidates = sorted({1, plan['inference_nthread'], plan['cpus']})
+    checks = []
+    for batch_size in batch_sizes:
+        results = [run_configuration(plan['workers'], nthread, batch_size,
+                                     duration, model_path)
+                   for nthread in candidates]
+        best = min(results, key=lambda result: result['p99_ms'])
+        planned = next(result for result in results
+                       if result['nthread'] == plan['inference_nthread'])
+        checks.append({
+            'batch_size': batch_size,
+            'results': results,
+            'best_nthread': best['nthread'],
+            'passed': planned['p99_ms'] <= best['p99_ms'] * (1 + threshold),
+        })
+    return checks
+
+
+def _worker(model_path: str, nthread: int, batch_size: int, duration: float,
+            barrier, results):
+    model = load_model(model_path)
+    configure_booster(model, nthread)
+    data = PredictionSchema(many=True).load(generate_records(batch_size))
+    make_predictions(model, data, cache=None)
+
+    # Start measuring together, so the workers compete for the CPUs
+    barrier.wait()
+    latencies = []
+    end = time.perf_counter() + duration
+    while True:
+        started = time.perf_counter()
+        if started >= end:
+            break
+        make_predictions(model, data, cache=None)
+        latencies.append(time.perf_counter() - started)
+    results.put(latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--workers', type=int,
+                        help='worker processes, planned by default')
+    parser.add_argument('--batch-size', type=int, action='append',
+                        help='records per predict call, repeatable')
+    parser.add_argument('--duration', type=float, default=DURATION,
+                        help='seconds per configuration')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative p99 slowdown that fails the plan')
+    parser.add_argument('--model', default=MODEL_FILE_PATH,
+                        help='model file')
+    parser.add_argument('--output', metavar='PATH',
+                        help='write the plan and results as JSON')
+    args = parser.parse_args()
+
+    plan = plan_cpus(workers=args.workers)
+    print(json.dumps(plan))
+    checks = validate_plan(plan, args.batch_size or BATCH_SIZES,
+                           args.duration, args.threshold, args.model)
+
+    print(f"\n{'batch':>6s} {'nthread':>8s} {'calls/s':>10s} "
+          f"{'p50 ms':>9s} {'p99 ms':>9s}")
+    for check in checks:
+        for result in check['results']:
+            flag = ('  planned' if result['nthread'] ==
+                    plan['inference_nthread'] else '')
+            print(f"{check['batch_size']:6d} {result['nthread']:8d} "
+                  f"{result['calls'] / args.duration:10.1f} "
+                  f"{result['p50_ms']:9.3f} {result['p99_ms']:9.3f}{flag}")
+        if not check['passed']:
+            print(f"batch size {check['batch_size']}: nthread="
+                  f"{check['best_nthread']} beats the plan")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'plan': plan, 'checks': checks}, f, indent=2)
+            f.write('\n')
+
+    sys.exit(0 if all(check['passed'] for check in checks) else 1)
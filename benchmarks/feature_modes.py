@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark comparing the feature modes of the SkySatisfy model.
+
+The same synthetic dataset is encoded once with one-hot encoded classes and
+once with natively categorical features. A model is trained on each, and
+the modes are compared on training time, saved model size, trees' nodes,
+holdout AUC and per-row prediction latency of every inference engine.
+
+Examples:
+    python -m benchmarks.feature_modes
+    python -m benchmarks.feature_modes --rows 100000 --output modes.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backend.config import MODEL_PARAMS
+from backend.schemas.prediction_schema import PredictionSchema
+from backend.utils.data_loader import FEATURES, preprocess_data
+from backend.utils.feature_encoder import FeatureEncoder
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.lookup_table import compile_lookup_table
+from backend.utils.model_evaluator import fold_metrics
+from backend.utils.model_trainer import train_model
+from backend.utils.predictor import make_prediction
+from backend.utils.synthetic_data import generate_dataset, generate_records
+
+
+# feature modes compared, see FEATURE_MODE in backend/config.py
+FEATURE_MODES = ['one_hot', 'categorical']
+
+# inference engines whose latency is measured
+ENGINES = ['native', 'array', 'lookup']
+
+# rows of the synthetic dataset, the last fifth held out
+DATASET_SIZE = 100_000
+
+# single-record predictions timed per engine
+N_PREDICTIONS = 2000
+
+
+def compare_modes(n_rows=DATASET_SIZE, n_predictions=N_PREDICTIONS,
+                  xgb_params=MODEL_PARAMS['XGB_PARAMS'],
+                  num_boost_round=MODEL_PARAMS['XGB_NUM_BOOST_ROUND']
+                  ) -> list:
+    """
+    Train and score a model in every feature mode.
+
+    Parameters:
+    - n_rows (int): Rows of the synthetic dataset.
+    - n_predictions (int): Single-record predictions timed per engine.
+    - xgb_params (dict): Parameters for the XGBoost model.
+    - num_boost_round (int): Number of boosting rounds.
+
+    Returns:
+    - list: Per mode, a dict with the 'mode', 'train_seconds',
+            'model_bytes', 'nodes', holdout 'auc' and the median and p99
+            per-row latency of every engine in microseconds.
+    """
+    df = generate_dataset(n_rows)
+    split = n_rows * 4 // 5
+    records = PredictionSchema(many=True).load(
+        generate_records(n_predictions, seed=1))
+
+    results = []
+    for mode in FEATURE_MODES:
+        encoder = FeatureEncoder(FEATURES, categorical=mode == 'categorical')
+        X, y = preprocess_data(df, encoder)
+
+        started = time.perf_counter()
+        model = train_model(X.iloc[:split], y.iloc[:split], xgb_params,
+                            num_boost_round, encoder.feature_types)
+        train_seconds = time.perf_counter() - started
+        encoder.attach(model)
+
+        holdout = y.iloc[split:].to_numpy()
+        predictions = np.array([
+            make_prediction(model, record, cache=None)
+            for record in _holdout_records(df.iloc[split:])])
+        auc = fold_metrics(holdout, predictions,
+                           np.zeros(len(holdout), dtype=np.int64))['auc'][0]
+
+        result = {
+            'mode': mode,
+            'train_seconds': train_seconds,
+            'model_bytes': len(model.save_raw('ubj')),
+            'nodes': len(model.trees_to_dataframe()),
+            'auc': auc,
+        }
+        for engine in ENGINES:
+            latencies = _latencies(_engine(model, engine), records)
+            result[f'{engine}_p50_us'] = float(np.percentile(latencies, 50))
+            result[f'{engine}_p99_us'] = float(np.percentile(latencies, 99))
+        results.append(result)
+    return results
+
+
+def _holdout_records(df) -> list:
+    """Turn raw dataset rows back into validated prediction records."""
+    raw = df.drop(columns='satisfaction')
+    raw.columns = [name.lower().replace(' ', '_') for name in raw.columns]
+    raw = raw.apply(lambda values: values.str.lower().str.replace(' ', '_')
+                    if values.dtype == object else values)
+    return raw.to_dict('records')
+
+
+def _engine(model, engine: str):
+    if engine == 'lookup':
+        # Compiled in memory, the table file may belong to another model
+        return compile_lookup_table(model)
+    return load_inference_engine(model, engine)
+
+
+def _latencies(engine, records: list) -> np.ndarray:
+    """Time single-record predictions, in microseconds."""
+    make_prediction(engine, records[0], cache=None)
+    latencies = np.empty(len(records))
+    for i, record in enumerate(records):
+        started = time.perf_counter()
+        make_prediction(engine, record, cache=None)
+        latencies[i] = time.perf_counter() - started
+    return latencies * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--rows', type=int, default=DATASET_SIZE,
+                        help='rows of the synthetic dataset')
+    parser.add_argument('--predictions', type=int, default=N_PREDICTIONS,
+                        help='single-record predictions per engine')
+    parser.add_argument('--output', metavar='PATH',
+                        help='write the results as JSON')
+    args = parser.parse_args()
+
+    results = compare_modes(args.rows, args.predictions)
+
+    print(f"{'mode':>12s} {'train s':>8s} {'bytes':>8s} {'nodes':>6s} "
+          f"{'auc':>7s}" + ''.join(f" {engine + ' p50 us':>15s}"
+                                   for engine in ENGINES))
+    for result in results:
+        print(f"{result['mode']:>12s} {result['train_seconds']:8.3f} "
+              f"{result['model_bytes']:8d} {result['nodes']:6d} "
+              f"{result['auc']:7.4f}" +
+              ''.join(f" {result[engine + '_p50_us']:15.1f}"
+                      for engine in ENGINES))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
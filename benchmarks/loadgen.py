@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+
+"""
+HTTP load generator for the SkySatisfy prediction service.
+
+Replays JSON payloads, either from a JSONL file (one request body per line)
+or generated from the schema domains, against a running service and reports
+throughput, latency percentiles and error rates.
+
+Closed-loop mode runs a fixed number of clients that each send their next
+request as soon as the previous one is answered. Open-loop mode sends
+requests at a fixed arrival rate whatever the response times. Latency is
+measured from each request's scheduled send time, so queueing in front of a
+saturated service is included (no coordinated omission).
+
+HTTP/1.1 is spoken directly over asyncio streams with a pool of persistent
+connections, which are reopened when the server closes them (gunicorn's
+sync workers close after every response).
+
+Examples:
+    python -m benchmarks.loadgen --concurrency 16 --duration 30
+    python -m benchmarks.loadgen --rate 500 --payloads captured.jsonl
+    python -m benchmarks.loadgen --start-service --output run.json
+    python -m benchmarks.loadgen --compare run.json --output new.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from backend.utils.synthetic_data import generate_records
+
+
+# default target of the load
+DEFAULT_URL = 'http://127.0.0.1:8000/predict'
+
+# latency percentiles reported, in percent
+PERCENTILES = [50, 95, 99, 99.9]
+
+# number of synthetic payloads generated when no payload file is given
+SYNTHETIC_PAYLOADS = 10000
+
+# seconds to wait for a started service to report ready
+SERVICE_START_TIMEOUT = 120
+
+
+class HTTPConnection:
+    """
+    Persistent HTTP/1.1 connection sending JSON POST requests.
+
+    Parameters:
+    - host (str): Server host.
+    - port (int): Server port.
+    - timeout (float): Seconds to wait for a response.
+    """
+
+    def __init__(self, host: str, port: int, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method: str, path: str, body=b'') -> int:
+        """
+        Send a request and read the full response.
+
+        Parameters:
+        - method (str): HTTP method.
+        - path (str): Request path.
+        - body (bytes): JSON request body.
+
+        Returns:
+        - int: Response status code.
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port)
+        head = (f'{method} {path} HTTP/1.1\r\n'
+                f'Host: {self.host}:{self.port}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n\r\n')
+        try:
+            self._writer.write(head.encode() + body)
+            return await asyncio.wait_for(self._read_response(),
+                                          self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """Close the underlying socket; the next request reconnects."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _read_response(self) -> int:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by the server')
+        version, status = status_line.split(None, 2)[:2]
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await self._reader.readexactly(int(headers['content-length']))
+        else:
+            await self._reader.read()
+            headers['connection'] = 'close'
+
+        keep_alive = headers.get('connection', 'keep-alive'
+                                 if version == b'HTTP/1.1' else 'close')
+        if keep_alive != 'keep-alive':
+            self.close()
+        return int(status)
+
+
+async def run_closed_loop(url: str, payloads: list, concurrency: int,
+                          duration: float, warmup=0.0) -> tuple:
+    """
+    Run `concurrency` clients that each send requests back to back.
+
+    Parameters:
+    - url (str): Target URL.
+    - payloads (list): Request bodies (bytes), replayed in a cycle.
+    - concurrency (int): Number of concurrent clients.
+    - duration (float): Seconds of measured load.
+    - warmup (float): Seconds of unmeasured load sent first.
+
+    Returns:
+    - tuple: Samples and elapsed seconds. Samples are (latency in seconds,
+             outcome) per measured request, the outcome being the status
+             code or the name of the raised exception. Elapsed seconds run
+             from the start of the measurement to the last response.
+    """
+    host, port, path = _split_url(url)
+    bodies = itertools.cycle(payloads)
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    samples = []
+
+    async def client():
+        connection = HTTPConnection(host, port)
+        try:
+            while True:
+                sent = time.perf_counter()
+                if sent >= stop_at:
+                    return
+                outcome = await _send(connection, path, next(bodies))
+                if sent >= measure_from:
+                    samples.append((time.perf_counter() - sent, outcome))
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples, time.perf_counter() - measure_from
+
+
+async def run_open_loop(url: str, payloads: list, rate: float,
+                        duration: float, connections=64,
+                        warmup=0.0) -> tuple:
+    """
+    Send requests at a fixed arrival rate over a pool of connections.
+
+    Requests that find every connection busy wait for one; that wait is
+    part of their latency.
+
+    Parameters:
+    - url (str): Target URL.
+    - payloads (list): Request bodies (bytes), replayed in a cycle.
+    - rate (float): Requests per second.
+    - duration (float): Seconds of measured load.
+    - connections (int): Maximum number of open connections.
+    - warmup (float): Seconds of unmeasured load sent first.
+
+    Returns:
+    - tuple: Samples and elapsed seconds, as for run_closed_loop.
+    """
+    host, port, path = _split_url(url)
+    pool = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(HTTPConnection(host, port))
+
+    bodies = itertools.cycle(payloads)
+    started = time.perf_counter()
+    measure_from = started + warmup
+    n_requests = int((warmup + duration) * rate)
+    samples = []
+
+    async def send(scheduled, body):
+        connection = await pool.get()
+        try:
+            outcome = await _send(connection, path, body)
+        finally:
+            pool.put_nowait(connection)
+        if scheduled >= measure_from:
+            samples.append((time.perf_counter() - scheduled, outcome))
+
+    tasks = []
+    for i in range(n_requests):
+        scheduled = started + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(scheduled, next(bodies))))
+    await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - measure_from
+
+    while not pool.empty():
+        pool.get_nowait().close()
+    return samples, elapsed
+
+
+def summarize(samples: list, duration: float) -> dict:
+    """
+    Summarize measured requests.
+
+    Parameters:
+    - samples (list): (latency, outcome) per request.
+    - duration (float): Seconds from the start of the measurement to the
+                        last response.
+
+    Returns:
+    - dict: Request and error counts, throughput in requests per second,
+            error rate, and latency mean, max and percentiles in
+            milliseconds.
+    """
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    outcomes = {}
+    for _, outcome in samples:
+        outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+    errors = {outcome: count for outcome, count in outcomes.items()
+              if not (outcome.isdigit() and int(outcome) < 400)}
+    n_errors = sum(errors.values())
+
+    summary = {
+        'requests': len(samples),
+        'errors': n_errors,
+        'error_rate': n_errors / len(samples) if samples else 0.0,
+        'throughput': len(samples) / duration if duration else 0.0,
+        'outcomes': outcomes,
+        'latency_ms': {},
+    }
+    if len(samples):
+        summary['latency_ms'] = {
+            'mean': float(latencies.mean()),
+            'max': float(latencies.max()),
+            **{f'p{p:g}': float(np.percentile(latencies, p))
+               for p in PERCENTILES},
+        }
+    return summary
+
+
+def compare_reports(previous: dict, current: dict) -> list:
+    """
+    Compare the headline numbers of two saved runs.
+
+    Parameters:
+    - previous (dict): Earlier run, as saved by this tool.
+    - current (dict): Later run.
+
+    Returns:
+    - list: (metric, previous value, current value, relative change) tuples.
+    """
+    rows = []
+    for metric in ['throughput', 'error_rate']:
+        rows.append(_compare_row(metric, previous['summary'][metric],
+                                 current['summary'][metric]))
+    for metric, value in current['summary']['latency_ms'].items():
+        before = previous['summary']['latency_ms'].get(metric)
+        if before is not None:
+            rows.append(_compare_row(f'latency_ms.{metric}', before, value))
+    return rows
+
+
+def load_payloads(path=None, seed=0) -> list:
+    """
+    Load request bodies from a JSONL file, or generate synthetic ones.
+
+    Parameters:
+    - path (str): JSONL file with one request body per line; synthetic
+                  schema-conformant records are generated when None.
+    - seed (int): Seed of the synthetic records.
+
+    Returns:
+    - list: Encoded request bodies (bytes).
+    """
+    if path is None:
+        return [json.dumps(record).encode()
+                for record in generate_records(SYNTHETIC_PAYLOADS, seed)]
+    with open(path) as f:
+        return [line.strip().encode() for line in f if line.strip()]
+
+
+def start_service(url: str) -> subprocess.Popen:
+    """
+    Start the service with gunicorn and wait until it reports ready.
+
+    Parameters:
+    - url (str): Target URL; its host and port are polled on /ready.
+
+    Returns:
+    - subprocess.Popen: The gunicorn process.
+
+    Raises:
+    - RuntimeError: If the service exits or is not ready in time.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+         'backend.prediction_service:app'])
+    host, port, _ = _split_url(url)
+    deadline = time.monotonic() + SERVICE_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The service exited during startup")
+        try:
+            connection = HTTPConnection(host, port, timeout=1.0)
+            status = asyncio.run(connection.request('GET', '/ready'))
+            connection.close()
+            if status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("The service did not become ready in time")
+
+
+async def _send(connection: HTTPConnection, path: str, body: bytes):
+    try:
+        return await connection.request('POST', path, body)
+    except Exception as e:
+        return type(e).__name__
+
+
+def _split_url(url: str) -> tuple:
+    parts = urlsplit(url)
+    return parts.hostname, parts.port or 80, parts.path or '/'
+
+
+def _compare_row(metric: str, before: float, after: float) -> tuple:
+    if before == after:
+        return metric, before, after, 0.0
+    change = (after - before) / before if before else float('nan')
+    return metric, before, after, change
+
+
+def _print_summary(summary: dict):
+    print(f"requests    {summary['requests']}")
+    print(f"throughput  {summary['throughput']:.1f} req/s")
+    print(f"errors      {summary['errors']} "
+          f"({summary['error_rate']:.2%}) {summary['outcomes']}")
+    for metric, value in summary['latency_ms'].items():
+        print(f"{metric:11s} {value:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--url', default=DEFAULT_URL, help='target URL')
+    parser.add_argument('--payloads',
+                        help='JSONL file of request bodies; synthetic '
+                             'records are generated by default')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--concurrency', type=int, default=8,
+                      help='closed loop: number of concurrent clients')
+    mode.add_argument('--rate', type=float,
+                      help='open loop: requests per second')
+    parser.add_argument('--connections', type=int, default=64,
+                        help='open loop: maximum open connections')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=1.0,
+                        help='seconds of unmeasured load sent first')
+    parser.add_argument('--start-service', action='store_true',
+                        help='start the service with gunicorn.conf.py and '
+                             'stop it afterwards')
+    parser.add_argument('--output', help='save the run as a JSON artifact')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare with a previously saved run')
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads)
+    service = start_service(args.url) if args.start_service else None
+    try:
+        if args.rate:
+            samples, elapsed = asyncio.run(run_open_loop(
+                args.url, payloads, args.rate, args.duration,
+                args.connections, args.warmup))
+        else:
+            samples, elapsed = asyncio.run(run_closed_loop(
+                args.url, payloads, args.concurrency, args.duration,
+                args.warmup))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+    run = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'url': args.url,
+            'mode': 'open' if args.rate else 'closed',
+            'concurrency': None if args.rate else args.concurrency,
+            'rate': args.rate,
+            'connections': args.connections if args.rate else None,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'payloads': args.payloads or 'synthetic',
+            'cpu_count': os.cpu_count(),
+        },
+        'summary': summarize(samples, elapsed),
+    }
+    _print_summary(run['summary'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"\n{'metric':18s} {'previous':>10s} {'current':>10s} "
+              f"{'change':>8s}")
+        for metric, before, after, change in compare_reports(previous, run):
+            print(f"{metric:18s} {before:10.2f} {after:10.2f} {change:+8.1%}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+Standalone runner for the SkySatisfy micro-benchmarks.
+
+Each case is timed over several repeats of a calibrated number of calls and
+its fastest per-call time is reported. Results can be saved as a JSON
+baseline and compared against one; the comparison fails when a case is
+slower than its baseline by more than the threshold, or has no baseline.
+
+Examples:
+    python -m benchmarks.runner
+    python -m benchmarks.runner --save benchmarks/baseline.json
+    python -m benchmarks.runner --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+import numpy as np
+import xgboost as xgb
+
+from benchmarks.cases import build_cases
+
+
+# default path of the recorded baseline
+BASELINE_FILE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# relative slowdown over the baseline that counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# minimum duration of one repeat, in seconds
+MIN_REPEAT_TIME = 0.1
+
+# number of timed repeats per case
+REPEATS = 5
+
+
+def run_case(fn, repeats=REPEATS, min_time=MIN_REPEAT_TIME) -> dict:
+    """
+    Time a zero-argument callable.
+
+    Parameters:
+    - fn (callable): Function to time.
+    - repeats (int): Number of timed repeats.
+    - min_time (float): Minimum duration of one repeat, in seconds; the
+                        number of calls per repeat is calibrated to it.
+
+    Returns:
+    - dict: Fastest and median per-call time in seconds, calls per repeat
+            and number of repeats.
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    times = [timer.timeit(number) / number for _ in range(repeats)]
+    return {'min': min(times), 'median': statistics.median(times),
+            'number': number, 'repeat': repeats}
+
+
+def run_benchmarks(cases, pattern=None, repeats=REPEATS,
+                   min_time=MIN_REPEAT_TIME) -> dict:
+    """
+    Run benchmark cases and collect their results.
+
+    Parameters:
+    - cases (list): (name, setup) tuples, see build_cases.
+    - pattern (str): Only run cases whose name contains this substring.
+    - repeats (int): Number of timed repeats per case.
+    - min_time (float): Minimum duration of one repeat, in seconds.
+
+    Returns:
+    - dict: Machine description and results keyed by case name.
+    """
+    results = {}
+    for name, setup in cases:
+        if pattern and pattern not in name:
+            continue
+        results[name] = run_case(setup(), repeats, min_time)
+        print(f"{name:45s} {_format_time(results[name]['min'])}",
+              flush=True)
+    return {'machine': _machine(), 'created': time.strftime('%Y-%m-%d'),
+            'results': results}
+
+
+def compare_results(baseline: dict, current: dict,
+                    threshold=DEFAULT_THRESHOLD) -> list:
+    """
+    Compare benchmark results against a baseline.
+
+    Parameters:
+    - baseline (dict): Baseline as returned by run_benchmarks.
+    - current (dict): Current results as returned by run_benchmarks.
+    - threshold (float): Relative slowdown that counts as a regression.
+
+    Returns:
+    - list: (name, baseline time, current time, ratio, regressed) tuples
+            for the current cases, by case name. A case missing from the
+            baseline has no baseline time and ratio and counts as
+            regressed, so new or renamed cases fail until the baseline is
+            recorded again.
+    """
+    rows = []
+    for name, result in sorted(current['results'].items()):
+        reference = baseline['results'].get(name)
+        if reference is None:
+            rows.append((name, None, result['min'], None, True))
+            continue
+        ratio = result['min'] / reference['min']
+        rows.append((name, reference['min'], result['min'], ratio,
+                     ratio > 1 + threshold))
+    return rows
+
+
+def _machine() -> dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'xgboost': xgb.__version__,
+    }
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:8.2f} {unit}'
+    return f'{seconds / 1e-9:8.2f} ns'
+
+
+def _print_comparison(rows: list, threshold: float):
+    print(f"\n{'case':45s} {'baseline':>11s} {'current':>11s} {'change':>8s}")
+    for name, reference, current, ratio, regressed in rows:
+        if reference is None:
+            print(f"{name:45s} {'-':>11s} {_format_time(current)} "
+                  f"{'-':>7s}  NO BASELINE")
+            continue
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:45s} {_format_time(reference)} {_format_time(current)}"
+              f" {ratio - 1:+7.0%}{flag}")
+    missing = sum(row[1] is None for row in rows)
+    regressions = sum(row[4] for row in rows) - missing
+    print(f"\n{regressions} of {len(rows) - missing} cases slower than the "
+          f"baseline by more than {threshold:.0%}, {missing} without a "
+          f"baseline")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--filter', help='only run cases whose name '
+                                         'contains this substring')
+    parser.add_argument('--save', metavar='PATH',
+                        help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', nargs='?',
+                        const=BASELINE_FILE_PATH,
+                        help='compare against a JSON baseline and exit with '
+                             'status 1 on regressions or cases missing from '
+                             'it')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative slowdown counted as a regression')
+    parser.add_argument('--repeats', type=int, default=REPEATS,
+                        help='timed repeats per case')
+    args = parser.parse_args()
+
+    current = run_benchmarks(build_cases(), args.filter, args.repeats)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, current, args.threshold)
+        _print_comparison(rows, args.threshold)
+        sys.exit(1 if any(row[4] for row in rows) else 0)
@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for the SkySatisfy prediction service.
+
+With `preload_app` the application module and its dependencies are
+imported once in the master process. Workers are forked from the master and
+share those pages copy-on-write instead of each importing a private copy.
+
+The model is loaded and warmed in every worker after the fork, never in the
+master: XGBoost's OpenMP runtime is not fork-safe, and a worker forked after
+the master started its thread pool can hang. The lookup table is
+memory-mapped, so the workers still share its pages through the page cache.
+"""
+import gc
+
+from backend.config import HOST, PORT, GUNICORN
+from backend.utils.cpu_planner import plan_cpus
+
+
+# Workers and threads fitted to the CPUs of the machine or container
+plan = plan_cpus()
+
+bind = f'{HOST}:{PORT}'
+workers = plan['workers']
+threads = plan['threads']
+# Threaded workers hand every request up to the admission limits to the
+# service, which sheds those beyond its wait queue
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = GUNICORN['PRELOAD_APP']
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the garbage collector's reach,
+    # so collections in the workers do not write to (and copy) shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Load the model before the worker accepts requests, rather than on its
+    # first request
+    from backend.prediction_service import registry
+    registry.ensure_loaded()
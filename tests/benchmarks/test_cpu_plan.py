@@ -0,0 +1,18 @@
+from benchmarks.cpu_plan import run_configuration, validate_plan
+
+
+def test_run_configuration():
+    result = run_configuration(workers=1, nthread=1, batch_size=10,
+                               duration=0.2)
+    assert result['calls'] > 0, "Workers should make predictions"
+    assert 0 < result['p50_ms'] <= result['p99_ms']
+    assert result['throughput'] > 0
+
+
+def test_validate_plan():
+    plan = {'cpus': 1, 'workers': 1, 'threads': 1, 'inference_nthread': 1,
+            'training_nthread': 1}
+    checks = validate_plan(plan, batch_sizes=[1], duration=0.1)
+    assert len(checks) == 1
+    assert checks[0]['best_nthread'] == 1, "The only candidate is the best"
+    assert checks[0]['passed'], "The plan is its own best candidate"
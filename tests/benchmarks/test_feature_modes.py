@@ -0,0 +1,12 @@
+from benchmarks.feature_modes import compare_modes, ENGINES, FEATURE_MODES
+
+
+def test_compare_modes():
+    results = compare_modes(n_rows=1000, n_predictions=20,
+                            num_boost_round=3)
+    assert [result['mode'] for result in results] == FEATURE_MODES
+    for result in results:
+        assert result['model_bytes'] > 0 and result['nodes'] > 0
+        assert 0.5 < result['auc'] <= 1, "Models should learn the labels"
+        for engine in ENGINES:
+            assert 0 < result[f'{engine}_p50_us'] <= result[f'{engine}_p99_us']
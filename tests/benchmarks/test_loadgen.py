@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from backend.prediction_service import app
+from benchmarks.loadgen import (run_closed_loop, run_open_loop, summarize,
+                                compare_reports, load_payloads)
+
+
+@pytest.fixture(scope='module')
+def url():
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/predict'
+    server.shutdown()
+
+
+def test_closed_loop(url):
+    payloads = load_payloads()[:50] + [b'{"age": 36}']
+    samples, elapsed = asyncio.run(
+        run_closed_loop(url, payloads, concurrency=4, duration=0.5))
+
+    summary = summarize(samples, elapsed)
+    assert summary['requests'] > 0, "Requests should complete"
+    assert summary['outcomes'].get('200', 0) > 0, "Valid payloads succeed"
+    assert summary['outcomes'].get('400', 0) > 0, "Invalid payload fails"
+    assert summary['errors'] == summary['outcomes']['400']
+    latency = summary['latency_ms']
+    assert latency['p50'] <= latency['p99'] <= latency['p99.9'] <= (
+        latency['max']
+    ), "Percentiles should be ordered"
+
+
+def test_open_loop(url):
+    samples, elapsed = asyncio.run(
+        run_open_loop(url, load_payloads()[:20], rate=100, duration=0.5,
+                      connections=4))
+
+    summary = summarize(samples, elapsed)
+    assert summary['requests'] == 50, "Every scheduled request is measured"
+    assert summary['error_rate'] == 0.0
+
+
+def test_connection_errors_are_counted():
+    samples, elapsed = asyncio.run(
+        run_closed_loop('http://127.0.0.1:9/predict', [b'{}'],
+                        concurrency=1, duration=0.1))
+    summary = summarize(samples, elapsed)
+    assert summary['error_rate'] == 1.0, "Refused connections are errors"
+
+
+def test_compare_reports():
+    previous = {'summary': {'throughput': 100.0, 'error_rate': 0.0,
+                            'latency_ms': {'p50': 2.0, 'p99': 10.0}}}
+    current = {'summary': {'throughput': 150.0, 'error_rate': 0.0,
+                           'latency_ms': {'p50': 1.0, 'p99': 10.0}}}
+    rows = {row[0]: row[3] for row in compare_reports(previous, current)}
+    assert rows['throughput'] == 0.5
+    assert rows['latency_ms.p50'] == -0.5
+    assert rows['latency_ms.p99'] == 0.0
@@ -0,0 +1,48 @@
+from benchmarks.cases import build_cases
+from benchmarks.runner import run_case, run_benchmarks, compare_results
+
+
+def _results(times):
+    return {'results': {name: {'min': t} for name, t in times.items()}}
+
+
+def test_run_case():
+    calls = []
+    result = run_case(lambda: calls.append(1), repeats=3, min_time=0.001)
+    assert result['repeat'] == 3
+    assert result['number'] >= 1
+    assert len(calls) >= 3 * result['number'], "Every repeat should run"
+    assert 0 < result['min'] <= result['median']
+
+
+def test_run_benchmarks_filter():
+    cases = [('fast[a]', lambda: (lambda: None)),
+             ('fast[b]', lambda: (lambda: None))]
+    results = run_benchmarks(cases, pattern='[a]', repeats=1, min_time=0.001)
+    assert list(results['results']) == ['fast[a]'], "Filter should apply"
+    assert 'python' in results['machine']
+
+
+def test_compare_results():
+    baseline = _results({'a': 1.0, 'b': 1.0, 'removed': 1.0})
+    current = _results({'a': 1.1, 'b': 1.5, 'new': 1.0})
+
+    rows = compare_results(baseline, current, threshold=0.25)
+
+    assert [row[0] for row in rows] == ['a', 'b', 'new'], (
+        "Every current case should be compared"
+    )
+    assert [row[4] for row in rows] == [False, True, True], (
+        "The case beyond the threshold and the new case should fail"
+    )
+    assert rows[2][1] is None and rows[2][3] is None, (
+        "A case missing from the baseline has no baseline time"
+    )
+
+
+def test_cases_are_unique_and_set_up():
+    cases = build_cases()
+    names = [name for name, _ in cases]
+    assert len(names) == len(set(names)), "Case names should be unique"
+    setup = dict(cases)['PREDICTION_VALIDATOR.load[n=1]']
+    setup()()
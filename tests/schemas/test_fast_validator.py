@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from marshmallow import ValidationError
+
+from backend.schemas.fast_validator import CompiledSchema, PREDICTION_VALIDATOR
+from backend.schemas.prediction_schema import PredictionSchema
+
+
+VALID_RECORD = {
+    'customer_type': 'loyal_customer',
+    'age': 36,
+    'type_of_travel': 'business_travel',
+    'flight_distance': 2000,
+    'ease_of_online_booking': 5,
+    'online_boarding': 5,
+    'class': 'business'
+}
+
+# values that exercise every branch of the String and Integer fields
+FUZZ_VALUES = [
+    None, True, False, 0, 1, 5, 6, -1, 36, 120, 121, 10 ** 30, 2.0, 2.5,
+    float('nan'), float('inf'), '3', ' 4 ', '3.5', '', 'eco', 'business',
+    'eco_plus', 'loyal_customer', 'disloyal_customer', 'business_travel',
+    'personal_travel', 'Business', b'eco', b'\xff', [], {}, [1], (2,),
+]
+
+
+def _fuzzed_record(rng):
+    if rng.random() < 0.03:
+        return rng.choice([None, 'record', 42, ['age', 36]])
+    record = dict(VALID_RECORD)
+    for key in list(record):
+        roll = rng.random()
+        if roll < 0.1:
+            del record[key]
+        elif roll < 0.3:
+            record[key] = rng.choice(FUZZ_VALUES)
+    if rng.random() < 0.1:
+        record[rng.choice(['class_', 'extra', 'Age'])] = 1
+    return record
+
+
+def _marshmallow_load(data, many):
+    try:
+        return PredictionSchema(many=many).load(data), None
+    except ValidationError as e:
+        return e.valid_data, e.normalized_messages()
+
+
+def _compiled_load(data, many):
+    try:
+        return PREDICTION_VALIDATOR.load(data, many=many), None
+    except ValidationError as e:
+        return e.valid_data, e.normalized_messages()
+
+
+def test_valid_record():
+    assert PREDICTION_VALIDATOR.load(VALID_RECORD) == (
+        PredictionSchema().load(VALID_RECORD)
+    ), "Valid record should load like marshmallow"
+
+
+def test_conforms_to_marshmallow_on_fuzzed_records():
+    rng = random.Random(42)
+    for _ in range(3000):
+        record = _fuzzed_record(rng)
+        expected = _marshmallow_load(record, many=False)
+        actual = _compiled_load(record, many=False)
+        assert actual == expected, f"Mismatch for {record!r}"
+        # Messages are returned to clients as strings, so order matters too
+        assert str(actual[1]) == str(expected[1]), (
+            f"Message order mismatch for {record!r}"
+        )
+
+
+def test_conforms_to_marshmallow_on_fuzzed_batches():
+    rng = random.Random(7)
+    for _ in range(200):
+        batch = [_fuzzed_record(rng) for _ in range(rng.randint(0, 20))]
+        expected = _marshmallow_load(batch, many=True)
+        actual = _compiled_load(batch, many=True)
+        assert actual == expected, f"Mismatch for {batch!r}"
+        assert str(actual[1]) == str(expected[1]), (
+            f"Message order mismatch for {batch!r}"
+        )
+
+
+@pytest.mark.parametrize('data', [None, 'records', 42, VALID_RECORD])
+def test_batch_of_wrong_type(data):
+    assert _compiled_load(data, many=True) == (
+        _marshmallow_load(data, many=True)
+    ), f"Mismatch for {data!r}"
+
+
+def test_rejects_schemas_with_hooks():
+    from marshmallow import post_load
+
+    class HookedSchema(PredictionSchema):
+        @post_load
+        def make_object(self, data, **kwargs):
+            return data
+
+    with pytest.raises(ValueError):
+        CompiledSchema(HookedSchema())
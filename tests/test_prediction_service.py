@@ -1,10 +1,34 @@
+import subprocess
+import sys
+import threading
+import time
+
 import pytest
+from unittest.mock import patch
+
+from backend import prediction_service
 from backend.prediction_service import app
+from backend.config import ADMISSION_CONTROL
+from backend.utils.admission import AdmissionController
+from backend.utils.cpu_planner import plan_cpus
+
+
+# seconds a fresh interpreter may spend importing the service and loading
+# and warming the model
+IMPORT_TIME_BUDGET = 5.0
+
+# modules only needed for training, which serving must not import
+TRAINING_MODULES = [
+    'backend.train_and_save_model',
+    'backend.utils.model_trainer',
+    'backend.utils.model_evaluator',
+]
 
 
 @pytest.fixture
 def client():
     app.config['TESTING'] = True
+    prediction_service.registry.ensure_loaded()
     with app.test_client() as client:
         yield client
 
@@ -70,3 +94,313 @@ def test_health_check(client):
         f"Expected status code 200, got {response.status_code}"
     )
     assert response.get_json() == {'status': 'OK'}, "Expected {'status': 'OK'}"
+
+
+def test_predict_batch_with_valid_data(client):
+    record = {
+        "age": 36,
+        "class": "business",
+        "customer_type": "loyal_customer",
+        "ease_of_online_booking": 5,
+        "flight_distance": 2000,
+        "online_boarding": 5,
+        "type_of_travel": "business_travel"
+    }
+    response = client.post('/predict/batch', json=[record, record])
+    assert response.status_code == 200, (
+        f"Expected status code 200, got {response.status_code}"
+    )
+    results = response.json['results']
+    assert len(results) == 2, f"Expected 2 results, got {len(results)}"
+    single = client.post('/predict', json=record).json
+    for result in results:
+        assert result['prediction'] == single['prediction'], (
+            "Batch result should match /predict")
+        assert result['verdict'] == single['verdict'], (
+            "Batch result should match /predict")
+    assert response.json['model_version'] == single['model_version']
+
+
+def test_predict_batch_with_invalid_record(client):
+    record = {
+        "age": 36,
+        "class": "business",
+        "customer_type": "loyal_customer",
+        "ease_of_online_booking": 5,
+        "flight_distance": 2000,
+        "online_boarding": 5,
+        "type_of_travel": "business_travel"
+    }
+    invalid_record = {'customer_type': 'loyal_customer', 'age': 25}
+    response = client.post('/predict/batch', json=[invalid_record, record])
+    assert response.status_code == 200, (
+        f"Expected status code 200, got {response.status_code}"
+    )
+    results = response.json['results']
+    assert 'error' in results[0], "'error' key not in invalid record result"
+    assert 'prediction' in results[1], "'prediction' key not in valid result"
+
+
+def test_predict_batch_with_non_list(client):
+    response = client.post('/predict/batch', json={'invalid': 'data'})
+    assert response.status_code == 400, (
+        f"Expected status code 400, got {response.status_code}"
+    )
+    assert 'error' in response.json, "'error' key not in response"
+
+
+def test_predict_batch_empty(client):
+    response = client.post('/predict/batch', json=[])
+    assert response.status_code == 200, (
+        f"Expected status code 200, got {response.status_code}"
+    )
+    assert response.json['results'] == [], "Expected empty results"
+
+
+def test_stats(client):
+    response = client.get('/stats')
+    assert response.status_code == 200, (
+        f"Expected status code 200, got {response.status_code}"
+    )
+    cache_stats = response.get_json()['prediction_cache']
+    for key in ['size', 'maxsize', 'hits', 'misses', 'hit_rate']:
+        assert key in cache_stats, f"'{key}' key not in cache stats"
+
+
+def test_predict_reports_model_version(client):
+    valid_data = {
+        "age": 36,
+        "class": "business",
+        "customer_type": "loyal_customer",
+        "ease_of_online_booking": 5,
+        "flight_distance": 2000,
+        "online_boarding": 5,
+        "type_of_travel": "business_travel"
+    }
+    response = client.post('/predict', json=valid_data)
+    info = client.get('/model/info').get_json()
+    assert response.json['model_version'] == info['model_version'], (
+        "Prediction and model info should report the same version"
+    )
+
+
+def test_admin_reload_requires_token(client):
+    with patch.object(prediction_service, 'ADMIN_TOKEN', 'secret'):
+        response = client.post('/admin/reload')
+    assert response.status_code == 403, (
+        f"Expected status code 403, got {response.status_code}"
+    )
+
+
+def test_admin_reload(client):
+    with patch.object(prediction_service, 'ADMIN_TOKEN', 'secret'), \
+         patch.object(prediction_service.registry,
+                      'reload_in_background') as mock_reload:
+        response = client.post('/admin/reload',
+                               headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 202, (
+        f"Expected status code 202, got {response.status_code}"
+    )
+    mock_reload.assert_called_once()
+
+
+def test_ready(client):
+    response = client.get('/ready')
+    assert response.status_code == 200, (
+        f"Expected status code 200, got {response.status_code}"
+    )
+    assert response.json['status'] == 'READY', "Service should be ready"
+    assert response.json['model_version'], "model_version should be set"
+
+
+def test_not_ready_without_model(client):
+    with patch.object(prediction_service.registry, 'current', None):
+        ready = client.get('/ready')
+        predict = client.post('/predict', json={})
+        info = client.get('/model/info')
+        health = client.get('/health')
+    assert ready.status_code == 503, (
+        f"Expected status code 503, got {ready.status_code}"
+    )
+    assert predict.status_code == 503, (
+        f"Expected status code 503, got {predict.status_code}"
+    )
+    assert info.status_code == 503, (
+        f"Expected status code 503, got {info.status_code}"
+    )
+    assert health.status_code == 200, "Health should not depend on the model"
+
+
+def test_import_time_budget():
+    # A fresh interpreter measures the cold start a gunicorn worker pays
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import backend.prediction_service\n"
+        "backend.prediction_service.registry.ensure_loaded()\n"
+        "print(time.perf_counter() - start)\n"
+        "print(','.join(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True)
+    elapsed, modules = result.stdout.strip().splitlines()[-2:]
+    assert float(elapsed) < IMPORT_TIME_BUDGET, (
+        f"Importing the service took {float(elapsed):.2f}s, budget is "
+        f"{IMPORT_TIME_BUDGET}s"
+    )
+    for module in TRAINING_MODULES:
+        assert module not in modules.split(','), (
+            f"Serving should not import {module}"
+        )
+
+
+def test_import_does_not_load_model():
+    # A preloading gunicorn master imports the service before forking, and
+    # XGBoost's OpenMP runtime is not fork-safe
+    code = (
+        "import backend.prediction_service as service\n"
+        "print(service.registry.current is None)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == 'True', (
+        "Importing the service should not load the model"
+    )
+
+
+def test_metrics(client):
+    client.post('/predict', json={'invalid': 'data'})
+    response = client.get('/metrics')
+    assert response.status_code == 200, (
+        f"Expected status code 200, got {response.status_code}"
+    )
+    assert response.content_type.startswith('text/plain'), (
+        "Metrics should use the Prometheus text format"
+    )
+    text = response.get_data(as_text=True)
+    assert 'skysatisfy_stage_duration_seconds_count{stage="validate"}' in text
+    assert 'skysatisfy_errors_total{endpoint="predict",' \
+           'type="ValidationError"}' in text
+    assert 'skysatisfy_model_info{version="' in text
+
+
+def test_admin_profile_requires_token(client):
+    with patch.object(prediction_service, 'ADMIN_TOKEN', 'secret'):
+        response = client.get('/admin/profile')
+    assert response.status_code == 403, (
+        f"Expected status code 403, got {response.status_code}"
+    )
+
+
+def test_admin_profile(client):
+    headers = {'X-Admin-Token': 'secret'}
+    with patch.object(prediction_service, 'ADMIN_TOKEN', 'secret'), \
+         patch.object(prediction_service.profiler, 'enabled', True), \
+         patch.object(prediction_service.profiler, 'sample_rate', 0.0):
+        client.get('/health', headers={'X-Profile': 'secret'})
+        summary = client.get('/admin/profile', headers=headers)
+        report = client.get('/admin/profile?endpoint=health_check',
+                            headers=headers)
+        dump = client.get('/admin/profile?endpoint=health_check'
+                          '&format=pstats', headers=headers)
+        reset = client.delete('/admin/profile', headers=headers)
+        missing = client.get('/admin/profile?endpoint=health_check',
+                             headers=headers)
+
+    assert summary.json['endpoints'] == {'health_check': 1}, (
+        "Request with the debug header should be profiled"
+    )
+    assert 'health_check' in report.get_data(as_text=True), (
+        "Report should list the view function"
+    )
+    assert dump.content_type == 'application/octet-stream'
+    assert reset.status_code == 200
+    assert missing.status_code == 404, "Profile should be gone after reset"
+
+
+def test_predict_with_expired_deadline(client):
+    response = client.post('/predict', json={},
+                           headers={'X-Request-Deadline': '1'})
+    assert response.status_code == 503, (
+        f"Expected status code 503, got {response.status_code}"
+    )
+    assert response.json['reason'] == 'deadline', "Deadline should be missed"
+    assert int(response.headers['Retry-After']) >= 1, "Missing Retry-After"
+
+
+def test_predict_with_invalid_deadline(client):
+    response = client.post('/predict', json={},
+                           headers={'X-Request-Deadline': 'soon'})
+    assert response.status_code == 400, (
+        f"Expected status code 400, got {response.status_code}"
+    )
+
+
+def test_predict_shed_beyond_queue(client):
+    # As many concurrent requests as a planned worker has threads, while
+    # scoring is held up: the configured limits admit and queue all but
+    # the last ones, which are shed
+    max_concurrency = ADMISSION_CONTROL['MAX_CONCURRENCY']
+    max_queue = ADMISSION_CONTROL['MAX_QUEUE']
+    requests = plan_cpus()['threads']
+    assert requests > max_concurrency + max_queue, (
+        "Workers should have threads for requests beyond the queue"
+    )
+    admission = AdmissionController(max_wait_ms=30000)
+    scoring = threading.Event()
+    statuses = []
+
+    def held_prediction(engine, data):
+        scoring.wait(30)
+        return 0.9
+
+    def post():
+        with app.test_client() as request_client:
+            response = request_client.post('/predict', json={
+                "age": 36,
+                "class": "business",
+                "customer_type": "loyal_customer",
+                "ease_of_online_booking": 5,
+                "flight_distance": 2000,
+                "online_boarding": 5,
+                "type_of_travel": "business_travel"
+            })
+            statuses.append(response.status_code)
+
+    with patch.object(prediction_service, 'admission', admission), \
+            patch.object(prediction_service, 'make_prediction',
+                         held_prediction):
+        threads = [threading.Thread(target=post) for _ in range(requests)]
+        for thread in threads:
+            thread.start()
+        started = time.monotonic()
+        while len(statuses) < requests - max_concurrency - max_queue:
+            assert time.monotonic() - started < 30, "Requests were not shed"
+            time.sleep(0.01)
+        stats = admission.stats()
+        scoring.set()
+        for thread in threads:
+            thread.join()
+
+    assert stats['in_flight'] == max_concurrency, "All slots should be taken"
+    assert stats['queued'] == max_queue, "The queue should be full"
+    assert statuses.count(429) == requests - max_concurrency - max_queue, (
+        "Requests beyond the queue should be shed"
+    )
+    assert statuses.count(200) == max_concurrency + max_queue, (
+        "Admitted and queued requests should be served"
+    )
+
+
+def test_predict_shed_when_saturated(client):
+    saturated = AdmissionController(max_concurrency=1, max_queue=0)
+    saturated.acquire()
+    with patch.object(prediction_service, 'admission', saturated):
+        response = client.post('/predict/batch', json=[])
+        metrics = client.get('/metrics').get_data(as_text=True)
+    assert response.status_code == 429, (
+        f"Expected status code 429, got {response.status_code}"
+    )
+    assert 'Retry-After' in response.headers, "Missing Retry-After"
+    assert 'skysatisfy_admission_shed_total{reason="queue_full"} 1' in metrics
+    assert 'skysatisfy_admission_in_flight 1' in metrics
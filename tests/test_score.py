@@ -0,0 +1,118 @@
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from backend.score import score_file, read_chunks
+from backend.utils.model_serializer import load_model
+from backend.utils.predictor import make_predictions
+
+
+RECORDS = [
+    {
+        'customer_type': 'loyal_customer',
+        'age': 40 + i,
+        'type_of_travel': 'business_travel' if i % 2 else 'personal_travel',
+        'flight_distance': 300 + 100 * i,
+        'ease_of_online_booking': i % 6,
+        'online_boarding': (i + 2) % 6,
+        'class': ['business', 'eco', 'eco_plus'][i % 3]
+    }
+    for i in range(25)
+]
+
+
+def _write_jsonl(path, lines):
+    with open(path, 'w') as f:
+        for line in lines:
+            f.write(line + '\n')
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _expected_predictions(records):
+    data = [{**r, 'class_': r['class']} for r in records]
+    return [round(p, 3)
+            for p in make_predictions(load_model(), data, cache=None)]
+
+
+def test_score_jsonl_in_process(tmp_path):
+    lines = [json.dumps(r) for r in RECORDS]
+    lines[3] = json.dumps({**RECORDS[3], 'age': 200})
+    lines[7] = 'not json'
+    _write_jsonl(tmp_path / 'in.jsonl', lines)
+
+    counts = score_file(str(tmp_path / 'in.jsonl'),
+                        str(tmp_path / 'out.jsonl'), chunk_size=4, workers=0)
+
+    assert counts['rows'] == 25, "All rows should be counted"
+    assert counts['scored'] == 23, "Valid rows should be scored"
+    assert counts['rejected'] == 2, "Invalid rows should be rejected"
+
+    results = _read_jsonl(tmp_path / 'out.jsonl')
+    expected_rows = [i for i in range(25) if i not in (3, 7)]
+    assert [r['row'] for r in results] == expected_rows, (
+        "Results should be written in input order"
+    )
+    expected = _expected_predictions([RECORDS[i] for i in expected_rows])
+    assert [r['prediction'] for r in results] == expected, (
+        "Offline scores should match make_predictions"
+    )
+
+    errors = _read_jsonl(tmp_path / 'out.errors.jsonl')
+    assert [e['row'] for e in errors] == [3, 7], "Rejected rows mismatch"
+    assert 'age' in errors[0]['error'], "Error should name the bad field"
+    assert errors[1]['record'] == 'not json', "Raw line should be kept"
+
+
+def test_score_csv_with_process_pool(tmp_path):
+    with open(tmp_path / 'in.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(RECORDS[0]))
+        writer.writeheader()
+        writer.writerows(RECORDS)
+        writer.writerow({**RECORDS[0], 'class': ''})
+
+    counts = score_file(str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'),
+                        errors_path=str(tmp_path / 'errors.jsonl'),
+                        chunk_size=3, workers=2)
+
+    assert counts['scored'] == 25, "Valid rows should be scored"
+    assert counts['rejected'] == 1, "Row with an empty cell should be rejected"
+    with open(tmp_path / 'out.csv') as f:
+        results = list(csv.DictReader(f))
+    assert [int(r['row']) for r in results] == list(range(25)), (
+        "Results should be written in input order"
+    )
+    assert [float(r['prediction']) for r in results] == (
+        _expected_predictions(RECORDS)
+    ), "Pool scores should match make_predictions"
+
+
+def test_score_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    pd.DataFrame(RECORDS).to_parquet(tmp_path / 'in.parquet')
+
+    counts = score_file(str(tmp_path / 'in.parquet'),
+                        str(tmp_path / 'out.jsonl'), chunk_size=10, workers=0)
+
+    assert counts['scored'] == 25, "Valid rows should be scored"
+
+
+def test_read_chunks_sizes(tmp_path):
+    _write_jsonl(tmp_path / 'in.jsonl', [json.dumps(r) for r in RECORDS])
+
+    chunks = list(read_chunks(str(tmp_path / 'in.jsonl'), chunk_size=10))
+
+    assert [start for start, _ in chunks] == [0, 10, 20], "Chunk starts"
+    assert [len(records) for _, records in chunks] == [10, 10, 5], (
+        "Chunk sizes"
+    )
+
+
+def test_read_chunks_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        list(read_chunks(str(tmp_path / 'in.txt')))
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from backend.train_and_save_model import update_and_save_model
+from backend.utils.data_loader import FEATURES, preprocess_data
+from backend.utils.feature_encoder import FeatureEncoder, model_encoder
+from backend.utils.metrics_storage import load_metrics
+from backend.utils.model_serializer import (save_model, load_model,
+                                            get_model_hash)
+from backend.utils.model_trainer import train_model
+from backend.utils.synthetic_data import generate_dataset
+
+PARAMS = {'objective': 'binary:logistic', 'max_depth': 3, 'nthread': 1}
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {
+        'model_path': str(tmp_path / 'model.ubj'),
+        'metrics_path': str(tmp_path / 'metrics.json'),
+        'lookup_table_path': str(tmp_path / 'lookup_table.npy'),
+    }
+
+
+def _save_current_model(paths, n_rows):
+    X, y = preprocess_data(generate_dataset(n_rows))
+    model = train_model(X, y, PARAMS)
+    save_model(model, paths['model_path'])
+    return get_model_hash(model)
+
+
+def test_update_and_save_model_keeps_improvement(tmp_path, paths):
+    model_hash = _save_current_model(paths, 50)
+    data_path = tmp_path / 'new_data.csv'
+    generate_dataset(3000, seed=1).to_csv(data_path, index=False)
+
+    assert update_and_save_model(str(data_path), **paths)
+
+    updated = load_model(paths['model_path'])
+    assert get_model_hash(updated) != model_hash, (
+        "The updated model should be saved as a new version"
+    )
+    assert len(load_metrics(paths['metrics_path'])['auc']) == 1
+
+
+def test_update_and_save_model_rejects_regression(tmp_path, paths):
+    model_hash = _save_current_model(paths, 3000)
+    # The rows boosted on have random labels; the recent holdout does not
+    new_data = generate_dataset(3000, seed=1)
+    rng = np.random.default_rng(0)
+    new_data.loc[:2399, 'satisfaction'] = rng.choice(
+        ['satisfied', 'dissatisfied'], 2400)
+    data_path = tmp_path / 'new_data.csv'
+    new_data.to_csv(data_path, index=False)
+
+    assert not update_and_save_model(str(data_path), **paths)
+
+    assert get_model_hash(load_model(paths['model_path'])) == model_hash, (
+        "A regressing update should not replace the model"
+    )
+
+
+def test_update_and_save_model_uses_the_encoding_of_the_model(tmp_path,
+                                                              paths):
+    # A categorical model, updated while FEATURE_MODE is 'one_hot'
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    X, y = preprocess_data(generate_dataset(50), encoder)
+    model = encoder.attach(train_model(X, y, PARAMS, 10,
+                                       encoder.feature_types))
+    save_model(model, paths['model_path'])
+    data_path = tmp_path / 'new_data.csv'
+    generate_dataset(3000, seed=1).to_csv(data_path, index=False)
+
+    assert update_and_save_model(str(data_path), **paths)
+
+    updated = load_model(paths['model_path'])
+    assert updated.feature_types == encoder.feature_types
+    assert model_encoder(updated).categorical, (
+        "The updated model should keep its categorical encoding"
+    )
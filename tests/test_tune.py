@@ -0,0 +1,18 @@
+from backend.tune import tune
+from backend.utils.params_storage import load_params
+from backend.utils.synthetic_data import generate_dataset
+
+
+def test_tune_writes_params_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_dataset(1000).to_csv('data.csv', index=False)
+
+    result = tune('data.csv', 'params.json', n_trials=3, budget_seconds=60,
+                  n_jobs=1)
+
+    params = load_params('params.json')
+    assert params['XGB_PARAMS'] == result['params']
+    assert params['XGB_NUM_BOOST_ROUND'] == result['num_boost_round']
+    assert 'nthread' not in params['XGB_PARAMS'], (
+        "Thread counts should be left to the CPU plan"
+    )
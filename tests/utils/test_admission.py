@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from backend.utils.admission import AdmissionController, AdmissionRejected
+
+
+def test_acquire_and_release():
+    admission = AdmissionController(max_concurrency=2, max_queue=0)
+
+    first = admission.acquire()
+    admission.acquire()
+    assert admission.stats()['in_flight'] == 2, "Both requests are admitted"
+
+    admission.release(first)
+    stats = admission.stats()
+    assert stats['in_flight'] == 1, "Release should free a slot"
+    assert stats['admitted_total'] == 2, "Admissions should be counted"
+
+
+def test_full_queue_is_shed_with_429():
+    admission = AdmissionController(max_concurrency=1, max_queue=0)
+    admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        admission.acquire()
+
+    assert excinfo.value.status == 429, "Queue overflow should return 429"
+    assert excinfo.value.retry_after >= 1, "Retry-After should be positive"
+    assert admission.stats()['shed_total']['queue_full'] == 1
+
+
+def test_queued_request_times_out_with_503():
+    admission = AdmissionController(max_concurrency=1, max_queue=1,
+                                    max_wait_ms=10)
+    admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        admission.acquire()
+
+    assert excinfo.value.reason == 'queue_timeout', "Wait should time out"
+    assert excinfo.value.status == 503, "Wait timeout should return 503"
+    assert admission.stats()['queued_total'] == 1, "Wait should be counted"
+    assert admission.stats()['queued'] == 0, "Queue should be empty again"
+
+
+def test_queued_request_is_admitted_when_slot_frees():
+    admission = AdmissionController(max_concurrency=1, max_queue=1,
+                                    max_wait_ms=5000)
+    first = admission.acquire()
+    admitted = threading.Event()
+
+    def wait():
+        admission.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    while admission.stats()['queued'] == 0:
+        time.sleep(0.001)
+    admission.release(first)
+    thread.join(5)
+
+    assert admitted.is_set(), "Queued request should get the freed slot"
+
+
+def test_expired_deadline_is_rejected():
+    admission = AdmissionController(max_concurrency=1)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        admission.acquire(deadline=time.time() - 1)
+
+    assert excinfo.value.reason == 'deadline', "Late requests are rejected"
+    assert excinfo.value.status == 503, "Deadline should return 503"
+    assert admission.stats()['in_flight'] == 0, "Nothing should be admitted"
+
+
+def test_deadline_shorter_than_service_time_is_rejected():
+    admission = AdmissionController(max_concurrency=1)
+    admission.service_time = 1.0
+
+    with pytest.raises(AdmissionRejected):
+        admission.acquire(deadline=time.time() + 0.5)
+    admission.acquire(deadline=time.time() + 5)
+
+
+def test_service_time_is_averaged():
+    admission = AdmissionController(max_concurrency=1)
+    admission.release(admission.acquire() - 1.0)
+
+    assert 0.09 < admission.stats()['service_time_seconds'] < 0.2, (
+        "Service time should move towards the observed duration"
+    )
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from backend.utils.artifact_store import ArtifactStore, file_hash
+
+
+def _write(content: bytes):
+    def write(folder):
+        with open(os.path.join(folder, 'data.bin'), 'wb') as f:
+            f.write(content)
+    return write
+
+
+def test_key_follows_inputs():
+    key = ArtifactStore.key('train', 'abc', {'eta': 0.3, 'max_depth': 6})
+
+    assert key.startswith('train-')
+    assert key == ArtifactStore.key('train', 'abc',
+                                    {'max_depth': 6, 'eta': 0.3}), (
+        "The order of parameters should not matter"
+    )
+    assert key != ArtifactStore.key('train', 'abc', {'eta': 0.1,
+                                                     'max_depth': 6})
+    assert key != ArtifactStore.key('train', 'abd', {'eta': 0.3,
+                                                     'max_depth': 6})
+
+
+def test_put_and_get(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    assert store.get('train-1') is None
+
+    path = store.put('train-1', _write(b'model'))
+
+    assert store.get('train-1') == path
+    with open(os.path.join(path, 'data.bin'), 'rb') as f:
+        assert f.read() == b'model'
+
+
+def test_failed_put_leaves_no_entry(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+
+    def write(folder):
+        raise OSError("disk full")
+
+    assert store.put('train-1', write) is None
+    assert store.get('train-1') is None
+    assert os.listdir(tmp_path) == [], "The staging folder should be removed"
+
+    def write_partially(folder):
+        with open(os.path.join(folder, 'model.ubj'), 'wb') as f:
+            f.write(b'x')
+        raise TypeError("not serializable")
+
+    with pytest.raises(TypeError):
+        store.put('train-1', write_partially)
+    assert store.get('train-1') is None
+    assert os.listdir(tmp_path) == [], "The staging folder should be removed"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_size_mb=2.5 / 1024)
+    for i, key in enumerate(['a', 'b']):
+        path = store.put(key, _write(b'x' * 1024))
+        os.utime(path, (i, i))
+    # Reading 'a' makes 'b' the least recently used entry
+    store.get('a')
+
+    store.put('c', _write(b'x' * 1024))
+
+    assert store.get('b') is None, "The least recently used entry is evicted"
+    assert store.get('a') is not None
+    assert store.get('c') is not None
+
+
+def test_never_evicts_new_entry(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_size_mb=1 / 1024)
+
+    path = store.put('big', _write(b'x' * 4096))
+
+    assert path is not None and store.get('big') == path
+
+
+def test_file_hash(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(b'a,b\n1,2\n')
+    digest = file_hash(str(path))
+
+    assert digest == file_hash(str(path))
+    path.write_bytes(b'a,b\n1,3\n')
+    assert digest != file_hash(str(path))
+
+
+def test_entries_skip_staging_folders_and_files(tmp_path):
+    (tmp_path / '.staging-x').mkdir()
+    (tmp_path / 'notes.txt').write_text('x')
+
+    assert ArtifactStore(str(tmp_path)).entries() == []
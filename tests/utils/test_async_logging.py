@@ -0,0 +1,149 @@
+import json
+import logging
+import sys
+import threading
+
+from backend.utils.async_logging import (JSONFormatter, SamplingFilter,
+                                         AsyncLogHandler, configure_logging)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.records = []
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        self.records.append(record)
+
+
+def _record(msg='Prediction made: %s', args=(0.5,), **extra):
+    record = logging.makeLogRecord({'msg': msg, 'args': args,
+                                    'levelname': 'INFO',
+                                    'levelno': logging.INFO})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JSONFormatter().format(_record(event='prediction')))
+
+    assert entry['message'] == 'Prediction made: 0.5', "Message not merged"
+    assert entry['level'] == 'INFO', "Wrong level"
+    assert entry['event'] == 'prediction', "Extra fields should be included"
+    assert 'time' in entry and 'process' in entry, "Missing record fields"
+
+
+def test_json_formatter_includes_exception():
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        record = logging.makeLogRecord({'msg': 'failed',
+                                        'exc_info': sys.exc_info()})
+
+    entry = json.loads(JSONFormatter().format(record))
+
+    assert 'ValueError: boom' in entry['exception'], "Missing traceback"
+
+
+def test_sampling_filter_samples_only_listed_events():
+    sampling = SamplingFilter({'prediction': 0.0, 'batch_prediction': 1.0})
+
+    assert not sampling.filter(_record(event='prediction')), (
+        "Records of an event with rate 0 should be dropped"
+    )
+    assert sampling.filter(_record(event='batch_prediction')), (
+        "Records of an event with rate 1 should be kept"
+    )
+    assert sampling.filter(_record(event='other')), (
+        "Records of events without a rate should be kept"
+    )
+    assert sampling.filter(_record()), "Records without an event are kept"
+
+
+def test_handler_writes_records_on_background_thread():
+    target = ListHandler()
+    threads = []
+    emit = target.emit
+    target.emit = lambda record: (threads.append(threading.current_thread()),
+                                  emit(record))
+    handler = AsyncLogHandler([target], maxsize=100)
+
+    for i in range(10):
+        handler.handle(_record(args=(i,)))
+    handler.close()
+
+    assert [r.getMessage() for r in target.records] == [
+        f'Prediction made: {i}' for i in range(10)], (
+        "All records should be written in order once the handler is closed"
+    )
+    assert threading.current_thread() not in threads, (
+        "Records should be written by the background thread"
+    )
+
+
+def test_handler_merges_arguments_when_queued():
+    target = ListHandler()
+    handler = AsyncLogHandler([target], maxsize=10)
+    values = [1]
+
+    handler.handle(_record(msg='values: %s', args=(values,)))
+    values.append(2)
+    handler.close()
+
+    assert target.records[0].getMessage() == 'values: [1]', (
+        "Arguments should be merged before later changes"
+    )
+
+
+def test_handler_drops_and_counts_when_queue_is_full():
+    gate = threading.Event()
+    target = ListHandler(gate)
+    handler = AsyncLogHandler([target], maxsize=2)
+
+    for i in range(10):
+        handler.handle(_record(args=(i,)))
+    stats = handler.stats()
+    gate.set()
+    handler.close()
+
+    assert stats['dropped'] >= 7, "Records beyond the queue should be dropped"
+    assert len(target.records) + handler.dropped == 10, (
+        "Every record should be either written or counted as dropped"
+    )
+
+
+def test_configure_logging_sync_mode_returns_none():
+    root = logging.getLogger()
+    saved = root.handlers[:]
+    try:
+        assert configure_logging(settings={'ENABLED': False}) is None, (
+            "Sync mode should not install an async handler"
+        )
+    finally:
+        root.handlers[:] = saved
+
+
+def test_configure_logging_async_mode():
+    root = logging.getLogger()
+    saved = root.handlers[:]
+    settings = {'ENABLED': True, 'QUEUE_SIZE': 5,
+                'SAMPLE_RATES': {'prediction': 0.0}}
+    try:
+        handler = configure_logging(settings=settings)
+
+        assert root.handlers == [handler], (
+            "The async handler should replace the root handlers"
+        )
+        assert all(isinstance(target.formatter, JSONFormatter)
+                   for target in handler.handlers), (
+            "Target handlers should write JSON"
+        )
+        assert not handler.filter(_record(event='prediction')), (
+            "The handler should sample records by event"
+        )
+        handler.close()
+    finally:
+        root.handlers[:] = saved
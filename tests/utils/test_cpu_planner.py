@@ -0,0 +1,117 @@
+import os
+
+import xgboost as xgb
+
+from backend.utils.cpu_planner import (cgroup_cpu_limit, available_cpus,
+                                       plan_cpus, admission_threads,
+                                       configure_booster, training_params)
+
+
+ADMISSION = {'ENABLED': True, 'MAX_CONCURRENCY': 2, 'MAX_QUEUE': 3}
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def test_cgroup_v2_quota(tmp_path):
+    _write(tmp_path / 'cpu.max', '150000 100000\n')
+    assert cgroup_cpu_limit(str(tmp_path)) == 1.5, "Quota should be read"
+
+
+def test_cgroup_v2_without_quota(tmp_path):
+    _write(tmp_path / 'cpu.max', 'max 100000\n')
+    assert cgroup_cpu_limit(str(tmp_path)) is None, "'max' means no quota"
+
+
+def test_cgroup_v1_quota(tmp_path):
+    _write(tmp_path / 'cpu,cpuacct' / 'cpu.cfs_quota_us', '200000\n')
+    _write(tmp_path / 'cpu,cpuacct' / 'cpu.cfs_period_us', '100000\n')
+    assert cgroup_cpu_limit(str(tmp_path)) == 2.0, "Quota should be read"
+
+
+def test_cgroup_v1_without_quota(tmp_path):
+    _write(tmp_path / 'cpu' / 'cpu.cfs_quota_us', '-1\n')
+    _write(tmp_path / 'cpu' / 'cpu.cfs_period_us', '100000\n')
+    assert cgroup_cpu_limit(str(tmp_path)) is None, "-1 means no quota"
+
+
+def test_no_cgroup(tmp_path):
+    assert cgroup_cpu_limit(str(tmp_path)) is None, "No files, no quota"
+
+
+def test_available_cpus_is_capped_by_quota(tmp_path):
+    _write(tmp_path / 'cpu.max', '50000 100000\n')
+    assert available_cpus(str(tmp_path)) == 1, (
+        "A fractional quota should round up to at least one CPU"
+    )
+    assert available_cpus(str(tmp_path / 'none')) >= 1
+
+
+def test_plan_cpus_defaults():
+    plan = plan_cpus(cpus=8, workers=None, threads=1, inference_nthread=None,
+                     training_nthread=None)
+    assert plan['workers'] == 8, "One sync worker per CPU"
+    assert plan['inference_nthread'] == 1, "Workers should not oversubscribe"
+    assert plan['training_nthread'] == 8, "Training uses all CPUs"
+
+
+def test_plan_cpus_shares_cpus_between_workers():
+    plan = plan_cpus(cpus=8, workers=3, threads=1, inference_nthread=None,
+                     training_nthread=None)
+    assert plan['inference_nthread'] == 2, "Each worker gets its share"
+
+    plan = plan_cpus(cpus=8, workers=None, threads=4, inference_nthread=None,
+                     training_nthread=None)
+    assert plan['workers'] == 2, "Workers times threads should fill the CPUs"
+    assert plan['inference_nthread'] == 1
+
+
+def test_plan_cpus_keeps_explicit_values():
+    plan = plan_cpus(cpus=8, workers=2, threads=1, inference_nthread=3,
+                     training_nthread=6)
+    assert plan['inference_nthread'] == 3
+    assert plan['training_nthread'] == 6
+
+
+def test_plan_cpus_threads_cover_admission_limits():
+    plan = plan_cpus(cpus=8, workers=None, threads=None,
+                     inference_nthread=None, training_nthread=None,
+                     admission=ADMISSION)
+    assert plan['threads'] == 6, (
+        "Threads should exceed the admitted and queued requests"
+    )
+    assert plan['workers'] == 4, "Workers times admitted should fill the CPUs"
+    assert plan['inference_nthread'] == 1
+
+    plan = plan_cpus(cpus=8, workers=None, threads=None,
+                     inference_nthread=None, training_nthread=None,
+                     admission={**ADMISSION, 'ENABLED': False})
+    assert plan['threads'] == 1, "Without admission control, sync workers"
+    assert plan['workers'] == 8
+
+
+def test_admission_threads():
+    assert admission_threads(ADMISSION) == 6
+    assert admission_threads({**ADMISSION, 'ENABLED': False}) == 1
+
+
+def test_configure_booster():
+    dtrain = xgb.DMatrix([[0], [1]], label=[0, 1])
+    model = xgb.train({'nthread': 4}, dtrain, num_boost_round=1)
+
+    configure_booster(model, 1)
+
+    assert '"nthread":"1"' in model.save_config(), "nthread should be set"
+    configure_booster(object(), 1)
+
+
+def test_training_params():
+    assert training_params({'eta': 0.3})['nthread'] >= 1, (
+        "Planned threads should be added"
+    )
+    assert training_params({'nthread': 2})['nthread'] == 2, (
+        "An explicit thread count should be kept"
+    )
@@ -1,7 +1,12 @@
+from unittest.mock import patch
+
 import pandas as pd
 import pytest
 
-from backend.utils.data_loader import load_data, preprocess_data
+from backend.utils.data_loader import (load_data, preprocess_data,
+                                       load_dataset, dataset_cache_key,
+                                       iter_dataset, COLUMNS_TO_KEEP)
+from backend.utils.synthetic_data import generate_dataset
 from backend.config import DATASET_FILE_PATH
 
 
@@ -53,3 +58,73 @@ def test_preprocess_data():
     assert y.equals(pd.Series([1, 0])), (
         "y should be equal to pd.Series([1, 0])"
     )
+
+
+def _write_dataset(path, n_rows=200, seed=0):
+    df = generate_dataset(n_rows, seed)
+    df['Gender'] = 'Female'
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_load_data_reads_kept_columns_with_compact_dtypes(tmp_path):
+    path = tmp_path / 'data.csv'
+    _write_dataset(path)
+
+    df = load_data(str(path))
+
+    assert 'Gender' not in df.columns, "Unused columns should not be read"
+    assert len(df.columns) == len(COLUMNS_TO_KEEP)
+    assert df['Flight Distance'].dtype == 'uint16'
+    assert df['Online Boarding'].dtype == 'int8'
+    assert df['Class'].dtype == 'category'
+
+
+def test_load_dataset_matches_preprocess_data(tmp_path):
+    path = tmp_path / 'data.csv'
+    X_expected, y_expected = preprocess_data(_write_dataset(path))
+
+    X, y = load_dataset(str(path), cache_folder_path=None)
+
+    pd.testing.assert_frame_equal(X, X_expected)
+    pd.testing.assert_series_equal(y, y_expected)
+
+
+def test_load_dataset_cache(tmp_path):
+    path = tmp_path / 'data.csv'
+    _write_dataset(path)
+    cache = str(tmp_path / 'cache')
+
+    X, y = load_dataset(str(path), cache_folder_path=cache)
+    with patch('backend.utils.data_loader.load_data',
+               side_effect=AssertionError("cache not used")):
+        X_cached, y_cached = load_dataset(str(path), cache_folder_path=cache)
+
+    pd.testing.assert_frame_equal(X_cached, X)
+    pd.testing.assert_series_equal(y_cached, y)
+
+
+def test_dataset_cache_key_follows_content(tmp_path):
+    path = tmp_path / 'data.csv'
+    _write_dataset(path, seed=0)
+    key = dataset_cache_key(str(path))
+    assert dataset_cache_key(str(path)) == key, "Key should be stable"
+
+    _write_dataset(path, seed=1)
+    assert dataset_cache_key(str(path)) != key, (
+        "A changed file should get a new cache key"
+    )
+
+
+def test_iter_dataset_chunks_match_load_dataset(tmp_path):
+    path = tmp_path / 'data.csv'
+    _write_dataset(path)
+    X_expected, y_expected = load_dataset(str(path), cache_folder_path=None)
+
+    chunks = list(iter_dataset(str(path), chunk_size=64))
+
+    assert [len(y) for _, y in chunks] == [64, 64, 64, 8]
+    pd.testing.assert_frame_equal(pd.concat([X for X, _ in chunks]),
+                                  X_expected)
+    pd.testing.assert_series_equal(pd.concat([y for _, y in chunks]),
+                                   y_expected)
@@ -0,0 +1,131 @@
+import os
+import subprocess
+import sys
+import tracemalloc
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from backend.utils.data_loader import FEATURES
+from backend.utils.feature_encoder import FeatureEncoder
+from backend.utils.external_memory import (train_external, chunk_size_for,
+                                           in_holdout, DatasetIter)
+from backend.utils.model_evaluator import N_SPLITS
+from backend.utils.synthetic_data import generate_dataset
+
+PARAMS = {'objective': 'binary:logistic', 'max_depth': 3, 'nthread': 1}
+
+
+def _write_dataset(path, n_rows):
+    generate_dataset(n_rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_in_holdout_selects_one_fold():
+    holdout = in_holdout(np.arange(100_000))
+
+    assert abs(holdout.mean() - 1 / N_SPLITS) < 0.01
+    assert not holdout[:N_SPLITS].all(), (
+        "Consecutive rows should not fall into the same fold"
+    )
+
+
+def test_dataset_iter_splits_rows(tmp_path):
+    path = _write_dataset(tmp_path / 'data.csv', 3000)
+
+    def rows(selection):
+        return np.concatenate([
+            X.index.to_numpy()
+            for X, _ in DatasetIter(path, 1000, selection).chunks()])
+
+    train, holdout = rows('train'), rows('holdout')
+    assert len(train) + len(holdout) == 3000
+    assert np.intersect1d(train, holdout).size == 0
+    assert np.array_equal(rows('holdout'), holdout), (
+        "Every pass should select the same rows"
+    )
+
+
+def test_train_external_parsed_chunks_stay_under_memory_cap(tmp_path):
+    # tracemalloc only sees Python and NumPy allocations: this checks the
+    # parsed chunks, not XGBoost's native pages, gradients and histograms
+    path = _write_dataset(tmp_path / 'data.csv', 100_000)
+    memory_cap_mb = 4
+    assert chunk_size_for(path, memory_cap_mb) < 50_000, (
+        "The dataset should not fit into one chunk"
+    )
+
+    tracemalloc.start()
+    try:
+        model, raw_metrics = train_external(
+            path, PARAMS, memory_cap_mb, str(tmp_path / 'cache'))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < memory_cap_mb * 2**20, (
+        f"Peak of the parsed chunks of {peak / 2**20:.1f} MB exceeds the cap"
+    )
+    assert isinstance(model, xgb.Booster)
+    assert 'online_boarding' in model.feature_names
+    assert raw_metrics['auc'][0] > 0.7, "Holdout AUC should be reasonable"
+    assert list((tmp_path / 'cache').iterdir()) == [], (
+        "XGBoost's pages should be removed"
+    )
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/clear_refs'),
+                    reason="Needs Linux peak RSS accounting")
+def test_train_external_peak_rss_below_in_memory_training(tmp_path):
+    # The peak resident set of a fresh process covers XGBoost's native
+    # memory too; in-memory training holds the whole dataset instead
+    path = _write_dataset(tmp_path / 'data.csv', 400_000)
+
+    external = _peak_rss_growth(
+        f"train_external({path!r}, PARAMS, 4, {str(tmp_path / 'cache')!r}, "
+        f"num_boost_round=10)")
+    in_memory = _peak_rss_growth(
+        f"train_model(*load_dataset({path!r}, cache_folder_path=None), "
+        f"PARAMS, 10)")
+
+    assert external < 0.75 * in_memory, (
+        f"Peak RSS grew by {external / 2**20:.1f} MB training out of core, "
+        f"{in_memory / 2**20:.1f} MB in memory"
+    )
+
+
+def _peak_rss_growth(statement: str) -> int:
+    """Growth of the peak RSS of a fresh process running a statement, in
+    bytes, from its RSS after importing the training modules."""
+    # A child inherits the peak of the process that forked it, so the peak
+    # is reset through clear_refs and read from VmHWM instead of ru_maxrss
+    code = (
+        "from backend.utils.data_loader import load_dataset\n"
+        "from backend.utils.external_memory import train_external\n"
+        "from backend.utils.model_trainer import train_model\n"
+        "def peak():\n"
+        "    with open('/proc/self/status') as f:\n"
+        "        return next(int(line.split()[1]) for line in f\n"
+        "                    if line.startswith('VmHWM:'))\n"
+        "with open('/proc/self/clear_refs', 'w') as f:\n"
+        "    f.write('5')\n"
+        "before = peak()\n"
+        f"PARAMS = {PARAMS!r}\n"
+        f"{statement}\n"
+        "print(peak() - before)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True)
+    # VmHWM is in kilobytes
+    return int(result.stdout.strip().splitlines()[-1]) * 1024
+
+
+def test_train_external_rejects_categorical_features(tmp_path):
+    path = _write_dataset(tmp_path / 'data.csv', 100)
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    with patch('backend.utils.external_memory.FEATURE_ENCODER', encoder):
+        with pytest.raises(ValueError):
+            train_external(path, PARAMS,
+                           cache_folder_path=str(tmp_path / 'cache'))
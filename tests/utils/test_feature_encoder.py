@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from backend.utils.feature_encoder import FeatureEncoder, model_encoder
+from backend.utils.data_loader import FEATURES, FEATURE_ENCODER
+
+
+RECORDS = [
+    {
+        'customer_type': 'loyal_customer',
+        'age': 35,
+        'type_of_travel': 'business_travel',
+        'flight_distance': 500,
+        'ease_of_online_booking': 3,
+        'online_boarding': 4,
+        'class_': 'business'
+    },
+    {
+        'customer_type': 'disloyal_customer',
+        'age': 22,
+        'type_of_travel': 'personal_travel',
+        'flight_distance': 1500,
+        'ease_of_online_booking': 1,
+        'online_boarding': 2,
+        'class': 'eco_plus'
+    },
+]
+
+
+def test_feature_names_match_training_layout():
+    assert FEATURE_ENCODER.feature_names == [
+        'customer_type', 'age', 'type_of_travel', 'flight_distance',
+        'ease_of_online_booking', 'online_boarding', 'class_business',
+        'class_eco', 'class_eco_plus'
+    ]
+
+
+def test_encode_records():
+    features = FEATURE_ENCODER.encode_records(RECORDS)
+    assert features.dtype == np.float32
+    np.testing.assert_array_equal(features, [
+        [1, 35, 1, 500, 3, 4, 1, 0, 0],
+        [0, 22, 0, 1500, 1, 2, 0, 0, 1],
+    ])
+
+
+def test_encode_columns_matches_encode_records():
+    df = pd.DataFrame(RECORDS)
+    df['class'] = df['class'].fillna(df.pop('class_'))
+    np.testing.assert_array_equal(FEATURE_ENCODER.encode_columns(df),
+                                  FEATURE_ENCODER.encode_records(RECORDS))
+
+
+def test_encode_into_preallocated_buffer():
+    out = np.empty((2, FEATURE_ENCODER.n_features), dtype=np.float32)
+    features = FEATURE_ENCODER.encode_records(RECORDS, out=out)
+    assert features is out, "Encoder should write into the given buffer"
+
+
+def test_encode_into_buffer_with_wrong_shape():
+    out = np.empty((3, FEATURE_ENCODER.n_features), dtype=np.float32)
+    with pytest.raises(ValueError):
+        FEATURE_ENCODER.encode_records(RECORDS, out=out)
+
+
+def test_encode_columns_unknown_category():
+    columns = {name: np.array([0]) for name in FEATURES}
+    columns['customer_type'] = np.array(['unknown'])
+    columns['type_of_travel'] = np.array(['business_travel'])
+    columns['class'] = np.array(['eco'])
+    with pytest.raises(ValueError):
+        FEATURE_ENCODER.encode_columns(columns)
+
+
+def test_encode_columns_missing_column():
+    encoder = FeatureEncoder(['age', 'class'])
+    with pytest.raises(KeyError):
+        encoder.encode_columns({'age': np.array([30])})
+
+
+def test_categorical_mode_codes_categories_in_place():
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    assert encoder.feature_names == FEATURES
+    assert encoder.feature_types == ['c', 'q', 'c', 'c', 'q', 'q', 'q']
+    assert encoder.one_hot_groups == []
+    np.testing.assert_array_equal(encoder.encode_records(RECORDS), [
+        [1, 35, 1, 0, 500, 3, 4],
+        [0, 22, 0, 2, 1500, 1, 2],
+    ])
+
+
+def test_encoding_is_saved_with_the_model():
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    dtrain = xgb.DMatrix(encoder.encode_records(RECORDS), label=[0, 1],
+                         feature_names=encoder.feature_names,
+                         feature_types=encoder.feature_types)
+    model = encoder.attach(xgb.train({}, dtrain, num_boost_round=1))
+    loaded = xgb.Booster(model_file=bytearray(model.save_raw('ubj')))
+
+    restored = model_encoder(loaded)
+    assert restored.feature_types == encoder.feature_types
+    np.testing.assert_array_equal(restored.encode_records(RECORDS),
+                                  encoder.encode_records(RECORDS))
+
+
+def test_model_encoder_default():
+    dtrain = xgb.DMatrix(FEATURE_ENCODER.encode_records(RECORDS),
+                         label=[0, 1])
+    model = xgb.train({}, dtrain, num_boost_round=1)
+    assert model_encoder(model) is None, "The model has no saved encoding"
+    assert model_encoder(model, FEATURE_ENCODER) is FEATURE_ENCODER
@@ -0,0 +1,20 @@
+from backend.utils.histogram import Histogram
+
+
+def test_histogram_snapshot():
+    histogram = Histogram([1, 5, 10])
+    for value in [0.5, 1, 3, 7, 100]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {'1': 2, '5': 3, '10': 4, '+Inf': 5}, (
+        f"Unexpected buckets: {snapshot['buckets']}"
+    )
+    assert snapshot['count'] == 5
+    assert snapshot['sum'] == 111.5
+
+
+def test_empty_histogram():
+    snapshot = Histogram([0.001]).snapshot()
+    assert snapshot == {'buckets': {'0.001': 0, '+Inf': 0},
+                        'count': 0, 'sum': 0.0}
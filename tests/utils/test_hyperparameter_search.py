@@ -0,0 +1,76 @@
+import pytest
+
+from backend.utils.data_loader import preprocess_data
+from backend.utils.hyperparameter_search import (sample_configurations,
+                                                 successive_halving)
+from backend.utils.synthetic_data import generate_dataset
+
+SPACE = {
+    'eta': ('log', 0.05, 0.5),
+    'max_depth': ('int', 2, 4),
+    'subsample': ('uniform', 0.5, 1.0),
+}
+BASE_PARAMS = {'objective': 'binary:logistic', 'seed': 42}
+
+
+@pytest.fixture(scope='module')
+def data():
+    return preprocess_data(generate_dataset(1000))
+
+
+def test_sample_configurations_within_space():
+    configurations = sample_configurations(50, SPACE, BASE_PARAMS)
+
+    assert len(configurations) == 50
+    for params in configurations:
+        assert params['objective'] == 'binary:logistic'
+        assert 0.05 <= params['eta'] <= 0.5
+        assert params['max_depth'] in (2, 3, 4)
+        assert 0.5 <= params['subsample'] <= 1.0
+    assert configurations == sample_configurations(50, SPACE, BASE_PARAMS), (
+        "The same seed should draw the same configurations"
+    )
+
+
+def test_sample_configurations_unknown_distribution():
+    with pytest.raises(ValueError):
+        sample_configurations(1, {'eta': ('normal', 0, 1)}, {})
+
+
+def test_successive_halving_narrows_rungs(data):
+    X, y = data
+    configurations = sample_configurations(9, SPACE, BASE_PARAMS)
+
+    result = successive_halving(X, y, configurations, min_rounds=2,
+                                reduction_factor=3, budget_seconds=60,
+                                early_stopping_rounds=2, n_jobs=1)
+
+    rungs = {}
+    for record in result['trials']:
+        rungs.setdefault(record['max_rounds'], []).append(record)
+    assert {rounds: len(rung) for rounds, rung in rungs.items()} == {
+        2: 9, 6: 3, 18: 1}
+    assert result['params'] in configurations
+    assert result['params'] == rungs[18][0]['params']
+    assert 1 <= result['num_boost_round'] <= 18
+    assert 0.5 < result['auc'] <= 1.0
+
+
+def test_successive_halving_in_pool_matches_in_process(data):
+    X, y = data
+    configurations = sample_configurations(3, SPACE,
+                                           {**BASE_PARAMS, 'nthread': 1})
+    kwargs = {'min_rounds': 2, 'budget_seconds': 60,
+              'early_stopping_rounds': 2}
+
+    in_process = successive_halving(X, y, configurations, n_jobs=1, **kwargs)
+    in_pool = successive_halving(X, y, configurations, n_jobs=2, **kwargs)
+
+    assert in_pool['trials'] == in_process['trials']
+
+
+def test_successive_halving_out_of_budget(data):
+    X, y = data
+    with pytest.raises(TimeoutError):
+        successive_halving(X, y, sample_configurations(3, SPACE),
+                           budget_seconds=0, n_jobs=1)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from backend.utils.data_loader import preprocess_data
+from backend.utils.incremental_trainer import (continue_training,
+                                               split_recent, evaluate_update)
+from backend.utils.model_trainer import train_model
+from backend.utils.synthetic_data import generate_dataset
+
+PARAMS = {'objective': 'binary:logistic', 'max_depth': 3, 'nthread': 1}
+
+
+@pytest.fixture(scope='module')
+def data():
+    return preprocess_data(generate_dataset(4000))
+
+
+@pytest.fixture(scope='module')
+def model(data):
+    X, y = data
+    return train_model(X[:2000], y[:2000], PARAMS)
+
+
+def test_continue_training_boost_adds_trees(data, model):
+    X, y = data
+    rounds = model.num_boosted_rounds()
+    predictions = model.predict(xgb.DMatrix(X))
+
+    updated = continue_training(model, X[2000:], y[2000:], PARAMS,
+                                mode='boost', num_boost_round=3)
+
+    assert updated.num_boosted_rounds() == rounds + 3
+    assert model.num_boosted_rounds() == rounds, (
+        "The current model should be left unchanged"
+    )
+    np.testing.assert_array_equal(model.predict(xgb.DMatrix(X)), predictions)
+
+
+def test_continue_training_refresh_keeps_trees(data, model):
+    X, y = data
+    # Refit to inverted labels, so the leaf values have to change
+    updated = continue_training(model, X[2000:], 1 - y[2000:], PARAMS,
+                                mode='refresh')
+
+    assert updated.num_boosted_rounds() == model.num_boosted_rounds()
+    assert (updated.predict(xgb.DMatrix(X)).mean() !=
+            model.predict(xgb.DMatrix(X)).mean()), "Leaves should be refit"
+
+
+def test_continue_training_unknown_mode(data, model):
+    X, y = data
+    with pytest.raises(ValueError):
+        continue_training(model, X, y, PARAMS, mode='restart')
+
+
+def test_split_recent_holds_out_latest_rows(data):
+    X, y = data
+
+    X_train, y_train, X_holdout, y_holdout = split_recent(X, y, 0.25)
+
+    assert len(X_train) == len(y_train) == 3000
+    assert X_holdout.index.tolist() == list(range(3000, 4000))
+    assert y_holdout.index.equals(X_holdout.index)
+    with pytest.raises(ValueError):
+        split_recent(X[:2], y[:2], 0.1)
+
+
+def test_evaluate_update(data, model):
+    X, y = data
+    worse = continue_training(model, X[2000:3000], 1 - y[2000:3000], PARAMS,
+                              mode='refresh')
+
+    evaluation = evaluate_update(model, worse, X[3000:], y[3000:])
+    assert not evaluation['accepted'], "A regression should be rejected"
+    assert (evaluation['updated']['auc'][0] <
+            evaluation['current']['auc'][0])
+
+    evaluation = evaluate_update(model, model, X[3000:], y[3000:])
+    assert evaluation['accepted'], "An unchanged model should be accepted"
@@ -0,0 +1,101 @@
+import pytest
+
+from backend.utils.instrumentation import Instrumentation
+
+
+def test_timer_records_stage():
+    instrumentation = Instrumentation(buckets=[1])
+    with instrumentation.timer('encode'):
+        pass
+    snapshot = instrumentation.stages['encode'].snapshot()
+    assert snapshot['count'] == 1, "Timer should record one observation"
+    assert snapshot['buckets']['1'] == 1, "Duration should be below 1s"
+
+
+def test_timer_records_on_exception():
+    instrumentation = Instrumentation()
+    with pytest.raises(ValueError):
+        with instrumentation.timer('validate'):
+            raise ValueError('invalid')
+    assert instrumentation.stages['validate'].snapshot()['count'] == 1, (
+        "Failed stages should be timed too"
+    )
+
+
+def test_render_prometheus():
+    instrumentation = Instrumentation(buckets=[0.1, 1])
+    instrumentation.observe('predict', 0.05)
+    instrumentation.observe_request('predict', 200, 0.5)
+    instrumentation.observe_request('predict', 400, 0.01)
+    instrumentation.count_error('predict', 'ValidationError')
+
+    text = instrumentation.render_prometheus(model_version='abc')
+
+    expected_lines = [
+        '# TYPE skysatisfy_stage_duration_seconds histogram',
+        'skysatisfy_stage_duration_seconds_bucket{stage="predict",le="0.1"} 1',
+        'skysatisfy_stage_duration_seconds_bucket'
+        '{stage="predict",le="+Inf"} 1',
+        'skysatisfy_stage_duration_seconds_count{stage="predict"} 1',
+        'skysatisfy_request_duration_seconds_bucket'
+        '{endpoint="predict",le="0.1"} 1',
+        'skysatisfy_request_duration_seconds_count{endpoint="predict"} 2',
+        'skysatisfy_requests_total{endpoint="predict",status="200"} 1',
+        'skysatisfy_requests_total{endpoint="predict",status="400"} 1',
+        'skysatisfy_errors_total{endpoint="predict",type="ValidationError"} 1',
+        'skysatisfy_model_info{version="abc"} 1',
+    ]
+    lines = text.splitlines()
+    for line in expected_lines:
+        assert line in lines, f"Missing line: {line}"
+    assert text.endswith('\n'), "Exposition text should end with a newline"
+
+
+def test_render_extra_histograms():
+    instrumentation = Instrumentation()
+    snapshot = {'buckets': {'1': 2, '+Inf': 3}, 'count': 3, 'sum': 4.0}
+
+    text = instrumentation.render_prometheus(
+        histograms={'micro_batch_size': ('Records per batch.', snapshot)})
+
+    assert 'skysatisfy_micro_batch_size_bucket{le="+Inf"} 3' in text, (
+        "Extra histograms should be rendered without labels"
+    )
+    assert 'skysatisfy_micro_batch_size_count 3' in text, "Missing count"
+
+
+def test_label_values_are_escaped():
+    instrumentation = Instrumentation()
+    instrumentation.count_error('predict', 'Bad"Error')
+    assert 'type="Bad\\"Error"' in instrumentation.render_prometheus(), (
+        "Quotes in label values should be escaped"
+    )
+
+
+def test_render_extra_counters():
+    instrumentation = Instrumentation()
+
+    text = instrumentation.render_prometheus(
+        counters={'log_records_dropped_total': ('Dropped records.', 7)})
+
+    assert '# TYPE skysatisfy_log_records_dropped_total counter' in text, (
+        "Extra counters should be declared as counters"
+    )
+    assert 'skysatisfy_log_records_dropped_total 7' in text.splitlines(), (
+        "Extra counters should be rendered without labels"
+    )
+
+
+def test_render_extra_gauges_and_labelled_counters():
+    instrumentation = Instrumentation()
+
+    lines = instrumentation.render_prometheus(
+        counters={'shed_total': ('Shed requests.', 'reason',
+                                 {'deadline': 2})},
+        gauges={'in_flight': ('Requests in flight.', 3)}).splitlines()
+
+    assert 'skysatisfy_shed_total{reason="deadline"} 2' in lines, (
+        "Labelled counters should be rendered with their label"
+    )
+    assert '# TYPE skysatisfy_in_flight gauge' in lines, "Missing gauge type"
+    assert 'skysatisfy_in_flight 3' in lines, "Missing gauge value"
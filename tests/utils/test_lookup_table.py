@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from backend.utils.data_loader import FEATURES, FEATURE_ENCODER
+from backend.utils.feature_encoder import FeatureEncoder
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.lookup_table import (compile_lookup_table,
+                                        verify_lookup_table,
+                                        save_lookup_table,
+                                        load_lookup_table)
+from backend.utils.model_trainer import train_model
+from backend.utils.synthetic_data import generate_columns
+
+
+def _random_features(n_rows, seed=0):
+    return FEATURE_ENCODER.encode_columns(generate_columns(n_rows, seed))
+
+
+@pytest.fixture(scope='module')
+def model():
+    features = _random_features(2000)
+    X = pd.DataFrame(features, columns=FEATURE_ENCODER.feature_names)
+    y = pd.Series((features[:, 1] + features[:, 3] / 100 > 60).astype(int))
+    params = {'objective': 'binary:logistic', 'max_depth': 4}
+    return train_model(X, y, params)
+
+
+def test_lookup_table_matches_booster(model):
+    lookup_table = compile_lookup_table(model)
+    features = _random_features(5000, seed=1)
+    dmatrix = xgb.DMatrix(features,
+                          feature_names=FEATURE_ENCODER.feature_names)
+    np.testing.assert_array_equal(lookup_table.predict(features),
+                                  model.predict(dmatrix))
+
+
+def test_verify_lookup_table(model):
+    lookup_table = compile_lookup_table(model)
+    assert verify_lookup_table(lookup_table, model) == 0
+
+
+def test_compile_lookup_table_too_many_cells(model):
+    with pytest.raises(ValueError):
+        compile_lookup_table(model, max_cells=10)
+
+
+def test_save_and_load_lookup_table(model, tmp_path):
+    path = str(tmp_path / 'lookup_table.npy')
+    lookup_table = compile_lookup_table(model)
+    save_lookup_table(lookup_table, path)
+    loaded = load_lookup_table(path)
+    features = _random_features(100, seed=2)
+    np.testing.assert_array_equal(loaded.predict(features),
+                                  lookup_table.predict(features))
+    assert loaded.model_hash == lookup_table.model_hash
+
+
+def test_load_inference_engine(model, tmp_path):
+    path = str(tmp_path / 'lookup_table.npy')
+    save_lookup_table(compile_lookup_table(model), path)
+    assert load_inference_engine(model, 'native', path) is model
+    assert load_inference_engine(model, 'lookup', path) is not model
+    assert load_inference_engine(model, 'lookup', 'missing.npy') is model
+    with pytest.raises(ValueError):
+        load_inference_engine(model, 'unknown', path)
+
+
+def test_load_inference_engine_stale_table(model, tmp_path):
+    path = str(tmp_path / 'lookup_table.npy')
+    save_lookup_table(compile_lookup_table(model), path)
+    other = xgb.Booster(model_file=bytearray(model.save_raw('ubj')))
+    other.set_attr(note='retrained')
+    assert load_inference_engine(other, 'lookup', path) is other
+
+
+def test_lookup_table_with_categorical_features(tmp_path):
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    features = encoder.encode_columns(generate_columns(2000))
+    X = pd.DataFrame(features, columns=encoder.feature_names)
+    # Class is column 3, coded business, eco, eco_plus
+    y = pd.Series(((features[:, 3] == 2) ^ (features[:, 1] > 40)).astype(int))
+    model = encoder.attach(train_model(
+        X, y, {'objective': 'binary:logistic', 'max_depth': 4},
+        feature_types=encoder.feature_types))
+
+    lookup_table = compile_lookup_table(model)
+    assert {'name': 'class', 'column': 3, 'size': 3} in lookup_table.dims
+    assert verify_lookup_table(lookup_table, model) == 0
+
+    path = str(tmp_path / 'lookup_table.npy')
+    save_lookup_table(lookup_table, path)
+    loaded = load_lookup_table(path)
+    assert loaded.encoder.feature_types == encoder.feature_types
+    features = encoder.encode_columns(generate_columns(5000, seed=1))
+    dmatrix = xgb.DMatrix(features, feature_names=encoder.feature_names,
+                          feature_types=encoder.feature_types)
+    np.testing.assert_array_equal(loaded.predict(features),
+                                  model.predict(dmatrix))
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from backend.utils.micro_batcher import MicroBatcher
+
+
+def test_submit_returns_own_result():
+    batcher = MicroBatcher(lambda records: [r * 2 for r in records],
+                           max_batch_size=8, max_wait_ms=1)
+    assert batcher.submit(21) == 42
+
+
+def test_concurrent_submits_are_batched():
+    batches = []
+    barrier = threading.Barrier(8)
+
+    def score_batch(records):
+        batches.append(list(records))
+        return [r * 2 for r in records]
+
+    batcher = MicroBatcher(score_batch, max_batch_size=8, max_wait_ms=200)
+    results = {}
+
+    def call(value):
+        barrier.wait()
+        results[value] = batcher.submit(value)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i * 2 for i in range(8)}
+    assert len(batches) < 8, "Concurrent records should share batches"
+    assert sum(len(batch) for batch in batches) == 8
+
+
+def test_batch_size_limit():
+    batches = []
+
+    def score_batch(records):
+        batches.append(len(records))
+        return records
+
+    batcher = MicroBatcher(score_batch, max_batch_size=2, max_wait_ms=50)
+    threads = [threading.Thread(target=batcher.submit, args=(i,))
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(batches) <= 2
+
+
+def test_errors_are_raised_to_callers():
+    def score_batch(records):
+        raise ValueError("Test exception")
+
+    batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
+
+
+def test_missing_results_are_raised_to_callers():
+    def score_batch(records):
+        return records[1:]
+
+    batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError, match="0 results for a batch of 1"):
+        batcher.submit(1)
+
+
+def test_stats():
+    batcher = MicroBatcher(lambda records: records, max_batch_size=4,
+                           max_wait_ms=1)
+    batcher.submit(1)
+    stats = batcher.stats()
+    assert stats['batch_size']['count'] == 1
+    assert stats['queue_wait_seconds']['count'] == 1
+    assert stats['max_batch_size'] == 4
@@ -1,5 +1,12 @@
-from backend.utils.model_evaluator import evaluate_model, format_metrics
+from backend.utils.data_loader import preprocess_data
+from backend.utils.model_evaluator import (evaluate_model, format_metrics,
+                                           cross_validate, fold_metrics)
+from backend.utils.synthetic_data import generate_dataset
+import numpy as np
 import pandas as pd
+import pytest
+from sklearn.metrics import (roc_auc_score, precision_score, recall_score,
+                             f1_score)
 
 
 def test_evaluate_model():
@@ -91,3 +98,68 @@ def test_format_metrics():
     assert formatted == expected_result, (
         f"Expected {expected_result}, got {formatted}"
     )
+
+
+def test_cross_validate_out_of_fold_predictions():
+    X, y = preprocess_data(generate_dataset(500))
+
+    result = cross_validate(X, y, {'objective': 'binary:logistic'}, n_jobs=1,
+                            train_full=True)
+
+    assert result['oof_predictions'].shape == (500,), "One per row"
+    assert sorted(set(result['folds'].tolist())) == [0, 1, 2, 3, 4]
+    assert result['model'].feature_names == X.columns.tolist(), (
+        "The full model should keep the feature names"
+    )
+    for fold in range(5):
+        held_out = result['folds'] == fold
+        assert roc_auc_score(y[held_out],
+                             result['oof_predictions'][held_out]) == \
+            pytest.approx(result['metrics']['auc'][fold]), (
+            "Fold AUC should be computed from its out-of-fold predictions"
+        )
+
+
+def test_cross_validate_in_pool_matches_in_process():
+    X, y = preprocess_data(generate_dataset(500))
+    params = {'objective': 'binary:logistic'}
+
+    in_process = cross_validate(X, y, params, n_jobs=1)
+    in_pool = cross_validate(X, y, params, n_jobs=2)
+
+    np.testing.assert_allclose(in_pool['oof_predictions'],
+                               in_process['oof_predictions'])
+    assert in_pool['metrics'] == in_process['metrics']
+
+
+def test_fold_metrics_match_sklearn():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 1000)
+    # Rounded scores, so the AUC has to handle ties
+    y_pred = np.round(rng.random(1000), 2)
+    folds = rng.integers(0, 3, 1000)
+
+    metrics = fold_metrics(y_true, y_pred, folds)
+
+    for fold in range(3):
+        mask = folds == fold
+        labels = (y_pred[mask] > 0.5).astype(int)
+        expected = {
+            'auc': roc_auc_score(y_true[mask], y_pred[mask]),
+            'precision': precision_score(y_true[mask], labels,
+                                         zero_division=1),
+            'recall': recall_score(y_true[mask], labels),
+            'f1': f1_score(y_true[mask], labels),
+        }
+        for name, value in expected.items():
+            assert metrics[name][fold] == pytest.approx(value), (
+                f"{name} of fold {fold} differs from scikit-learn"
+            )
+
+
+def test_fold_metrics_undefined_ratios():
+    metrics = fold_metrics(np.array([0, 1]), np.array([0.1, 0.2]),
+                           np.array([0, 0]))
+    assert metrics['precision'] == [1.0], "No positive predictions"
+    assert metrics['recall'] == [0.0]
+    assert metrics['f1'] == [0.0]
@@ -0,0 +1,103 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from backend.config import MODEL_FILE_PATH, METRICS_FILE_PATH
+from backend.utils.model_registry import ModelRegistry
+from backend.utils.model_serializer import load_model, save_model
+
+
+@pytest.fixture
+def registry(tmp_path):
+    model_path = str(tmp_path / 'model.ubj')
+    metrics_path = str(tmp_path / 'metrics.json')
+    shutil.copy(MODEL_FILE_PATH, model_path)
+    shutil.copy(METRICS_FILE_PATH, metrics_path)
+    return ModelRegistry(model_path=model_path, metrics_path=metrics_path,
+                         engine='native', poll_interval=0.05)
+
+
+def _retrained(model_path):
+    model = load_model(model_path)
+    model.set_attr(note='retrained')
+    return model
+
+
+def test_load(registry):
+    assert registry.current is None
+    loaded = registry.load()
+    assert registry.current is loaded
+    assert len(loaded.version) == 12
+    assert 'auc' in loaded.metrics
+
+
+def test_ensure_loaded_loads_once_per_process(registry):
+    registry.ensure_loaded()
+    loaded = registry.current
+    assert loaded is not None
+
+    registry.ensure_loaded()
+
+    assert registry.current is loaded, (
+        "The model should be loaded only once per process"
+    )
+
+
+def test_concurrent_ensure_loaded_waits_for_the_model(registry):
+    found = []
+
+    def first_request():
+        registry.ensure_loaded()
+        found.append(registry.current)
+
+    threads = [threading.Thread(target=first_request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert None not in found, "No caller should return before the load"
+
+
+def test_ensure_loaded_without_model(registry):
+    os.remove(registry.model_path)
+
+    registry.ensure_loaded()
+
+    assert registry.current is None
+
+
+def test_reload_swaps_model(registry):
+    old = registry.load()
+    save_model(_retrained(registry.model_path), registry.model_path)
+
+    registry.reload_in_background().join()
+
+    assert registry.current is not old
+    assert registry.current.version != old.version
+
+
+def test_failed_reload_keeps_current_model(registry):
+    old = registry.load()
+    with open(registry.model_path, 'wb') as f:
+        f.write(b'not a model')
+
+    registry.reload_in_background().join()
+
+    assert registry.current is old
+
+
+def test_watcher_reloads_changed_model(registry):
+    old = registry.load()
+    registry.ensure_watching()
+    save_model(_retrained(registry.model_path), registry.model_path)
+
+    deadline = time.monotonic() + 5
+    while registry.current is old and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert registry.current.version != old.version
+
@@ -1,7 +1,12 @@
+import json
+
 import pandas as pd
 import pytest
 import xgboost as xgb
-from backend.utils.model_serializer import save_model, load_model
+from backend.utils.model_serializer import (save_model, load_model,
+                                            read_model_header, get_model_hash,
+                                            MODEL_FILE_MAGIC,
+                                            MODEL_FORMAT_VERSION)
 from backend.utils.model_trainer import train_model
 
 
@@ -67,3 +72,64 @@ def test_save_model_io_error():
 
     with pytest.raises(IOError):
         save_model(model, path=invalid_path)
+
+
+def _trained_model():
+    X = pd.DataFrame({'feature1': [1, 2, 3], 'feature2': [3, 4, 5]})
+    y = pd.Series([1, 0, 1])
+    return train_model(X, y, {'objective': 'binary:logistic'}), X
+
+
+@pytest.mark.parametrize('file_name', ['model.ubj', 'model.json'])
+def test_native_format_round_trip(tmp_path, file_name):
+    model, X = _trained_model()
+    path = str(tmp_path / file_name)
+    save_model(model, path=path)
+
+    loaded_model = load_model(path=path)
+    assert all(model.predict(xgb.DMatrix(X)) ==
+               loaded_model.predict(xgb.DMatrix(X))), (
+        "Model should work the same after loading.")
+
+
+def test_native_format_header(tmp_path):
+    model, _ = _trained_model()
+    path = str(tmp_path / 'model.ubj')
+    save_model(model, path=path)
+
+    header = read_model_header(path)
+    assert header['format_version'] == MODEL_FORMAT_VERSION
+    assert header['format'] == 'ubj'
+    assert header['sha256'] == get_model_hash(model), (
+        "Header hash should match the model's content hash.")
+
+
+def test_load_model_hash_mismatch(tmp_path):
+    model, _ = _trained_model()
+    path = str(tmp_path / 'model.ubj')
+    save_model(model, path=path)
+    with open(path, 'r+b') as f:
+        f.seek(-1, 2)
+        last = f.read(1)
+        f.seek(-1, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    with pytest.raises(ValueError):
+        load_model(path=path)
+
+
+def test_load_model_unsupported_version(tmp_path):
+    path = str(tmp_path / 'model.ubj')
+    header = {'format_version': MODEL_FORMAT_VERSION + 1, 'format': 'ubj',
+              'sha256': ''}
+    with open(path, 'wb') as f:
+        f.write(MODEL_FILE_MAGIC + json.dumps(header).encode() + b'\n')
+
+    with pytest.raises(ValueError):
+        load_model(path=path)
+
+
+def test_save_model_unsupported_extension(tmp_path):
+    model, _ = _trained_model()
+    with pytest.raises(IOError):
+        save_model(model, path=str(tmp_path / 'model.bin'))
@@ -0,0 +1,20 @@
+import json
+
+from backend.config import MODEL_PARAMS
+from backend.utils.params_storage import save_params, load_params
+
+
+def test_load_params_defaults_to_config(tmp_path):
+    assert load_params(str(tmp_path / 'params.json')) == MODEL_PARAMS
+
+
+def test_save_and_load_params(tmp_path):
+    path = str(tmp_path / 'params.json')
+    params = {'eta': 0.1, 'max_depth': 4, 'objective': 'binary:logistic'}
+
+    save_params(params, 80, path, cv_auc=0.94)
+
+    assert load_params(path) == {'XGB_PARAMS': params,
+                                 'XGB_NUM_BOOST_ROUND': 80}
+    with open(path) as f:
+        assert json.load(f)['cv_auc'] == 0.94, "Details should be recorded"
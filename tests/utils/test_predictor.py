@@ -1,6 +1,16 @@
+import numpy as np
 import pandas as pd
+import pytest
+import xgboost as xgb
 
-from backend.utils.predictor import make_prediction, _prepare_data
+from backend.utils.data_loader import FEATURES
+from backend.utils.feature_encoder import FeatureEncoder
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.model_trainer import train_model
+from backend.utils.synthetic_data import generate_columns
+from backend.utils.predictor import (make_prediction, make_predictions,
+                                     PredictionCache, _prepare_data)
+from backend.utils.model_serializer import load_model
 from unittest.mock import patch
 
 
@@ -49,9 +59,128 @@ def test_prepare_data():
     assert prepared_df['type_of_travel'].dtype == 'int'
 
 
+def test_prepare_data_missing_categorical_feature():
+    df = pd.DataFrame({
+        'customer_type': ['loyal_customer'],
+        'type_of_travel': ['business_travel'],
+        'age': [30],
+    })
+    with pytest.raises(KeyError):
+        _prepare_data(df)
+
+
 def test_make_prediction_exception():
     with patch('backend.utils.predictor._prepare_data') as mock_prepare:
         mock_prepare.side_effect = Exception("Test exception")
         prediction = make_prediction('fake_model', {})
         assert 'error' in prediction
         assert prediction['error'] == "Test exception"
+
+
+def test_make_predictions_matches_make_prediction():
+    model = load_model()
+    records = [
+        {
+            'customer_type': 'loyal_customer',
+            'age': 35,
+            'type_of_travel': 'business_travel',
+            'flight_distance': 500,
+            'ease_of_online_booking': 3,
+            'online_boarding': 4,
+            'class_': 'business'
+        },
+        {
+            'customer_type': 'disloyal_customer',
+            'age': 22,
+            'type_of_travel': 'personal_travel',
+            'flight_distance': 1500,
+            'ease_of_online_booking': 1,
+            'online_boarding': 2,
+            'class_': 'eco_plus'
+        },
+    ]
+    predictions = make_predictions(model, records)
+    assert len(predictions) == len(records)
+    for record, prediction in zip(records, predictions):
+        assert prediction == make_prediction(model, dict(record))
+
+
+def test_make_predictions_empty():
+    assert make_predictions('fake_model', []) == []
+
+
+RECORD = {
+    'customer_type': 'loyal_customer',
+    'age': 35,
+    'type_of_travel': 'business_travel',
+    'flight_distance': 500,
+    'ease_of_online_booking': 3,
+    'online_boarding': 4,
+    'class_': 'business'
+}
+
+
+def test_make_prediction_uses_cache():
+    model = load_model()
+    cache = PredictionCache(maxsize=10)
+    first = make_prediction(model, RECORD, cache=cache)
+    with patch.object(xgb, 'DMatrix') as mock_dmatrix:
+        second = make_prediction(model, RECORD, cache=cache)
+        mock_dmatrix.assert_not_called()
+    assert first == second
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_make_predictions_uses_cache():
+    model = load_model()
+    cache = PredictionCache(maxsize=10)
+    other = dict(RECORD, age=60)
+    make_prediction(model, RECORD, cache=cache)
+    predictions = make_predictions(model, [RECORD, other], cache=cache)
+    assert predictions == make_predictions(model, [RECORD, other], cache=None)
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['size'] == 2
+
+
+def test_make_predictions_uses_the_encoding_of_the_model():
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    features = encoder.encode_columns(generate_columns(1000))
+    X = pd.DataFrame(features, columns=encoder.feature_names)
+    y = pd.Series((features[:, 3] == 0).astype(int))
+    model = encoder.attach(train_model(X, y, {'max_depth': 2},
+                                       feature_types=encoder.feature_types))
+    records = [RECORD, dict(RECORD, class_='eco')]
+
+    dmatrix = xgb.DMatrix(encoder.encode_records(records),
+                          feature_names=encoder.feature_names,
+                          feature_types=encoder.feature_types)
+    expected = model.predict(dmatrix).tolist()
+    assert make_predictions(model, records, cache=None) == expected
+    np.testing.assert_allclose(
+        make_predictions(load_inference_engine(model, 'array'), records,
+                         cache=None), expected, rtol=0, atol=1e-6)
+
+
+def test_prediction_cache_lru_eviction():
+    cache = PredictionCache(maxsize=2)
+    cache.put('model', b'a', 0.1)
+    cache.put('model', b'b', 0.2)
+    cache.get('model', b'a')
+    cache.put('model', b'c', 0.3)
+    assert cache.get('model', b'b') is None, "LRU entry should be evicted"
+    assert cache.get('model', b'a') == 0.1
+    assert cache.get('model', b'c') == 0.3
+
+
+def test_prediction_cache_invalidated_on_model_change():
+    cache = PredictionCache(maxsize=2)
+    cache.put('model', b'a', 0.1)
+    assert cache.get('other_model', b'a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_prediction_cache_disabled():
+    cache = PredictionCache(maxsize=0)
+    cache.put('model', b'a', 0.1)
+    assert cache.get('model', b'a') is None
@@ -0,0 +1,63 @@
+import marshal
+
+from backend.utils.request_profiler import RequestProfiler
+
+
+def _work():
+    return sum(i * i for i in range(1000))
+
+
+def _profile_request(profiler, endpoint, forced=True):
+    profile = profiler.start(forced=forced)
+    if profile is not None:
+        _work()
+        profiler.stop(profile, endpoint)
+    return profile
+
+
+def test_disabled_profiler_never_profiles():
+    profiler = RequestProfiler(enabled=False, sample_rate=1.0)
+    assert profiler.start(forced=True) is None, "Disabled profiler profiled"
+
+
+def test_sampling():
+    assert RequestProfiler(enabled=True, sample_rate=0.0).start() is None, (
+        "Nothing should be sampled at rate 0"
+    )
+    profiler = RequestProfiler(enabled=True, sample_rate=1.0)
+    assert _profile_request(profiler, 'predict', forced=False) is not None, (
+        "Everything should be sampled at rate 1"
+    )
+
+
+def test_aggregates_per_endpoint():
+    profiler = RequestProfiler(enabled=True, sample_rate=0.0)
+    _profile_request(profiler, 'predict')
+    _profile_request(profiler, 'predict')
+    _profile_request(profiler, 'predict_batch')
+
+    assert profiler.summary() == {'predict': 2, 'predict_batch': 1}
+    assert '_work' in profiler.render('predict'), (
+        "Report should list the profiled function"
+    )
+    stats = marshal.loads(profiler.dump('predict'))
+    calls = [value[1] for key, value in stats.items() if key[2] == '_work']
+    assert calls == [2], "Dump should aggregate both requests"
+
+
+def test_one_request_at_a_time():
+    profiler = RequestProfiler(enabled=True, sample_rate=1.0)
+    first = profiler.start()
+    assert profiler.start() is None, "Concurrent profile should be skipped"
+    profiler.stop(first, 'predict')
+    assert _profile_request(profiler, 'predict') is not None, (
+        "Profiling should resume once the first profile stopped"
+    )
+
+
+def test_reset():
+    profiler = RequestProfiler(enabled=True, sample_rate=0.0)
+    _profile_request(profiler, 'predict')
+    profiler.reset()
+    assert profiler.summary() == {}, "Profiles should be dropped"
+    assert profiler.render('predict') is None, "Profile should be gone"
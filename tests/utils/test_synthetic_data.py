@@ -0,0 +1,35 @@
+from backend.schemas.fast_validator import PREDICTION_VALIDATOR
+from backend.utils.data_loader import preprocess_data, FEATURE_ENCODER
+from backend.utils.synthetic_data import (schema_domains, generate_columns,
+                                          generate_records, generate_dataset)
+
+
+def test_schema_domains():
+    domains = schema_domains()
+    assert domains['class'] == ['business', 'eco', 'eco_plus']
+    assert domains['age'] == (0, 120)
+    assert domains['online_boarding'] == (0, 5)
+    assert domains['flight_distance'] == (31, 4983)
+
+
+def test_generated_records_are_valid():
+    records = generate_records(500, seed=3)
+    assert len(records) == 500
+    # Raises ValidationError if any record is outside the schema domains
+    PREDICTION_VALIDATOR.load(records, many=True)
+
+
+def test_generation_is_seeded():
+    assert generate_records(10, seed=1) == generate_records(10, seed=1)
+    assert generate_records(10, seed=1) != generate_records(10, seed=2)
+
+
+def test_generated_columns_encode():
+    features = FEATURE_ENCODER.encode_columns(generate_columns(100))
+    assert features.shape == (100, FEATURE_ENCODER.n_features)
+
+
+def test_generated_dataset_preprocesses():
+    X, y = preprocess_data(generate_dataset(1000))
+    assert X.columns.tolist() == FEATURE_ENCODER.feature_names
+    assert set(y.unique()) == {0, 1}, "Both classes should be present"
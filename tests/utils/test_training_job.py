@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+from backend.utils.training_job import start_training_job, is_training_running
+
+
+def _wait_for_release(lock_path, timeout=5):
+    deadline = time.monotonic() + timeout
+    while os.path.exists(lock_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_start_training_job(tmp_path):
+    lock_path = str(tmp_path / 'models' / 'training.lock')
+    command = [sys.executable, '-c', 'import time; time.sleep(0.3)']
+
+    process = start_training_job(lock_path=lock_path, command=command)
+    assert process is not None, "Job should start"
+    assert is_training_running(lock_path), "Lock should name a live job"
+    assert start_training_job(lock_path=lock_path, command=command) is None, (
+        "A second job should not start while the first one runs"
+    )
+
+    process.wait()
+    _wait_for_release(lock_path)
+    assert not os.path.exists(lock_path), "Lock should be released"
+
+
+def test_failed_job_releases_lock(tmp_path):
+    lock_path = str(tmp_path / 'training.lock')
+    command = [sys.executable, '-c', 'raise SystemExit(1)']
+
+    process = start_training_job(lock_path=lock_path, command=command)
+    process.wait()
+    _wait_for_release(lock_path)
+    assert not os.path.exists(lock_path), "Lock should be released"
+
+
+def test_stale_lock_is_replaced(tmp_path):
+    lock_path = str(tmp_path / 'training.lock')
+    finished = start_training_job(
+        lock_path=str(tmp_path / 'other.lock'),
+        command=[sys.executable, '-c', 'pass'])
+    finished.wait()
+    # A lock left behind by a job that is no longer running
+    with open(lock_path, 'w') as f:
+        f.write(str(finished.pid))
+
+    process = start_training_job(
+        lock_path=lock_path, command=[sys.executable, '-c', 'pass'])
+    assert process is not None, "A stale lock should not block training"
+    process.wait()
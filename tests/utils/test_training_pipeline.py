@@ -0,0 +1,76 @@
+import shutil
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from backend.utils.artifact_store import ArtifactStore
+from backend.utils.data_loader import load_dataset, FEATURE_ENCODER
+from backend.utils.feature_encoder import model_encoder
+from backend.utils.model_serializer import get_model_hash
+from backend.utils.synthetic_data import generate_dataset
+from backend.utils.training_pipeline import run_pipeline
+
+PARAMS = {'objective': 'binary:logistic', 'max_depth': 3}
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data.csv'
+    generate_dataset(500).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'artifacts'))
+
+
+def test_run_pipeline_reuses_unchanged_stages(data_path, store):
+    result = run_pipeline(data_path, PARAMS, store=store)
+    assert result['reused'] == []
+
+    with patch('backend.utils.training_pipeline.load_stored_dataset',
+               side_effect=AssertionError("dataset loaded")):
+        rerun = run_pipeline(data_path, {**PARAMS, 'nthread': 1}, store=store)
+
+    assert rerun['reused'] == ['cross_validate', 'train']
+    assert rerun['metrics'] == result['metrics']
+    assert get_model_hash(rerun['model']) == get_model_hash(result['model'])
+
+
+def test_run_pipeline_models_carry_their_encoding(data_path, store):
+    for result in (run_pipeline(data_path, PARAMS, store=store),
+                   run_pipeline(data_path, PARAMS, store=store)):
+        encoder = model_encoder(result['model'])
+        assert encoder is not None, "The model should carry its encoding"
+        assert encoder.to_dict() == FEATURE_ENCODER.to_dict()
+
+
+def test_run_pipeline_reuses_preprocessing_for_new_params(data_path, store):
+    result = run_pipeline(data_path, PARAMS, store=store)
+
+    with patch('backend.utils.data_loader.load_data',
+               side_effect=AssertionError("dataset preprocessed")):
+        rerun = run_pipeline(data_path, {**PARAMS, 'max_depth': 2},
+                             store=store)
+
+    assert rerun['reused'] == ['preprocess']
+    assert rerun['keys']['preprocess'] == result['keys']['preprocess']
+    assert rerun['keys']['train'] != result['keys']['train']
+
+
+def test_run_pipeline_trains_missing_model_only(data_path, store):
+    result = run_pipeline(data_path, PARAMS, store=store)
+    # Drop the stored model, keeping the cross-validation metrics
+    shutil.rmtree(store.get(result['keys']['train']))
+
+    with patch('backend.utils.training_pipeline.cross_validate',
+               side_effect=AssertionError("cross-validated")):
+        rerun = run_pipeline(data_path, PARAMS, store=store)
+
+    assert rerun['reused'] == ['preprocess', 'cross_validate']
+    X, _ = load_dataset(data_path, cache_folder_path=None)
+    np.testing.assert_array_equal(rerun['model'].predict(xgb.DMatrix(X)),
+                                  result['model'].predict(xgb.DMatrix(X)))
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from backend.utils.data_loader import FEATURES, FEATURE_ENCODER
+from backend.utils.feature_encoder import FeatureEncoder
+from backend.utils.inference_engine import load_inference_engine
+from backend.utils.model_serializer import load_model
+from backend.utils.model_trainer import train_model
+from backend.utils.synthetic_data import generate_columns
+from backend.utils.tree_evaluator import TreeEnsemble
+
+
+def _random_features(n_rows, seed=0):
+    return FEATURE_ENCODER.encode_columns(generate_columns(n_rows, seed))
+
+
+def _booster_predict(model, features, **kwargs):
+    dmatrix = xgb.DMatrix(features,
+                          feature_names=FEATURE_ENCODER.feature_names)
+    return model.predict(dmatrix, **kwargs)
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    features = _random_features(5000)
+    X = pd.DataFrame(features, columns=FEATURE_ENCODER.feature_names)
+    y = pd.Series((features[:, 1] + features[:, 3] / 100 > 60).astype(int))
+    return X, y
+
+
+@pytest.mark.parametrize('params', [
+    {'objective': 'binary:logistic', 'max_depth': 6},
+    {'objective': 'binary:logistic', 'max_depth': 3, 'eta': 0.1},
+    {'objective': 'reg:squarederror', 'max_depth': 4},
+])
+def test_parity_on_training_data(training_data, params):
+    X, y = training_data
+    model = train_model(X, y, params)
+    ensemble = TreeEnsemble.from_booster(model)
+    features = X.to_numpy()
+    np.testing.assert_array_equal(
+        ensemble.predict_margin(features),
+        _booster_predict(model, features, output_margin=True))
+    np.testing.assert_allclose(ensemble.predict(features),
+                               _booster_predict(model, features),
+                               rtol=0, atol=1e-6)
+
+
+def test_parity_with_saved_model():
+    model = load_model()
+    ensemble = TreeEnsemble.from_booster(model)
+    features = _random_features(10000, seed=1)
+    np.testing.assert_array_equal(
+        ensemble.predict_margin(features),
+        _booster_predict(model, features, output_margin=True))
+    np.testing.assert_allclose(ensemble.predict(features),
+                               _booster_predict(model, features),
+                               rtol=0, atol=1e-6)
+
+
+def test_parity_with_missing_values(training_data):
+    X, y = training_data
+    features = X.to_numpy().copy()
+    features[::7, 1] = np.nan
+    features[::5, 3] = np.nan
+    dtrain = pd.DataFrame(features, columns=FEATURE_ENCODER.feature_names)
+    model = train_model(dtrain, y, {'objective': 'binary:logistic'})
+    ensemble = TreeEnsemble.from_booster(model)
+    np.testing.assert_array_equal(
+        ensemble.predict_margin(features),
+        _booster_predict(model, features, output_margin=True))
+
+
+def test_single_row(training_data):
+    X, y = training_data
+    model = train_model(X, y, {'objective': 'binary:logistic'})
+    ensemble = TreeEnsemble.from_booster(model)
+    row = X.to_numpy()[:1]
+    assert ensemble.predict(row).shape == (1,)
+    assert abs(ensemble.predict(row)[0] - _booster_predict(model, row)[0]) \
+        <= 1e-6
+
+
+def test_parity_with_categorical_splits():
+    encoder = FeatureEncoder(FEATURES, categorical=True)
+    features = encoder.encode_columns(generate_columns(5000))
+    # Class is column 3, coded business, eco, eco_plus
+    y = pd.Series((features[:, 3] == 1) ^ (features[:, 1] > 40)).astype(int)
+    features[::11, 3] = np.nan
+    X = pd.DataFrame(features, columns=encoder.feature_names)
+    model = encoder.attach(train_model(
+        X, y, {'objective': 'binary:logistic', 'max_cat_to_onehot': 1},
+        feature_types=encoder.feature_types))
+    ensemble = TreeEnsemble.from_booster(model)
+
+    # Unknown and negative codes go left, as in XGBoost
+    features[::13, 3] = 7
+    features[::17, 3] = -1
+    dmatrix = xgb.DMatrix(features, feature_names=encoder.feature_names,
+                          feature_types=encoder.feature_types)
+    np.testing.assert_array_equal(
+        ensemble.predict_margin(features),
+        model.predict(dmatrix, output_margin=True))
+    assert ensemble.encoder.feature_types == encoder.feature_types
+
+
+def test_unsupported_objective(training_data):
+    X, y = training_data
+    model = train_model(X, y, {'objective': 'count:poisson'})
+    with pytest.raises(ValueError):
+        TreeEnsemble.from_booster(model)
+
+
+def test_load_inference_engine_array():
+    model = load_model()
+    assert isinstance(load_inference_engine(model, 'array'), TreeEnsemble)